@@ -0,0 +1,463 @@
+#Benchmarks -----------------------------------------------------------
+
+"""
+Times the audio and library hot paths of the soundboard without a display or a sound card.
+
+A synthetic library of sounds is written to a temporary folder for each length and sample rate, and the
+same classes the application uses are run against it: decoding, channel mapping, resampling, mixing,
+library scans and duration probes. The results are written as JSON, so that a run can be compared
+against one from an earlier version with --compare.
+
+    python benchmarks.py --output before.json
+    python benchmarks.py --output after.json --compare before.json
+"""
+
+import os, sys, json, copy, time, argparse, platform, tempfile, subprocess, statistics
+from types import SimpleNamespace
+
+#Nothing is shown, but Qt is imported with the application and must not look for a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import soundfile as sf
+
+import tower_of_babel2 as tob
+
+FORMAT_VERSION = 1
+
+#--------------------------------------------------------------------
+
+def write_library(directory, count, seconds, samplerate, channels = 2):
+
+    """
+    Write 'count' WAV files of noise and a tone to 'directory' and return their paths.
+    The same seed is used every time, so every run measures the same audio.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    rng = np.random.default_rng(count * 1000 + samplerate)
+    frames = int(seconds * samplerate)
+    tone = np.sin(2 * np.pi * 440 * np.arange(frames) / samplerate).astype('float32')
+
+    paths = []
+
+    for i in range(count):
+
+        data = 0.1 * rng.standard_normal((frames, channels), dtype='float32') + 0.5 * tone[:, np.newaxis]
+        path = os.path.join(directory, f"sound_{i:04d}.wav")
+
+        sf.write(path, data, samplerate, subtype='PCM_16')
+        paths.append(path)
+
+    return paths
+
+
+def measure(function, repeat, setup = None):
+
+    """
+    Run 'function' once to warm up and then 'repeat' times, returning the timings in milliseconds.
+    'setup' is called before every run and is not timed; its result is passed to 'function'.
+    """
+
+    timings = []
+
+    for run in range(repeat + 1):
+
+        argument = setup() if setup is not None else None
+
+        start = time.perf_counter()
+        function(argument)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if run > 0:
+            timings.append(elapsed)
+
+    return timings
+
+
+def summarise(name, params, timings, per = 1):
+
+    """
+    Reduce the timings of a benchmark to one result. 'per' divides every timing, for benchmarks that time a batch.
+    """
+
+    timings = [t / per for t in timings]
+
+    return {"name": name,
+            "params": params,
+            "key": name + "".join(f" {k}={v}" for k, v in sorted(params.items())),
+            "repeat": len(timings),
+            "min_ms": round(min(timings), 4),
+            "median_ms": round(statistics.median(timings), 4),
+            "mean_ms": round(statistics.fmean(timings), 4),
+            "max_ms": round(max(timings), 4),
+            }
+
+
+def make_player(cache_path):
+
+    """
+    Create a MultiDevicePlayer without a main window; the player only reads the main window's settings and cache path.
+    It plays into a null backend running at unlimited speed, with two stereo 48kHz devices, which does not need
+    PortAudio or a sound card. The application's
+    defaults are used for every setting, so the player is set up as it would be on a first launch.
+    """
+
+    settings = copy.deepcopy(tob.MainWindow.DEFAULT_SETTINGS)
+    settings.update({"pcm_disk_cache": False,
+                     "pcm_cache_mb": 1024,
+                     "render_cache_mb": 1024,
+                     "engine_mode": "persistent",
+                     "low_latency": False,
+                     })
+
+    app = SimpleNamespace(settings = settings, pcm_cache_path = cache_path)
+
+    backend = tob.NullBackend(realtime = False, mirror = False)
+
+    return tob.MultiDevicePlayer(app, backend)
+
+
+#Benchmarks ---------------------------------------------------------
+
+def bench_decode(paths, params, repeat, scratch):
+
+    """
+    Cold decodes through the PCMCache, and reloads from the disk cache of decoded sounds.
+    """
+
+    results = []
+
+    #A zero budget stores nothing, so every get() decodes the file again
+    cold = tob.PCMCache(max_bytes = 0)
+    results.append(summarise("decode", params, measure(lambda _: [cold.get(p) for p in paths], repeat), len(paths)))
+
+    disk = tob.PCMDiskCache(os.path.join(scratch, "pcm_cache"))
+
+    for path in paths:
+        tob.PCMCache(max_bytes = 0, disk_cache = disk).get(path)
+
+    def disk_load(_):
+        for path in paths:
+            data, _ = disk.load(path)
+            float(data[-1, 0])
+
+    results.append(summarise("decode_disk_cache", params, measure(disk_load, repeat), len(paths)))
+
+    warm = tob.PCMCache()
+
+    for path in paths:
+        warm.get(path)
+
+    results.append(summarise("decode_memory_cache", params, measure(lambda _: [warm.get(p) for p in paths], repeat), len(paths)))
+
+    return results
+
+
+def bench_channels(data, params, repeat, player):
+
+    """
+    Channel mapping between the common layouts, and the full conversion for a device at another sample rate.
+    """
+
+    results = []
+    samplerate = params["samplerate"]
+
+    sources = {1: np.ascontiguousarray(data[:, :1]), 2: data, 6: np.repeat(data, 3, axis=1)}
+
+    for source_channels, target_channels in ((1, 2), (2, 1), (2, 2), (6, 2), (2, 6)):
+
+        source = sources[source_channels]
+        timings = measure(lambda _: player._match_channels(source, target_channels), repeat)
+
+        results.append(summarise("match_channels", dict(params, source=source_channels, target=target_channels), timings))
+
+    for target_rate in (44100, 48000):
+
+        timings = measure(lambda _: player.render_for_device(data, samplerate, target_rate, 2), repeat)
+        results.append(summarise("render_for_device", dict(params, target_rate=target_rate), timings))
+
+    return results
+
+
+def bench_mix(data, params, repeat, voices, blocksize, blocks = 200):
+
+    """
+    Mix 'voices' sounds into blocks of 'blocksize' frames as a device callback would, reporting the time per block.
+    """
+
+    data = np.ascontiguousarray(np.resize(data, (max(len(data), blocksize * blocks), data.shape[1])), dtype='float32')
+    data.flags.writeable = False
+
+    out = np.zeros((blocksize, data.shape[1]), dtype='float32')
+
+    def setup():
+
+        mixer = tob.VoiceMixer(data.shape[1], max_voices = voices)
+        mixer.prime(blocksize)
+
+        for _ in range(voices):
+            mixer.add(tob.Voice(data, params["samplerate"]))
+
+        return mixer
+
+    def run(mixer):
+        for _ in range(blocks):
+            mixer.mix(out)
+
+    #The summed voices go well past full scale, so the limiter is measured while it is working
+    def limit_setup():
+
+        limiter = tob.SoftLimiter(data.shape[1], params["samplerate"])
+        limiter.prime(blocksize)
+
+        return limiter
+
+    def limit(limiter):
+        for block in range(blocks):
+
+            np.multiply(data[block * blocksize:(block + 1) * blocksize], voices, out=out)
+            limiter.process(out)
+
+    params = dict(params, voices=voices, blocksize=blocksize)
+
+    return [summarise("mix_block", params, measure(run, repeat, setup), blocks),
+            summarise("limit_block", params, measure(limit, repeat, limit_setup), blocks)]
+
+
+def bench_trigger(paths, params, repeat, player):
+
+    """
+    The work play_sound() does for a persistent stream: fetch the device-ready data, start a voice and mix its first block.
+    """
+
+    out = np.zeros((256, 2), dtype='float32')
+
+    def cold():
+
+        player.cache.invalidate()
+        player.render_cache.invalidate()
+
+    def trigger(_):
+
+        for path in paths:
+
+            data, samplerate = player.render_cache.get(path, 48000, 2)
+
+            mixer = tob.VoiceMixer(2)
+            mixer.add(tob.Voice(data, samplerate))
+            mixer.mix(out)
+
+    results = [summarise("trigger_cold", params, measure(trigger, repeat, cold), len(paths))]
+    results.append(summarise("trigger_warm", params, measure(trigger, repeat), len(paths)))
+
+    return results
+
+
+def bench_playback(paths, params, repeat, player, voices = 8):
+
+    """
+    Play sounds with play_sound() on two devices of the null backend and wait until they finish. The backend takes
+    blocks as quickly as they are mixed, so this is the time the engine needs per second of audio.
+    """
+
+    devices = [0, 1]
+    player.open_streams(devices)
+
+    #The player only prints its errors, and a sound that did not start would finish straight away
+    if sorted(player.streams) != devices:
+        raise RuntimeError("unable to open a stream on every device of the null backend, see the errors above")
+
+    def play(_):
+
+        handles = [player.play_sound(paths[i % len(paths)], devices) for i in range(voices)]
+
+        if any(handle is None or len(handle.voices) != len(devices) for handle in handles):
+            raise RuntimeError("play_sound() did not start every sound on every device, see the errors above")
+
+        while any(handle.is_playing() for handle in handles):
+            time.sleep(0.0005)
+
+    timings = measure(play, repeat)
+    player.close_streams()
+
+    return [summarise("play_sound", dict(params, voices=voices), timings, params["seconds"])]
+
+
+def bench_library(directory, paths, params, repeat, scratch):
+
+    """
+    Full and unchanged library scans, and the mutagen duration probe used by MainWindow.get_duration().
+    """
+
+    os.makedirs(scratch, exist_ok=True)
+    index_file = os.path.join(scratch, "library_index.json")
+
+    def fresh():
+
+        if os.path.exists(index_file):
+            os.remove(index_file)
+
+        return tob.LibraryIndex(index_file)
+
+    results = [summarise("scan_full", params, measure(lambda index: index.scan(directory), repeat, fresh))]
+
+    index = tob.LibraryIndex(index_file)
+    index.scan(directory)
+
+    results.append(summarise("scan_unchanged", params, measure(lambda _: index.scan(directory), repeat)))
+
+    #get_duration() does not use the window, so it is timed without creating one
+    timings = measure(lambda _: [tob.MainWindow.get_duration(None, p, os.path.basename(p)) for p in paths], repeat)
+    results.append(summarise("get_duration", params, timings, len(paths)))
+
+    return results
+
+
+#Running ------------------------------------------------------------
+
+def environment():
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+
+    except OSError:
+        commit = None
+
+    return {"format": FORMAT_VERSION,
+            "commit": commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "soundfile": sf.__version__,
+            "libsndfile": sf.__libsndfile_version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            }
+
+
+def run(args):
+
+    results = []
+    player = None
+
+    with tempfile.TemporaryDirectory(prefix="soundboard_bench_") as scratch:
+
+        player = make_player(os.path.join(scratch, "player_cache"))
+
+        for seconds in args.lengths:
+            for samplerate in args.rates:
+
+                params = {"files": args.files, "seconds": seconds, "samplerate": samplerate}
+                directory = os.path.join(scratch, f"library_{seconds}_{samplerate}")
+
+                print(f"Library of {args.files} x {seconds}s at {samplerate}Hz", file=sys.stderr)
+
+                paths = write_library(directory, args.files, seconds, samplerate)
+                data, _ = tob.PCMCache().get(paths[0])
+
+                results += bench_decode(paths, params, args.repeat, os.path.join(scratch, f"cache_{seconds}_{samplerate}"))
+                results += bench_channels(data, params, args.repeat, player)
+                results += bench_trigger(paths, params, args.repeat, player)
+                results += bench_playback(paths, params, args.repeat, player)
+                results += bench_library(directory, paths, params, args.repeat, os.path.join(scratch, f"index_{seconds}_{samplerate}"))
+
+        #Mixing is measured once per voice count and block size, its cost does not depend on the file
+        data, _ = tob.PCMCache().get(write_library(os.path.join(scratch, "mix"), 1, 10, 48000)[0])
+
+        for voices in args.voices:
+            for blocksize in args.blocksizes:
+                results += bench_mix(data, {"samplerate": 48000}, args.repeat, voices, blocksize)
+
+    return {"environment": environment(), "results": results}
+
+
+def compare(current, baseline, threshold):
+
+    """
+    Print the median of every benchmark in both runs, marking the ones that changed by more than 'threshold'.
+    Returns the number of regressions.
+    """
+
+    before = {result["key"]: result for result in baseline["results"]}
+    regressions = 0
+
+    print(f"{'benchmark':<72} {'before':>10} {'after':>10} {'change':>8}")
+
+    for result in current["results"]:
+
+        old = before.get(result["key"])
+
+        if old is None:
+
+            print(f"{result['key']:<72} {'-':>10} {result['median_ms']:>10.4f} {'new':>8}")
+            continue
+
+        change = result["median_ms"] / old["median_ms"] - 1 if old["median_ms"] > 0 else 0.0
+        mark = ""
+
+        if change > threshold:
+
+            mark = " slower"
+            regressions += 1
+
+        elif change < -threshold:
+            mark = " faster"
+
+        print(f"{result['key']:<72} {old['median_ms']:>10.4f} {result['median_ms']:>10.4f} {change:>+8.1%}{mark}")
+
+    return regressions
+
+
+def number_list(kind):
+
+    return lambda text: [kind(value) for value in text.split(",") if value]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Time the soundboard's audio and library hot paths.")
+
+    parser.add_argument("--files", type=int, default=20, help="sounds in each synthetic library")
+    parser.add_argument("--lengths", type=number_list(float), default=[1.0, 10.0, 60.0], help="sound lengths in seconds, comma separated")
+    parser.add_argument("--rates", type=number_list(int), default=[44100, 48000], help="sample rates, comma separated")
+    parser.add_argument("--voices", type=number_list(int), default=[1, 8, 32], help="voice counts for the mixing benchmark")
+    parser.add_argument("--blocksizes", type=number_list(int), default=[256, 1024], help="block sizes for the mixing benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each benchmark")
+    parser.add_argument("--quick", action="store_true", help="a small run to check that everything works")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+
+    args = parser.parse_args()
+
+    if args.quick:
+
+        args.files = min(args.files, 3)
+        args.lengths = [1.0]
+        args.repeat = 2
+
+    current = run(args)
+
+    if args.output:
+
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=4)
+
+    if args.compare:
+
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+        return 1 if compare(current, baseline, args.threshold) else 0
+
+    if not args.output:
+        json.dump(current, sys.stdout, indent=4)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
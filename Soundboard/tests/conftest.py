@@ -0,0 +1,78 @@
+import os, shutil, sys
+
+import numpy as np
+import soundfile as sf
+import pytest
+
+#Nothing is shown, but Qt is imported with the application and must not look for a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+SOUNDBOARD = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, SOUNDBOARD)
+
+
+@pytest.fixture(scope="session")
+def qapp():
+
+    """
+    The application every widget is created under, made once for the whole run.
+    """
+
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def app_folder(qapp, tmp_path, monkeypatch):
+
+    """
+    A temporary copy of the Soundboard folder's themes and pictures, which the main window loads, with an empty
+    sounds folder. It is made the working directory, as the main window uses paths relative to it.
+    """
+
+    for folder in ("themes", "media"):
+        shutil.copytree(os.path.join(SOUNDBOARD, folder), tmp_path / folder)
+
+    os.mkdir(tmp_path / "sounds")
+    monkeypatch.chdir(tmp_path)
+
+    return tmp_path
+
+
+@pytest.fixture
+def messages(monkeypatch):
+
+    """
+    The titles of the message boxes shown, which are answered straight away as they would wait for someone to close them.
+    """
+
+    import tower_of_babel2 as tob
+
+    shown = []
+
+    monkeypatch.setattr(tob.QMessageBox, "information", lambda parent, title, text: shown.append(title))
+    monkeypatch.setattr(tob.QMessageBox, "warning", lambda parent, title, text: shown.append(f"{title}: {text}"))
+
+    return shown
+
+
+@pytest.fixture
+def write_sound(tmp_path):
+
+    """
+    Write a WAV file of a quiet tone and return its path.
+    """
+
+    def write(name = "tone.wav", seconds = 0.5, samplerate = 48000, channels = 2):
+
+        frames = int(seconds * samplerate)
+        tone = 0.25 * np.sin(2 * np.pi * 440 * np.arange(frames) / samplerate)
+
+        path = os.path.join(tmp_path, name)
+        sf.write(path, np.repeat(tone[:, None], channels, axis=1).astype('float32'), samplerate, subtype='FLOAT')
+
+        return path
+
+    return write
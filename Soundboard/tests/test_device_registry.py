@@ -0,0 +1,91 @@
+import tower_of_babel2 as tob
+
+
+class ListedBackend(tob.OutputBackend):
+
+    """
+    A backend whose devices are whatever the test lists, counting how often it is asked to rescan.
+    """
+
+    name = "listed"
+
+    def __init__(self, devices):
+
+        self.devices = devices
+        self.rescans = 0
+
+
+    def query_devices(self, device = None, kind = None):
+
+        if device is None:
+            return [dict(info, index = index) for index, info in enumerate(self.devices)]
+
+        return dict(self.devices[device], index = device)
+
+
+    def hostapi_name(self, hostapi):
+
+        return ["MME", "Windows WASAPI"][hostapi]
+
+
+    def rescan(self):
+
+        self.rescans += 1
+
+
+def device(name, hostapi = 1, outputs = 2):
+
+    return {"name": name, "hostapi": hostapi, "max_output_channels": outputs, "default_samplerate": 48000.0}
+
+
+def test_keys_are_made_from_name_and_host_api():
+
+    registry = tob.DeviceRegistry(ListedBackend([device("Speakers"), device("Speakers", hostapi = 0), device("Headset")]))
+
+    assert registry.key(0) == "Speakers|Windows WASAPI"
+    assert registry.key(1) == "Speakers|MME"
+    assert registry.resolve("Headset|Windows WASAPI") == 2
+
+
+def test_identical_devices_are_told_apart_by_order():
+
+    registry = tob.DeviceRegistry(ListedBackend([device("USB Audio"), device("USB Audio")]))
+
+    assert registry.key(0) == "USB Audio|Windows WASAPI"
+    assert registry.key(1) == "USB Audio|Windows WASAPI|2"
+
+
+def test_key_follows_the_device_when_indices_shift():
+
+    backend = ListedBackend([device("Speakers"), device("Headset")])
+    registry = tob.DeviceRegistry(backend)
+
+    key = registry.key(1)
+
+    backend.devices.insert(0, device("Virtual Cable"))
+
+    assert registry.refresh(rescan = True)
+    assert backend.rescans == 1
+    assert registry.resolve(key) == 2
+    assert registry.info(2)["name"] == "Headset"
+
+
+def test_refresh_reports_whether_anything_changed():
+
+    backend = ListedBackend([device("Speakers")])
+    registry = tob.DeviceRegistry(backend)
+
+    assert registry.refresh()
+    assert not registry.refresh()
+
+    backend.devices.pop()
+
+    assert registry.refresh()
+    assert registry.resolve("Speakers|Windows WASAPI") is None
+
+
+def test_outputs_skip_input_only_devices():
+
+    registry = tob.DeviceRegistry(ListedBackend([device("Microphone", outputs = 0), device("Speakers")]))
+
+    assert [info["name"] for info in registry.outputs()] == ["Speakers"]
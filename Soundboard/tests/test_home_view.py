@@ -0,0 +1,103 @@
+import json, os
+
+import pytest
+import shiboken6
+from PySide6.QtCore import QCoreApplication, QEvent
+
+import tower_of_babel2 as tob
+
+
+@pytest.fixture
+def window(app_folder, messages, write_sound):
+
+    """
+    A main window over a sounds folder of two sounds, playing to the null backend. The window is never shown,
+    so startup does not open streams or scan the folder in the background, and the sounds come from the index.
+    """
+
+    for name in ("Airhorn.wav", "Crickets.wav"):
+        write_sound(os.path.join("sounds", name))
+
+    with open("settings.json", "w") as f:
+        json.dump({"output_backend": "null", "normalise_loudness": False}, f)
+
+    tob.LibraryIndex("library_index.json").scan("sounds")
+
+    main_window = tob.MainWindow()
+    main_window.messages = messages
+
+    yield main_window
+
+    main_window.close()
+    main_window.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+
+def leave_home(window):
+
+    old_buttons = list(window.home_buttons.values())
+
+    window.edit_files()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+    #The home view's buttons really are gone, so touching them would raise
+    assert old_buttons and not any(shiboken6.isValid(btn) for btn in old_buttons)
+
+
+def test_home_view_shows_the_indexed_sounds(window):
+
+    assert sorted(window.home_buttons) == ["Airhorn", "Crickets"]
+    assert window.home_view_active
+
+
+def test_renaming_from_the_editor_leaves_the_old_buttons_alone(window):
+
+    leave_home(window)
+
+    window.edit_files_view.rename_sound("Airhorn")
+    window.edit_files_view.rename_box.setText("Foghorn")
+    window.edit_files_view.save_rename("Airhorn")
+
+    assert window.messages == ["Success!"]
+    assert window.home_buttons == {}
+    assert "Foghorn" in window.sound_buttons
+
+    window.build_home_view()
+
+    assert sorted(window.home_buttons) == ["Crickets", "Foghorn"]
+    assert window.home_buttons["Foghorn"].text() == " Foghorn"
+
+
+def test_icon_changes_away_from_home_are_saved_and_shown_later(window, monkeypatch):
+
+    leave_home(window)
+
+    picture = os.path.abspath("media/images/cassette.png")
+    monkeypatch.setattr(tob.QFileDialog, "getOpenFileName", lambda *args: (picture, ""))
+
+    window.edit_files_view.change_emoji("Crickets")
+    window.thumbnail_ready(picture, 60)
+
+    assert not window.messages
+
+    with open(window.BUTTON_ICONS_FILE, "r") as f:
+        assert json.load(f) == {"Crickets": picture}
+
+    window.build_home_view()
+
+    assert not window.home_buttons["Crickets"].icon().isNull()
+
+
+def test_key_bindings_made_away_from_home_show_once_it_is_back(window):
+
+    window.settings_config()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+    window.set_key_binding("Airhorn", 1, "Ctrl+A")
+
+    assert [shortcut.key().toString() for shortcut in window.key_shortcuts] == ["Ctrl+A"]
+
+    window.build_home_view()
+
+    assert window.home_buttons["Airhorn"].toolTip() == "Key: Ctrl+A"
+    assert window.home_buttons["Crickets"].toolTip() == ""
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import tower_of_babel2 as tob
+
+
+@pytest.fixture
+def library(tmp_path, write_sound):
+
+    os.mkdir(tmp_path / "sounds")
+
+    for name in ("a.wav", "b.wav"):
+        write_sound(os.path.join("sounds", name))
+
+    return tob.LibraryIndex(str(tmp_path / "library_index.json")), str(tmp_path / "sounds")
+
+
+def test_first_scan_probes_every_sound(library):
+
+    index, sounds = library
+
+    entries = index.scan(sounds)
+
+    assert sorted(entries) == ["a.wav", "b.wav"]
+    assert sorted(index.changes["added"]) == ["a.wav", "b.wav"]
+    assert entries["a.wav"]["samplerate"] == 48000
+    assert entries["a.wav"]["channels"] == 2
+    assert entries["a.wav"]["duration"] == 0.5
+
+
+def test_unchanged_sounds_are_not_probed_again(library, monkeypatch):
+
+    index, sounds = library
+    index.scan(sounds)
+
+    probed = []
+    probe = index.probe
+
+    monkeypatch.setattr(index, "probe", lambda path, stat = None: probed.append(os.path.basename(path)) or probe(path, stat))
+
+    index.scan(sounds)
+    assert probed == []
+    assert not any(index.changes.values())
+
+    mtime = os.path.getmtime(os.path.join(sounds, "a.wav"))
+    os.utime(os.path.join(sounds, "a.wav"), (mtime + 10, mtime + 10))
+    os.remove(os.path.join(sounds, "b.wav"))
+
+    index.scan(sounds)
+
+    assert probed == ["a.wav"]
+    assert index.changes == {"added": [], "modified": ["a.wav"], "removed": ["b.wav"]}
+
+
+def test_index_is_reloaded_from_its_file(library):
+
+    index, sounds = library
+    index.scan(sounds)
+    index.set_trim("a.wav", {"start": 10, "end": 100, "samplerate": 48000})
+
+    reloaded = tob.LibraryIndex(index.index_file)
+    reloaded.scan(sounds)
+
+    assert not any(reloaded.changes.values())
+    assert reloaded.entries["a.wav"]["trim"] == {"start": 10, "end": 100, "samplerate": 48000}
+
+
+def test_rename_keeps_the_entry_and_its_trim(library):
+
+    index, sounds = library
+    index.scan(sounds)
+    index.set_trim("a.wav", {"start": 10, "end": 100, "samplerate": 48000})
+
+    os.rename(os.path.join(sounds, "a.wav"), os.path.join(sounds, "c.wav"))
+    index.rename("a.wav", "c.wav", os.path.join(sounds, "c.wav"))
+
+    index.scan(sounds)
+
+    assert sorted(index.entries) == ["b.wav", "c.wav"]
+    assert index.entries["c.wav"]["trim"]["start"] == 10
+    assert not any(index.changes.values())
+
+
+def test_loudness_for_a_changed_file_is_dropped(library):
+
+    index, sounds = library
+    entries = index.scan(sounds)
+
+    index.set_loudness([("a.wav", {"mtime": entries["a.wav"]["mtime"], "lufs": -20.0}),
+                        ("b.wav", {"mtime": entries["b.wav"]["mtime"] - 1, "lufs": -20.0}),
+                        ("gone.wav", {"mtime": 0, "lufs": -20.0})])
+
+    assert index.entries["a.wav"]["loudness"]["lufs"] == -20.0
+    assert index.entries["b.wav"]["loudness"] is None
+    assert "gone.wav" not in index.entries
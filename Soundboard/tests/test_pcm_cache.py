@@ -0,0 +1,121 @@
+import os
+
+import tower_of_babel2 as tob
+
+
+def test_repeat_gets_are_hits_and_share_one_read_only_copy(write_sound):
+
+    path = write_sound()
+    cache = tob.PCMCache()
+
+    data, samplerate = cache.get(path)
+    again, _ = cache.get(path)
+
+    assert samplerate == 48000
+    assert again is data
+    assert not data.flags.writeable
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_played_sound_is_evicted_first(write_sound):
+
+    paths = [write_sound(f"{index}.wav") for index in range(3)]
+    size = tob.PCMCache().get(paths[0])[0].nbytes
+
+    cache = tob.PCMCache(max_bytes = size * 2)
+
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+
+    cached = {key[0] for key in cache.entries}
+
+    assert cached == {os.path.abspath(paths[0]), os.path.abspath(paths[2])}
+    assert cache.evictions == 1
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_sound_larger_than_the_budget_is_not_kept(write_sound):
+
+    path = write_sound()
+    cache = tob.PCMCache(max_bytes = 1024)
+
+    cache.get(path)
+
+    assert cache.stats()["entries"] == 0
+    assert cache.current_bytes == 0
+
+
+def test_modified_file_is_decoded_again_and_the_old_copy_freed(write_sound):
+
+    path = write_sound()
+    cache = tob.PCMCache()
+
+    cache.get(path)
+
+    mtime = os.path.getmtime(path)
+    os.utime(path, (mtime + 10, mtime + 10))
+
+    cache.get(path)
+
+    assert cache.misses == 2
+    assert len(cache.entries) == 1
+
+
+def test_invalidate_and_set_budget(write_sound):
+
+    paths = [write_sound(f"{index}.wav") for index in range(2)]
+    cache = tob.PCMCache()
+
+    for path in paths:
+        cache.get(path)
+
+    cache.invalidate(paths[0])
+    assert [key[0] for key in cache.entries] == [os.path.abspath(paths[1])]
+
+    cache.set_budget(0)
+    assert cache.current_bytes == 0 and not cache.entries
+
+
+def test_disk_cache_forgets_removed_sounds(tmp_path, write_sound):
+
+    #Sounds of the same length would share one copy, as they are identical
+    paths = [write_sound(f"{index}.wav", seconds = index + 1) for index in range(2)]
+    disk_cache = tob.PCMDiskCache(str(tmp_path / "pcm_cache"))
+
+    for path in paths:
+        tob.PCMCache(disk_cache = disk_cache).get(path)
+
+    os.remove(paths[0])
+
+    assert disk_cache.prune() > 0
+    assert list(disk_cache.index) == [os.path.abspath(paths[1])]
+    assert len([name for name in os.listdir(tmp_path / "pcm_cache") if name.endswith(".pcm")]) == 1
+    assert disk_cache.load(paths[1]) is not None
+
+
+def test_disk_cache_removes_least_recently_used_copies_over_budget(tmp_path, write_sound):
+
+    paths = [write_sound(f"{index}.wav", seconds = index + 1) for index in range(3)]
+    disk_cache = tob.PCMDiskCache(str(tmp_path / "pcm_cache"), max_bytes = 10 ** 9)
+
+    for index, path in enumerate(paths):
+
+        tob.PCMCache(disk_cache = disk_cache).get(path)
+
+        #Modification times can be too coarse to tell copies made in a row apart
+        pcm_path = os.path.join(disk_cache.directory, f"{disk_cache._content_hash(path)}.pcm")
+        os.utime(pcm_path, (1000 + index, 1000 + index))
+
+    #Opening the oldest copy makes the second one the least recently used
+    disk_cache.load(paths[0])
+
+    sizes = {path: os.path.getsize(os.path.join(disk_cache.directory, f"{disk_cache._content_hash(path)}.pcm")) for path in paths}
+
+    disk_cache.max_bytes = sizes[paths[0]] + sizes[paths[2]]
+    disk_cache.prune()
+
+    assert disk_cache.load(paths[1]) is None
+    assert disk_cache.load(paths[0]) is not None
+    assert disk_cache.load(paths[2]) is not None
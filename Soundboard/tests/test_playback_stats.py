@@ -0,0 +1,74 @@
+import json, sys, threading
+
+import tower_of_babel2 as tob
+
+
+def test_only_the_first_mark_of_a_stage_is_kept():
+
+    stats = tob.PlaybackStats()
+    trigger = stats.start_trigger("sounds/Airhorn.wav")
+
+    stats.mark(trigger, "decoded")
+    first = trigger["stages"]["decoded"]["None"]
+    stats.mark(trigger, "decoded")
+
+    stats.mark(trigger, "first_block", 0)
+    stats.mark(trigger, "first_block", 1)
+
+    summary = stats.summary()
+
+    assert trigger["stages"]["decoded"]["None"] == first
+    assert summary["triggers"] == 1
+    assert summary["stages_ms"]["decoded"]["count"] == 1
+    assert summary["stages_ms"]["first_block"]["count"] == 2
+    assert summary["stages_ms"]["stream_open"] == {"count": 0}
+
+
+def test_summary_can_be_read_while_audio_threads_mark(tmp_path):
+
+    stats = tob.PlaybackStats()
+    triggers = [stats.start_trigger(f"{index}.wav") for index in range(200)]
+    errors = []
+
+    def mark():
+
+        try:
+
+            #Every mark adds to the dictionaries the summary reads
+            for device in range(50):
+
+                for trigger in triggers:
+                    stats.mark(trigger, "first_block", device)
+
+        except Exception as e:
+            errors.append(e)
+
+    #Switching threads as often as possible lets a mark land in the middle of reading the marks
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    try:
+
+        thread = threading.Thread(target=mark)
+        thread.start()
+
+        while thread.is_alive():
+
+            try:
+
+                stats.summary()
+                stats.dump(str(tmp_path / "stats.json"))
+
+            except Exception as e:
+                errors.append(e)
+
+        thread.join()
+
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    assert stats.summary()["stages_ms"]["first_block"]["count"] == 200 * 50
+
+    with open(tmp_path / "stats.json", "r") as f:
+        assert len(json.load(f)["recent_triggers"]) == 200
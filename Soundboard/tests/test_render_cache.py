@@ -0,0 +1,59 @@
+import numpy as np
+
+import tower_of_babel2 as tob
+
+
+def test_render_runs_once_per_device_format(write_sound):
+
+    path = write_sound()
+    calls = []
+
+    def render(data, source_rate, samplerate, channels, gain):
+
+        calls.append((samplerate, channels, gain))
+
+        return np.repeat(data[:, :1], channels, axis=1) * gain
+
+    cache = tob.RenderCache(tob.PCMCache(), render)
+
+    first, samplerate = cache.get(path, 44100, 2, 0.5)
+    again, _ = cache.get(path, 44100, 2, 0.5)
+
+    assert again is first
+    assert samplerate == 44100
+    assert not first.flags.writeable
+
+    cache.get(path, 44100, 1, 0.5)
+    cache.get(path, 44100, 2, 1.0)
+
+    assert calls == [(44100, 2, 0.5), (44100, 1, 0.5), (44100, 2, 1.0)]
+    assert cache.pcm_cache.misses == 1
+
+
+def test_surround_is_folded_down_with_the_standard_matrix():
+
+    player = tob.MultiDevicePlayer.__new__(tob.MultiDevicePlayer)
+
+    #Front left, front right, centre, LFE, surround left, surround right
+    data = np.array([[1, 0, 0, 0, 0, 0],
+                     [0, 0, 1, 0, 0, 0],
+                     [0, 0, 0, 1, 0, 0],
+                     [0, 0, 0, 0, 0, 1]], dtype='float32')
+
+    stereo = player._match_channels(data, 2)
+
+    expected = [[1, 0], [0.7071, 0.7071], [0, 0], [0, 0.7071]]
+
+    assert stereo.shape == (4, 2)
+    assert np.allclose(stereo, expected, atol=1e-4)
+
+
+def test_mono_and_unknown_layouts():
+
+    player = tob.MultiDevicePlayer.__new__(tob.MultiDevicePlayer)
+
+    mono = np.array([[0.5], [-0.5]], dtype='float32')
+    assert np.array_equal(player._match_channels(mono, 2), [[0.5, 0.5], [-0.5, -0.5]])
+
+    seven = np.arange(14, dtype='float32').reshape(2, 7)
+    assert np.array_equal(player._match_channels(seven, 2), seven[:, :2])
@@ -0,0 +1,58 @@
+import numpy as np
+
+import tower_of_babel2 as tob
+
+
+def test_loud_audio_never_goes_over_the_threshold():
+
+    rng = np.random.default_rng(0)
+    limiter = tob.SoftLimiter(2, 48000, gain = 2.0, threshold = 0.9)
+
+    for _ in range(200):
+
+        size = int(rng.choice([1, 32, 64, 256, 512, 1024]))
+        block = rng.uniform(-1, 1, (size, 2)).astype('float32') * rng.choice([0.1, 0.5, 1.0])
+
+        assert np.abs(limiter.process(block)).max() <= 0.9 + 1e-5
+
+    assert limiter.reduction < 1.0
+
+
+def test_quiet_audio_is_only_delayed_and_gained():
+
+    rng = np.random.default_rng(1)
+    audio = rng.uniform(-0.2, 0.2, (4096, 2)).astype('float32')
+
+    limiter = tob.SoftLimiter(2, 48000, gain = 1.5)
+    lookahead = limiter.lookahead
+
+    played = np.concatenate([limiter.process(audio[start:start + 300].copy()) for start in range(0, len(audio), 300)])
+    played = np.concatenate((played, limiter.flush()))
+
+    assert lookahead == 96
+    assert len(played) == len(audio) + lookahead
+    assert np.allclose(played[:lookahead], 0)
+    assert np.allclose(played[lookahead:], audio * 1.5, atol=1e-6)
+    assert limiter.reduction == 1.0
+
+
+def test_blocks_are_processed_in_place():
+
+    limiter = tob.SoftLimiter(2, 48000)
+    block = np.ones((256, 2), dtype='float32')
+
+    assert limiter.process(block) is block
+
+
+def test_gain_recovers_once_it_is_quiet_again():
+
+    limiter = tob.SoftLimiter(1, 48000, release = 0.05)
+
+    limiter.process(np.full((512, 1), 4.0, dtype='float32'))
+    limited = limiter.reduction
+
+    for _ in range(50):
+        limiter.process(np.full((512, 1), 0.1, dtype='float32'))
+
+    assert limited < 0.3
+    assert limiter.reduction > 0.99
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import tower_of_babel2 as tob
+
+
+@pytest.mark.parametrize("samplerate, target_rate", [(44100, 48000), (48000, 44100), (22050, 48000), (96000, 44100)])
+def test_blocks_join_seamlessly(samplerate, target_rate):
+
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-1, 1, (20000, 2)).astype('float32')
+
+    resampler = tob.StreamResampler(samplerate, target_rate)
+    blocks = []
+    start = 0
+
+    #Block sizes include single frames, which can produce no output at all when downsampling
+    while start < len(audio):
+
+        size = int(rng.choice([1, 2, 7, 64, 511, 1024, 3000]))
+        blocks.append(resampler.process(audio[start:start + size]))
+        start += size
+
+    streamed = np.concatenate(blocks)
+
+    step = samplerate / target_rate
+    positions = np.arange(int((len(audio) - 1) // step) + 1) * step
+    expected = np.stack([np.interp(positions, np.arange(len(audio)), audio[:, channel]) for channel in range(2)], axis=1)
+
+    assert streamed.shape == expected.shape
+    assert np.allclose(streamed, expected, atol=1e-4)
+
+
+def test_matching_rates_pass_blocks_through():
+
+    block = np.zeros((256, 2), dtype='float32')
+
+    assert tob.StreamResampler(48000, 48000).process(block) is block
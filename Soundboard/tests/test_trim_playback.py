@@ -0,0 +1,114 @@
+import json, os, time
+
+import numpy as np
+import pytest
+import soundfile as sf
+from PySide6.QtCore import QCoreApplication, QEvent
+
+import tower_of_babel2 as tob
+
+
+def play_trimmed(samplerate, engine_mode, trim_start, trim_end):
+
+    """
+    Play a sound trimmed to the given frames through a main window that writes what each device plays to a WAV
+    file, and return the sound and the captures. Every sample of the sound is different, so the captures show
+    exactly which frames were played.
+    """
+
+    frames = samplerate
+    ramp = (0.1 + 0.5 * np.arange(frames) / frames).astype('float32')
+    sound = np.stack((ramp, -ramp), axis = 1)
+
+    sf.write("sounds/Ramp.wav", sound, samplerate, subtype='FLOAT')
+
+    with open("settings.json", "w") as f:
+        json.dump({"output_backend": "file", "backend_realtime": False, "engine_mode": engine_mode, "normalise_loudness": False}, f)
+
+    index = tob.LibraryIndex("library_index.json")
+    index.scan("sounds")
+    index.set_trim("Ramp.wav", {"start": trim_start, "end": trim_end, "samplerate": samplerate})
+
+    window = tob.MainWindow()
+    window.player.open_streams(window.output_devices())
+
+    try:
+
+        handle = window.play_sound("Ramp")
+
+        deadline = time.perf_counter() + 5
+
+        while handle.is_playing() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        for thread in window.player.threads:
+            thread.join(5)
+
+    finally:
+
+        window.close()
+        window.deleteLater()
+        QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+    captures = [sf.read(os.path.join("captures", name), dtype='float32')[0] for name in sorted(os.listdir("captures"))]
+
+    return sound, captures
+
+
+#Frames that come back one short if the round trip through seconds is truncated rather than rounded
+@pytest.mark.parametrize("samplerate, start, end", [(44100, 4004, 30007), (48000, 4001, 30011)])
+def test_stream_per_sound_plays_exactly_the_trimmed_frames(app_folder, samplerate, start, end):
+
+    sound, captures = play_trimmed(samplerate, "per_click", start, end)
+
+    #The limiter holds the output back by its look-ahead, and lets it out at the end
+    lookahead = int(round(tob.MainWindow.DEFAULT_SETTINGS["limiter_lookahead_ms"] / 1000 * samplerate))
+
+    assert len(captures) == 2
+
+    for captured in captures:
+
+        assert len(captured) == lookahead + end - start
+        assert np.all(captured[:lookahead] == 0)
+        assert np.array_equal(captured[lookahead:, :2], sound[start:end])
+
+
+def test_persistent_stream_plays_exactly_the_trimmed_frames(app_folder):
+
+    sound, captures = play_trimmed(48000, "persistent", 4001, 30011)
+
+    assert len(captures) == 2
+
+    for captured in captures:
+
+        #The stream was playing silence before the sound started, and after it ended
+        played = captured[np.any(captured != 0, axis = 1)]
+
+        assert np.array_equal(played[:, :2], sound[4001:30011])
+
+
+def test_retargeting_lands_on_the_same_frames_as_a_trim():
+
+    data = np.arange(48000, dtype='float32').reshape(-1, 1)
+    voice = tob.Voice(data, 48000)
+    handle = tob.PlaybackHandle("sound.wav", [voice])
+
+    #These come back a frame short of the trim if the round trip through seconds is truncated
+    start, end = 4001, 30011
+    handle.set_region(start / 48000, end / 48000)
+
+    out = np.zeros((64, 1), dtype='float32')
+    scratch = np.empty_like(out)
+    played = []
+
+    while not voice.finished:
+
+        out.fill(0)
+        voice.render(out, scratch)
+        played.append(out[:, 0].copy())
+
+    played = np.concatenate(played)
+
+    assert (voice.start, voice.end) == (start, end)
+    assert played[0] == start
+    assert np.count_nonzero(played) == end - start
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import tower_of_babel2 as tob
+
+
+def constant(frames = 48000, channels = 1):
+
+    data = np.ones((frames, channels), dtype='float32')
+    data.flags.writeable = False
+
+    return data
+
+
+def test_voices_are_summed():
+
+    mixer = tob.VoiceMixer(2)
+
+    for gain in (0.25, 0.5):
+        mixer.add(tob.Voice(constant(channels = 2), 48000, gain))
+
+    out = np.zeros((64, 2), dtype='float32')
+    mixer.mix(out)
+
+    assert np.all(out == 0.75)
+
+
+def test_stolen_voice_is_faded_out_rather_than_cut():
+
+    mixer = tob.VoiceMixer(1, max_voices = 2)
+    voices = [tob.Voice(constant(), 48000) for _ in range(3)]
+
+    for voice in voices:
+        mixer.add(voice)
+
+    out = np.zeros((64, 1), dtype='float32')
+    mixed = []
+
+    for _ in range(10):
+
+        mixer.mix(out)
+        mixed.append(out[:, 0].copy())
+
+    mixed = np.concatenate(mixed)
+    fade = int(tob.VoiceMixer.STEAL_FADE * 48000)
+
+    #The oldest voice goes from full level to nothing over the steal fade, one small step at a time
+    assert voices[0].finished and not voices[1].finished and not voices[2].finished
+    assert mixed[0] == pytest.approx(3.0, abs=0.01)
+    assert np.all(np.abs(np.diff(mixed)) <= 1.5 / fade)
+    assert np.all(mixed[fade:] == 2.0)
+    assert len(mixer.active) == 2
+
+
+def test_finished_voices_leave_the_mixer():
+
+    mixer = tob.VoiceMixer(1)
+    mixer.add(tob.Voice(constant(100), 48000))
+
+    out = np.zeros((64, 1), dtype='float32')
+
+    mixer.mix(out)
+    mixer.mix(out)
+
+    assert np.all(out[:36] == 1.0) and np.all(out[36:] == 0)
+    assert mixer.active == []
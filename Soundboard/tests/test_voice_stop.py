@@ -0,0 +1,165 @@
+import copy, time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import tower_of_babel2 as tob
+
+
+def render(voice, blocks, blocksize = 64, channels = 1):
+
+    """
+    Mix a voice on its own for the given number of blocks, as a stream's callback would.
+    """
+
+    out = np.zeros((blocksize, channels), dtype='float32')
+    scratch = np.empty_like(out)
+    played = []
+
+    for _ in range(blocks):
+
+        out.fill(0)
+        voice.render(out, scratch)
+        played.append(out[:, 0].copy())
+
+    return np.concatenate(played)
+
+
+def constant(frames = 48000, channels = 1):
+
+    data = np.ones((frames, channels), dtype='float32')
+    data.flags.writeable = False
+
+    return data
+
+
+def test_stop_fades_out_over_the_fade_and_then_finishes():
+
+    voice = tob.Voice(constant(), 48000, gain = 0.5)
+    before = render(voice, 4)
+
+    voice.stop(0.01)
+    after = render(voice, 20)
+
+    #10ms at 48kHz
+    ramp = after[:480]
+
+    assert np.all(before == 0.5)
+    assert np.all(np.diff(ramp) <= 0) and np.all(ramp[:-1] > 0)
+    assert ramp[0] == pytest.approx(0.5, abs=0.01)
+    assert np.all(after[480:] == 0)
+    assert voice.finished
+
+
+def test_stop_without_a_fade_is_immediate():
+
+    voice = tob.Voice(constant(), 48000)
+    render(voice, 1)
+
+    voice.stop()
+
+    assert np.all(render(voice, 2) == 0)
+    assert voice.finished
+
+
+def test_a_stopping_voice_cannot_be_brought_back():
+
+    voice = tob.Voice(constant(), 48000)
+
+    voice.stop(0.01)
+    voice.set_gain(1.0)
+    voice.fade_to(1.0, 0.5)
+
+    played = render(voice, 20)
+
+    assert np.all(np.diff(played[:480]) <= 0)
+    assert voice.finished
+
+
+def test_fade_to_ramps_the_gain_without_stopping():
+
+    voice = tob.Voice(constant(), 48000, gain = 1.0)
+
+    voice.fade_to(0.25, 0.005)
+    played = render(voice, 10)
+
+    assert np.all(np.diff(played[:240]) < 0)
+    assert np.all(played[240:] == 0.25)
+    assert not voice.finished
+
+
+def test_handle_stops_one_device_only():
+
+    voices = [tob.Voice(constant(), 48000) for _ in range(2)]
+    handle = tob.PlaybackHandle("sound.wav", voices, devices = [0, 1])
+
+    handle.stop_device(1, 0.01)
+    render(voices[0], 20)
+    render(voices[1], 20)
+
+    assert not voices[0].finished
+    assert voices[1].finished
+    assert handle.is_playing()
+
+
+@pytest.fixture
+def player(tmp_path):
+
+    """
+    A player on two devices of the null backend, taking blocks at the rate a sound card would.
+    """
+
+    settings = copy.deepcopy(tob.MainWindow.DEFAULT_SETTINGS)
+    settings.update({"pcm_disk_cache": False, "stop_fade_ms": 20})
+
+    player = tob.MultiDevicePlayer(SimpleNamespace(settings = settings, pcm_cache_path = str(tmp_path)), tob.NullBackend(mirror = False))
+    player.open_streams([0, 1])
+
+    yield player
+
+    player.stop()
+    player.close_streams()
+
+
+def wait_for(condition, timeout = 2.0):
+
+    deadline = time.perf_counter() + timeout
+
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.005)
+
+    return condition()
+
+
+def test_stopping_returns_at_once_and_fades_in_the_audio_path(player):
+
+    handles = [player.play_data("sound.wav", constant(48000 * 10, 2), 48000, device) for device in (0, 1)]
+
+    assert wait_for(lambda: all(voice.position > 0 for handle in handles for voice in handle.voices))
+
+    started = time.perf_counter()
+    player.stop_all()
+    took = time.perf_counter() - started
+
+    #The fade has only been asked for, the audio thread does the rest
+    assert took < 0.05
+    assert all(handle.is_playing() for handle in handles)
+
+    assert wait_for(lambda: not any(handle.is_playing() for handle in handles), timeout = 1.0)
+
+
+def test_stop_sound_and_stop_device_leave_the_rest_playing(player):
+
+    first = [player.play_data("first.wav", constant(48000 * 10, 2), 48000, device) for device in (0, 1)]
+    second = player.play_data("second.wav", constant(48000 * 10, 2), 48000, 0)
+
+    player.stop_sound("first.wav")
+    assert wait_for(lambda: not any(handle.is_playing() for handle in first))
+    assert second.is_playing()
+
+    other = player.play_data("third.wav", constant(48000 * 10, 2), 48000, 1)
+
+    player.stop_device(0)
+    assert wait_for(lambda: not second.is_playing())
+    assert other.is_playing()
@@ -1,7 +1,12 @@
 #Imports -------------------------------------------------------------
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtGui import QAction, QIcon, QPixmap, QIntValidator
+import time
+
+#Taken before anything else is imported, so the startup timings include the imports
+STARTUP_STARTED = time.perf_counter()
+
+from PySide6.QtCore import QSize, Qt, QFileSystemWatcher, QTimer, QAbstractTableModel, QModelIndex, QRect, QEvent, Signal, QObject, QRunnable, QThreadPool, QRectF
+from PySide6.QtGui import QAction, QIcon, QPixmap, QIntValidator, QImage, QPainter, QColor, QShortcut, QKeySequence
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -20,975 +25,5469 @@ from PySide6.QtWidgets import (
     QScrollArea, 
     QSlider,
     QLineEdit,
-    QFrame, 
-    QStackedLayout
+    QStackedLayout,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QStyle,
+    QToolTip,
+    QProgressDialog,
+    QKeySequenceEdit,
+    QMenu
     
 )
 
 from PySide6.QtGui import QFontDatabase
 
-from superqt import QDoubleRangeSlider
-
-import sys, os, json, threading, random
-import sounddevice as sd
-import soundfile as sf
+import sys, os, json, threading, random, hashlib, copy
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import importlib
+import multiprocessing
+import math
 import shutil
-import numpy as np
-from mutagen import File as MutagenFile
 import getpass
 import traceback
-import time
 
-#--------------------------------------------------------------------
 
-class MultiDevicePlayer:
+class LazyModule:
     
-    def __init__(self, main_app):
+    """
+    Stands in for a module until one of its attributes is first used, and only imports it then. The module
+    then takes the place of its stand-in in this file, so later uses cost the same as a normal import.
+    
+    This keeps modules such as numpy and sounddevice, which take hundreds of milliseconds to import and to
+    initialise PortAudio, off the path to the window being shown.
+    """
+    
+    def __init__(self, name, alias):
         
-        self.stop_event = threading.Event()
-        self.threads = []
-        self.main_app = main_app
-
-
-    def play_sound(self, path, devices, volume = 1.0):
+        self.__dict__["_name"] = name
+        self.__dict__["_alias"] = alias
         
-        """
-        Play the given sound file on the input and output device simultaneously 
-        """
         
-        try:
-            data, samplerate = sf.read(path, dtype='float32')
-            
-        except Exception as e:
-            
-            print(f"Error, Failed to read audio file, see: {e}")
-            return
-
-        if data.ndim == 1:
-            data = np.expand_dims(data, axis=1)
-
-        data = np.clip(data * volume, -1.0, 1.0)
-        self.stop_event.clear()
-
-        self.threads = []
+    def __getattr__(self, attribute):
         
-        for device in devices:
-            
-            thread = threading.Thread(target=self._play_on_device,
-                                 args=(data.copy(), samplerate, device))
-            thread.start()
-            self.threads.append(thread)
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        
+        return getattr(module, attribute)
+    
+    
+superqt = LazyModule("superqt", "superqt")
+sd = LazyModule("sounddevice", "sd")
+sf = LazyModule("soundfile", "sf")
+np = LazyModule("numpy", "np")
+mutagen = LazyModule("mutagen", "mutagen")
 
+#--------------------------------------------------------------------
 
-    def _play_on_device(self, data, samplerate, device):
+class PCMDiskCache:
+    
+    """
+    Stores decoded sounds on disk as raw float32 PCM, each next to a small JSON header, and opens them
+    again with np.memmap. After a restart, the first press of a sound is then a page-in rather than a
+    decode, and every process reading the same file shares the same pages.
+    
+    Files are named by the hash of the sound's contents, so identical sounds share one entry. The index
+    remembers the size and modification time each hash was computed for, so a sound is only re-hashed
+    once it changes.
+    
+    The copies are limited to 'max_bytes' on disk. Each copy's modification time is set whenever it is
+    opened, and prune() removes the copies of sounds that no longer exist, then the least recently used.
+    """
+    
+    def __init__(self, directory, max_bytes = 2048 * 1024 * 1024):
+        
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock = threading.Lock()
+        
+        os.makedirs(directory, exist_ok=True)
         
         try:
-            
-            device_info = sd.query_devices(device, 'output')
-            max_channels = device_info['max_output_channels']
-
-            data = self._match_channels(data, max_channels)
-
-            with sd.OutputStream(device=device,
-                                 samplerate=samplerate,
-                                 channels=data.shape[1],
-                                 dtype='float32') as stream:
-
-                
-                blocksize = 1024
-                idx = 0
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
                 
-                while idx < len(data):
-                    
-                    if self.stop_event.is_set():
-                        break
-                    
-                    chunk = data[idx:idx+blocksize]
-                    stream.write(chunk)
-                    idx += blocksize
-
-        except Exception as e:
+        except (OSError, ValueError):
+            self.index = {}
             
-            print(f"Error, unable to play sound on device {device}, \n\n see {e}.")
-            print(type(super))
             
-
-
-    def _match_channels(self, data, max_channels):
+    def load(self, path):
         
         """
-        Downmix or upmix audio to match the device's max channels.
+        Return (data, samplerate) as a read-only memory map, or None if the sound has not been stored yet.
         """
         
-        num_channels = data.shape[1]
-
-        if num_channels == max_channels:
-            return data
+        content_hash = self._content_hash(path)
+        header_path = os.path.join(self.directory, f"{content_hash}.json")
         
-        elif max_channels == 1:
-            return data.mean(axis=1, keepdims=True) 
+        if not os.path.exists(header_path):
+            return None
         
-        elif max_channels == 2:
+        try:
             
-            mono = data.mean(axis=1)
-            return np.stack((mono, mono), axis=1)  
-        
-        else:
+            with open(header_path, "r") as f:
+                header = json.load(f)
+                
+            pcm_path = os.path.join(self.directory, f"{content_hash}.pcm")
             
-            if num_channels > max_channels:
-                return data[:, :max_channels]
+            data = np.memmap(pcm_path, dtype=header["dtype"], mode="r", shape=(header["frames"], header["channels"]))
             
-            else:
+            #Marks the copy as recently used, for prune()
+            try:
+                os.utime(pcm_path)
                 
-                pad_width = max_channels - num_channels
-                return np.hstack((data, np.zeros((len(data), pad_width), dtype=data.dtype)))
-
-
-    def stop(self):
-    
-        """
-        Signal all threads to stop playback.
-        """
-        
-        self.stop_event.set()
-        
-        for t in self.threads:
-            t.join()
+            except OSError:
+                pass
             
-
-class Settings(QWidget):
-    
-    def __init__(self, main_app):
-        
-        super().__init__()
-        self.main_app = main_app
-
-        self.main_app.resize(QSize(500, 400))
+            return data, header["samplerate"]
         
-        self.setWindowTitle("Settings")
-        self.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
-        
-        layout = QVBoxLayout(self)
-        self.grid = QGridLayout()
-        
-        layout.addLayout(self.grid)
-        
-        devices = [device["name"] for device in sd.query_devices()]
-        
-        input_audio_label = QLabel("Default Input Device (Headphones): ")
-        output_audio_label = QLabel("Default Output Device (Microphone): ")
-        
-        self.input_audio_option = QComboBox()
-        self.input_audio_option.addItems(devices)
-        self.input_audio_option.setCurrentIndex(main_app.settings["default_input"])
-        
-        self.output_audio_option = QComboBox()
-        self.output_audio_option.addItems(devices)
-        self.output_audio_option.setCurrentIndex(main_app.settings["default_output"])
-        
-        save_button = QPushButton("Save")
-        save_button.clicked.connect(self.save)
-        save_button.setFixedSize(60,20)
+        except (OSError, ValueError, KeyError) as e:
+            
+            print(f"Error, the cached copy of {path} is unreadable and will be rebuilt, see: {e}")
+            return None
         
-        self.default_volume_label = QLabel("Default Volume Setting: ")
-        self.default_volume = QLineEdit()
-        self.default_volume.setFixedSize(QSize(400, 20))
-        self.default_volume.setPlaceholderText("Enter the volume here, E.g. 100")
-        self.default_volume.setValidator(QIntValidator(1, 100, self))
         
-
-        self.username_label = QLabel("Username: ")
-        self.username = QLineEdit()
-        self.username.setFixedSize(QSize(400, 20))
-        self.username.setPlaceholderText(f"{self.main_app.settings["username"]}")
+    def store(self, path, data, samplerate):
         
-        self.grid.addWidget(input_audio_label, 0, 0, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(self.input_audio_option, 0, 1, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(output_audio_label, 1, 0, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(self.output_audio_option, 1, 1, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(self.default_volume_label, 2, 0, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(self.default_volume, 2, 1, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(self.username_label, 3, 0, Qt.AlignmentFlag.AlignCenter)
-        self.grid.addWidget(self.username, 3, 1, Qt.AlignmentFlag.AlignCenter)
+        content_hash = self._content_hash(path)
+        pcm_path = os.path.join(self.directory, f"{content_hash}.pcm")
         
-        layout.addWidget(save_button, Qt.AlignmentFlag.AlignCenter)
-
-        with open("themes/style_sheet_settings.qss", "r") as f:
-            self.setStyleSheet(f.read())
+        #Write to temporary files first so another process never maps a half written file
+        data.astype('float32', copy=False).tofile(f"{pcm_path}.tmp")
+        os.replace(f"{pcm_path}.tmp", pcm_path)
         
+        header = {"samplerate": samplerate, "frames": data.shape[0], "channels": data.shape[1], "dtype": "float32"}
+        header_path = os.path.join(self.directory, f"{content_hash}.json")
         
-    def save(self):
-
-        try:
-
-            self.main_app.settings["default_output"] = self.output_audio_option.currentIndex()
-            self.main_app.settings["default_input"] = self.input_audio_option.currentIndex()
-
-
-            if self.default_volume.text().strip() != "":
-
-                self.main_app.settings["volume"] = float(self.default_volume.text())/100
-                self.main_app.volume_slider.setValue(self.main_app.settings["volume"]*100)
-
-            if self.username.text().strip() != "":
-
-                self.main_app.settings["username"] = self.username.text()
+        with open(f"{header_path}.tmp", "w") as f:
+            json.dump(header, f)
             
-            self.main_app.save_settings()
-
-            QMessageBox.information(self, "Success!", "Your settings have been saved successfully.")
-            
-
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Unable to save settings, see: {e}")
-
+        os.replace(f"{header_path}.tmp", header_path)
         
+        self.prune()
         
-class EditFiles(QWidget):
-    
-    def __init__(self, main_app):
         
-        super().__init__()
+    def prune(self):
         
-        self.main_app = main_app
-        self.setWindowTitle("Edit File(s)")
-        self.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+        """
+        Forget the sounds that no longer exist and remove their copies, then remove the least recently used copies
+        until the rest fit within 'max_bytes'. Returns the number of bytes freed.
+        """
         
-
-        self.button_to_options_mapping = {}
-
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-            
-        self.layout = QVBoxLayout(self)
-            
-        self.content_widget = QWidget()
-        self.content_widget.setObjectName("ContentWidget")
-        self.grid = QGridLayout(self.content_widget)
+        copies = []
         
-        self.load_sound_options()
-
-        self.resize(QSize(1400, 1000))
-
-        with open("themes/style_sheet_edit_files.qss", "r") as f:
-            self.setStyleSheet(f.read())
-    
-    
-    def load_sound_options(self):
-
-        try:
-
-            if self.grid:
-
-                for i in reversed(range(self.grid.count())):
-                    item = self.grid.itemAt(i)
-                    widget = item.widget()
-
-                    if widget is not None:
-                        widget.setParent(None) 
-                        widget.deleteLater()
-
-        except Exception as e:
+        for name in os.listdir(self.directory):
             
-            print(f"Unable to reload: {e}")
-
-            pass
-
-
-        self.scroll_area.setWidget(self.content_widget)
-        self.layout.addWidget(self.scroll_area)
+            content_hash, extension = os.path.splitext(name)
             
-        self.emoji = QLabel("Emoji")
-        self.emoji.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-
-        self.emoticons_list = os.listdir(f"{self.main_app.icons_path}")
+            if extension != ".pcm":
+                continue
             
-        self.sound_name = QLabel("Name")
-        self.sound_name.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+                
+            except OSError:
+                continue
             
-        self.duration = QLabel("Duration")
-        self.duration.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+            copies.append((stat.st_mtime, stat.st_size, content_hash))
             
-        self.options = QLabel("Options")
-        self.options.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        #The copies are listed first, so any copy being written meanwhile already has its sound in the index
+        with self.lock:
             
-        self.underline = self.create_horizontal_separator()
-        self.heading_line = self.create_horizontal_separator()
-        self.bottom_line = self.create_horizontal_separator()
+            missing = [path for path in self.index.keys() if not os.path.exists(path)]
             
-        #These are the vertical lines that span from left to right
-        self.vertical_separator = self.create_vertical_separator()
-        self.vertical_separator2 = self.create_vertical_separator()
-        self.vertical_separator3 = self.create_vertical_separator()
-        self.vertical_separator4 = self.create_vertical_separator()
-        self.vertical_separator5 = self.create_vertical_separator()
+            for path in missing:
+                self.index.pop(path)
+                
+            if missing:
+                self._save_index()
+                
+            used = {entry["hash"] for entry in self.index.values()}
             
+        total = sum(size for _, size, _ in copies)
+        freed = 0
+        
+        for _, size, content_hash in sorted(copies):
             
-        font = self.emoji.font()
-        font.setPointSize(15)
+            if content_hash in used and total <= self.max_bytes:
+                continue
             
-        self.emoji.setFont(font)
-        self.sound_name.setFont(font)
-        self.duration.setFont(font)
-        self.options.setFont(font)
-
-        
-        self.grid.addWidget(self.emoji, 1, 0)
-        self.grid.addWidget(self.sound_name, 1, 1)
-        self.grid.addWidget(self.duration, 1, 2)
-        self.grid.addWidget(self.options, 1, 3)
-
-        self.grid.addWidget(self.heading_line, 0, 0, 1, -1)
-        self.grid.addWidget(self.underline, 2, 0, 1, -1)
-
+            #A copy that is still mapped cannot be removed on Windows, it is tried again by the next prune
+            if self._remove_files(content_hash):
+                
+                total -= size
+                freed += size
+                
+        return freed
+    
+    
+    def _content_hash(self, path):
         
-
-        curr_grid = 3
+        path = os.path.abspath(path)
+        stat = os.stat(path)
         
-        for key, value in self.main_app.sound_buttons.items():
+        with self.lock:
             
-            sound_name = QLabel(key)
-            sound_name.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            sound_name.setObjectName("TableContentLabels")
-            
-            emoji = QLabel()
-
-            if "emoji" in self.main_app.sound_buttons[key].keys(): 
-                emoji.setPixmap(QPixmap(f"{value["emoji"]}").scaled(70,70))
+            entry = self.index.get(path)
             
-            edit_emoji_button = QPushButton()
-            edit_emoji_button.setIcon(QIcon(f"{self.main_app.icons_path}/Edit_Emoji.png"))
-            edit_emoji_button.setStatusTip("Change Emoji/Picture")
-            edit_emoji_button.clicked.connect(lambda _, name = sound_name, emoji = emoji: self.change_emoji(name, emoji))
-            edit_emoji_button.setFixedSize(40, 30)
-            edit_emoji_button.setStyleSheet("margin-left: 10px; padding-right: 10px;")
+            if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                return entry["hash"]
             
-            remove_emoji_button = QPushButton()
-            remove_emoji_button.setIcon(QIcon(f"{self.main_app.icons_path}/Remove_Icon.png"))
-            remove_emoji_button.setStatusTip("Remove the set icon")
-            remove_emoji_button.clicked.connect(lambda _, name = sound_name: self.remove_emoji(name))
-            remove_emoji_button.setFixedSize(40, 30)
+        digest = hashlib.sha1()
+        
+        with open(path, "rb") as f:
             
-            emoji_widgets_box = QWidget()
-            emoji_widgets_layout = QHBoxLayout(emoji_widgets_box)
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+                
+        content_hash = digest.hexdigest()
+        
+        with self.lock:
             
-            emoji_widgets_layout.setContentsMargins(0, 0, 0, 0)
-            emoji_widgets_layout.setSpacing(10)
+            old_entry = self.index.get(path)
+            self.index[path] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": content_hash}
             
-            emoji_widgets_layout.addWidget(edit_emoji_button)
-            emoji_widgets_layout.addWidget(remove_emoji_button)
-            emoji_widgets_layout.addWidget(emoji) 
+            if old_entry is not None and old_entry["hash"] != content_hash:
+                self._remove_unused(old_entry["hash"])
+                
+            self._save_index()
             
-            duration = QLabel(f"{value["duration"]}s")
-            duration.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            duration.setObjectName("TableContentLabels")
+        return content_hash
+    
+    
+    def _remove_unused(self, content_hash):
+        
+        if any(entry["hash"] == content_hash for entry in self.index.values()):
+            return
+        
+        self._remove_files(content_hash)
+        
+        
+    def _remove_files(self, content_hash):
+        
+        try:
             
-            remove_button = QPushButton()
-            remove_button.setIcon(QIcon(f"{self.main_app.icons_path}/cross.png"))
-            remove_button.setStatusTip("Remove Sound")
-            remove_button.clicked.connect(lambda _, name = sound_name: self.delete_sound(name))
-            remove_button.setFixedSize(70, 20)
+            os.remove(os.path.join(self.directory, f"{content_hash}.pcm"))
+            os.remove(os.path.join(self.directory, f"{content_hash}.json"))
             
-            edit_name_button = QPushButton()
-            edit_name_button.setIcon(QIcon(f"{self.main_app.icons_path}/application-rename.png"))
-            edit_name_button.setStatusTip("Rename Sound")
-            edit_name_button.clicked.connect(lambda _, name = sound_name: self.rename_sound(name))
-            edit_name_button.setFixedSize(70, 20)
+        except FileNotFoundError:
+            pass
+        
+        except OSError:
+            return False
+        
+        return True
             
-            edit_sound_length_button = QPushButton()
-            edit_sound_length_button.setIcon(QIcon(f"{self.main_app.icons_path}/radio--pencil"))
-            edit_sound_length_button.setStatusTip("Modify Sound Length/Segment")
-            edit_sound_length_button.clicked.connect(lambda _, name = sound_name, len =  duration: self.edit_sound_length(name, len))
-            edit_sound_length_button.setFixedSize(70, 20)
-            edit_sound_length_button.setStyleSheet("margin-right: 5px;")
             
-            option_widgets_box = QWidget()
-            option_widgets_box_layout = QHBoxLayout(option_widgets_box)
+    def _save_index(self):
+        
+        try:
             
-            option_widgets_box_layout.setContentsMargins(0, 0, 0, 0)
-            option_widgets_box_layout.setSpacing(10)
+            with open(f"{self.index_path}.tmp", "w") as f:
+                json.dump(self.index, f)
+                
+            os.replace(f"{self.index_path}.tmp", self.index_path)
             
-            option_widgets_box_layout.addWidget(remove_button)
-            option_widgets_box_layout.addWidget(edit_name_button)
-            option_widgets_box_layout.addWidget(edit_sound_length_button)
-          
-            self.grid.addWidget(emoji_widgets_box, curr_grid, 0)          
-            self.grid.addWidget(sound_name, curr_grid, 1)
-            self.grid.addWidget(duration, curr_grid, 2)
-            self.grid.addWidget(option_widgets_box, curr_grid, 3)
-
-            self.button_to_options_mapping[sound_name] = {"remove": remove_button, 
-                                                          "rename": edit_name_button, 
-                                                          "modify_length": edit_sound_length_button,
-                                                          "pos": curr_grid,
-                                                        }
-
+        except OSError as e:
+            print(f"Error, unable to save the sound cache index, see: {e}")
             
-            curr_grid += 1
-
-        self.grid.addWidget(self.bottom_line, curr_grid, 0, 1, -1)
-
-        self.grid.addWidget(self.vertical_separator, 0, 0, -1, 1, alignment = Qt.AlignmentFlag.AlignRight)
-        self.grid.addWidget(self.vertical_separator2, 0, 2, -1, 1, alignment = Qt.AlignmentFlag.AlignRight)
-        self.grid.addWidget(self.vertical_separator3, 0, 0, -1, 1, alignment = Qt.AlignmentFlag.AlignLeft)
-        self.grid.addWidget(self.vertical_separator4, 0, 3, -1, 1, alignment = Qt.AlignmentFlag.AlignRight)
-        self.grid.addWidget(self.vertical_separator5, 0, 2, -1, 1, alignment = Qt.AlignmentFlag.AlignLeft)
-
-        with open("themes/style_sheet_edit_files.qss", "r") as f:
-            self.setStyleSheet(f.read())
-
-    
-    def create_vertical_separator(self):
-        
-        vertical_separator = QFrame()
-        vertical_separator.setFrameShape(QFrame.VLine)
-        vertical_separator.setFrameShadow(QFrame.Plain)
-        vertical_separator.setStyleSheet("color: gray; background-color: gray; padding: 50px")
-        vertical_separator.setFixedWidth(4)
-        
 
-        return vertical_separator
+class PCMCache:
     
+    """
+    Holds decoded sounds in memory so that repeat triggers skip the decoder.
     
-    def create_horizontal_separator(self):
-
-        horizontal_separator = QFrame()
-        horizontal_separator.setFrameShape(QFrame.HLine)
-        horizontal_separator.setFrameShadow(QFrame.Plain)
-        horizontal_separator.setStyleSheet("color: gray; background-color: gray; padding-left: 50px;")
-        horizontal_separator.setFixedHeight(4)
-
-        return horizontal_separator
-    
+    Entries are keyed by the absolute path and modification time of the file, so an edited
+    file is decoded again. Once the byte budget is exceeded, the least recently played
+    sounds are evicted first.
+    """
     
-    def change_emoji(self, name, emoji):
+    def __init__(self, max_bytes = 256 * 1024 * 1024, disk_cache = None):
         
-        file_path, _ = QFileDialog.getOpenFileName(self, f"Select Image for {name.text()}", "", "Image Files (*.png *.jpg *.jpeg)")
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
         
-        if file_path:
-                
-            try:
-                
-                emoji.setPixmap(QPixmap(file_path).scaled(40,40))
-                self.main_app.sound_buttons[name.text()]["emoji"] = file_path
-                self.main_app.button_icons[name.text()] = file_path
-
-                self.main_app.save_icons()
-                self.main_app.edit_files()
-                    
-                    
-            except Exception as e:
-                error_msg = traceback.format_exc()
-                QMessageBox.warning(self, "Error", f"Failed to change icon to {file_path}:\n{e}, \n\n and see: {error_msg}")
-                
-                
-    def remove_emoji(self, name):
+        self.disk_cache = disk_cache
         
-        if self.main_app.sound_buttons[name.text()]["emoji"] == f"{self.main_app.icons_path}/Icon_Placeholder.png":
-            
-            QMessageBox.information(self, "No Image Set", f"No image has been set for '{name.text()}'. \n\n The icon cannot be removed.")
-            return
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         
-        warning_msg = QMessageBox.warning(self, "Warning", f"This will remove the icon set for '{name.text()}', are you sure you'd like to continue?", 
-                                          QMessageBox.Yes | QMessageBox.Cancel)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
         
-        try:
         
-            if warning_msg == QMessageBox.Yes:
-                
-                self.main_app.sound_buttons[name.text()]["emoji"] = f"{self.main_app.icons_path}/Icon_Placeholder.png"
-                self.main_app.button_icons[name.text()] = f"{self.main_app.icons_path}/Icon_Placeholder.png"
-                
-                self.main_app.save_icons()
-                self.main_app.edit_files()
+    def get(self, path):
+        
+        """
+        Return (data, samplerate) for the given file, decoding it only on a cache miss.
+        The returned array is read-only as it is shared between every trigger.
+        """
+        
+        key = (os.path.abspath(path), os.path.getmtime(path))
+        
+        with self.lock:
+            
+            if key in self.entries:
                 
-                ok_box = QMessageBox.information(self, "Success!", f"The icon for '{name.text()}' has been removed.")
+                self.entries.move_to_end(key)
+                self.hits += 1
                 
-        except Exception as e:
+                return self.entries[key]
             
-            error_msg = traceback.format_exc()
-            QMessageBox.warning(self, "ERROR", f"There was a problem removing the icon for '{name.text()}', \n\n see: {e}, \n\n and see: {error_msg}")
+            self.misses += 1
+            
+        data, samplerate = self._decode(path)
         
+        self._store(key, data, samplerate)
         
+        return data, samplerate
     
     
-    def delete_sound(self, name):
-
-        warning_msg = QMessageBox.question(self, "Confirm", f"Are you sure that you want to delete '{name.text()}'?", 
-                                           QMessageBox.Cancel | QMessageBox.Yes)
-        
-        ok_box = QMessageBox(self)
-        ok_box.setWindowTitle("Success!")
-        ok_box.setText(f"'{name.text()}' has been successfully deleted.")
-        ok_box.setStandardButtons(QMessageBox.Ok)
-        
-        try:
-
-            if warning_msg == QMessageBox.Yes:
-
-                print(f"Removing {self.main_app.sound_buttons[name.text()]["path"]}...")
-                os.remove(self.main_app.sound_buttons[name.text()]["path"])
-                self.main_app.sound_buttons.pop(name.text())
-                
-                if name.text() in self.main_app.button_icons.keys():
-                    self.main_app.button_icons.pop(name.text())
-
-                ok_box.exec()
-
-                self.main_app.edit_files()
-                self.main_app.save_icons()
-                
+    def _decode(self, path):
         
-        except Exception as e:
+        if self.disk_cache is not None:
             
-            not_ok_box = QMessageBox(self)
-            not_ok_box.setWindowTitle("ERROR")
-            not_ok_box.setText(f"There has been an error deleting '{name}', see: {e}")
-            not_ok_box.setStandardButtons(QMessageBox.Ok)
+            cached = self.disk_cache.load(path)
             
-            not_ok_box.exec()
-
-    
-    def rename_sound(self, name):
-        
-        self.window = QWidget()
-        self.window.resize(900,100)
-        self.window.setWindowTitle(f"Renaming: '{name.text()}'")
-        self.window.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
-        self.window.show()
+            if cached is not None:
+                return cached
+            
+        data, samplerate = sf.read(path, dtype='float32')
         
-        self.grid = QGridLayout()
-        self.window.setLayout(self.grid)
+        if data.ndim == 1:
+            data = np.expand_dims(data, axis=1)
+            
+        data.flags.writeable = False
         
-        if len(name.text()) > 30:
-            self.sound_name_label = QLabel(f"Original Name: '{name.text()[:30]}...' ")
+        if self.disk_cache is not None:
+            
+            try:
+                self.disk_cache.store(path, data, samplerate)
+                
+            except OSError as e:
+                print(f"Error, unable to write {path} to the sound cache, see: {e}")
         
-        else:
-            self.sound_name_label = QLabel(f"Original Name: '{name.text()}' ")
+        return data, samplerate
+    
+    
+    def _store(self, key, data, samplerate):
         
-        self.rename_box = QLineEdit()
-        self.rename_box.setPlaceholderText("Enter new sound name here...")
+        with self.lock:
+            
+            #An older decode of the same file is now stale, so free its memory straight away
+            for stale_key in [k for k in self.entries if k[0] == key[0] and k[1] != key[1]]:
+                self._remove(stale_key)
+            
+            if data.nbytes > self.max_bytes or key in self.entries:
+                return
+            
+            self.entries[key] = (data, samplerate)
+            self.current_bytes += data.nbytes
+            
+            self._evict()
+            
+    
+    def _remove(self, key):
         
-        self.save_button = QPushButton("Save")
-        self.save_button.clicked.connect(lambda _, original = name: self.save_rename(original))
-        self.save_button.setFixedSize(70, 30)
+        data, _ = self.entries.pop(key)
+        self.current_bytes -= data.nbytes
         
-        self.grid.addWidget(self.sound_name_label, 0, 0)
-        self.grid.addWidget(self.rename_box, 0, 1)
-        self.grid.addWidget(self.save_button, 1, 1, alignment = Qt.AlignmentFlag.AlignCenter)
         
-        with open("themes/style_sheet_edit_options.qss", "r") as f:
-            self.window.setStyleSheet(f.read())
+    def _evict(self):
         
+        while self.current_bytes > self.max_bytes and self.entries:
+            
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+            
+            
+    def set_budget(self, max_bytes):
         
-    def save_rename(self, original):
+        with self.lock:
             
-        original_path = f"{self.main_app.sound_buttons[original.text()]["path"]}"
+            self.max_bytes = max_bytes
+            self._evict()
+            
+            
+    def invalidate(self, path = None):
         
-        file_type = self.main_app.sound_buttons[original.text()]["file_type"]
-        new_path = f"{self.main_app.sounds_path}/{self.rename_box.text()}{file_type}"
+        """
+        Drop the cached decode of a single file, or of every file if no path is given.
+        """
         
-        try:
+        with self.lock:
             
-            if f"{original.text()}{file_type}" in os.listdir(self.main_app.unedited_sounds_path):
-                
-                os.rename(f"{self.main_app.unedited_sounds_path}/{original.text()}{file_type}", f"{self.main_app.unedited_sounds_path}/{self.rename_box.text()}{file_type}")
-                
-            if self.rename_box.text().strip() != '':
-                    
-                os.rename(original_path, new_path)
-                self.main_app.sound_buttons[f"{self.rename_box.text()}"] = self.main_app.sound_buttons.pop(f"{original.text()}")
-
-                if original.text() in self.main_app.button_icons.keys():
-
-                    renamed_val = self.main_app.button_icons.pop(original.text())
-                    self.main_app.button_icons[self.rename_box.text()] = renamed_val
-
-                    self.main_app.save_icons()
-                
-                QMessageBox.information(self, "Success!", f"Your sound '{original.text()}'  has been renamed to '{self.rename_box.text()}' ")
-                self.window.close()
-                    
-                self.main_app.edit_files()
+            if path is None:
                 
+                self.entries.clear()
+                self.current_bytes = 0
+                return
+            
+            path = os.path.abspath(path)
+            
+            for key in [k for k in self.entries if k[0] == path]:
+                self._remove(key)
                 
-            else:
-                QMessageBox.information(self, "Nothing Entered", "Nothing has been entered in the box. If this was a mistake, please try again.")
                 
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"We were unable to rename your file, see: {e}")
+    def stats(self):
+        
+        with self.lock:
             
+            return {"entries": len(self.entries),
+                    "bytes": self.current_bytes,
+                    "max_bytes": self.max_bytes,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    }
             
+
+class RenderCache(PCMCache):
     
-    def edit_sound_length(self, name, duration):
-        
-        self.window = QWidget()
-        self.window.setFixedSize(QSize(800,110))
-        self.window.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
-            
-        self.window.setWindowTitle(f"Editing Length of  sound '{name.text()}'")
-        self.window.show()
-        
-        self.grid = QGridLayout()
-        self.window.setLayout(self.grid)
+    """
+    Holds device-ready copies of sounds: resampled to the device's rate, matched to its channel
+    count and with a fixed gain applied. Playback then only has to index into memory.
+    
+    Entries are keyed by path, modification time, sample rate, channel count and gain, and share
+    the byte budget and LRU eviction of PCMCache. Decoding is delegated to the given PCMCache.
+    """
+    
+    def __init__(self, pcm_cache, render, max_bytes = 256 * 1024 * 1024):
         
-        self.trimmed_sounds = {}
-        self.previewed = False
+        super().__init__(max_bytes)
         
-        self.length = float(duration.text()[:len(duration.text())-1])
-        self.curr_len_label = QLabel(f"Length of '{name.text()[:25]}': {duration.text()}")
+        self.pcm_cache = pcm_cache
+        self.render = render
         
-        self.length_slider = QDoubleRangeSlider(Qt.Orientation.Horizontal)
-        self.length_slider.setFixedSize(200,20)
-        self.length_slider.valueChanged.connect(self.length_slider_val_changed)
         
+    def get(self, path, samplerate, channels, gain = 1.0):
         
+        key = (os.path.abspath(path), os.path.getmtime(path), samplerate, channels, round(gain, 4))
         
-        if self.length < 1:
+        with self.lock:
             
-            error_message = QMessageBox.warning(self, "Sound too short", "Sounds less than 1s are unable to be modified.", buttons = QMessageBox.Ok)
-            self.window.close()
-            return
-            
-            
-        else:
-            
-            self.length_slider.setSingleStep(0.1)
-            self.len_slider_label = QLabel("1s")
+            if key in self.entries:
+                
+                self.entries.move_to_end(key)
+                self.hits += 1
+                
+                return self.entries[key]
             
-            self.length_slider.setRange(1.0, self.length)
+            self.misses += 1
             
+        data, source_rate = self.pcm_cache.get(path)
         
-        self.preview_button = QPushButton()
-        self.preview_button.clicked.connect(lambda _, name = name.text(), slider = self.length_slider: self.preview_sound(name, slider))
+        rendered = self.render(data, source_rate, samplerate, channels, gain)
+        rendered.flags.writeable = False
         
-        self.preview_button.setIcon(QIcon(f"{self.main_app.icons_path}/Speaker_Icon.svg"))
-        self.preview_button.setIconSize(QSize(24, 24))
-        self.preview_button.setBaseSize(QSize(15, 10))
+        self._store(key, rendered, samplerate)
         
-        self.save_length_button = QPushButton("Save")
-        self.save_length_button.clicked.connect(lambda _, name = name.text(): self.save_length(name))
+        return rendered, samplerate
+    
+    
+class Voice:
+    
+    """
+    A single playing instance of a sound on a single device.
+    
+    The voice reads from device-ready data between 'start' and 'end' and keeps its own gain. Gain
+    changes requested from other threads are picked up by the audio thread at the start of the next
+    block and applied as a linear ramp, which avoids clicks when a voice is faded or re-gained.
+    """
+    
+    def __init__(self, data, samplerate, gain = 1.0, start = 0, end = None):
         
-        self.revert_sound_button = QPushButton("Revert Sound")
-        self.revert_sound_button.clicked.connect(lambda _, name = name.text(): self.revert_sound(name))
+        self.data = data
+        self.samplerate = samplerate
         
-        self.grid.addWidget(self.preview_button, 0, 0, Qt.AlignmentFlag.AlignLeft)
-        self.grid.addWidget(self.curr_len_label, 0, 0,Qt.AlignmentFlag.AlignHCenter)
-        self.grid.addWidget(self.length_slider, 0, 1, Qt.AlignmentFlag.AlignRight)
-        self.grid.addWidget(self.len_slider_label, 0, 1, Qt.AlignmentFlag.AlignLeft)
-        self.grid.addWidget(self.save_length_button, 1, 1, Qt.AlignmentFlag.AlignRight)
-        self.grid.addWidget(self.revert_sound_button, 1, 0, Qt.AlignmentFlag.AlignCenter)
+        self.start = start
+        self.end = len(data) if end is None else min(end, len(data))
+        self.position = start
         
-        with open("themes/style_sheet_edit_options.qss", "r") as f:
-            self.window.setStyleSheet(f.read())
+        self.gain = gain
+        self.target_gain = gain
+        self.ramp_step = 0.0
+        self.ramp_frames = 0
         
+        self.requested_ramp = None
+        self.requested_region = None
+        self.stopping = False
+        self.finished = False
         
+        #Called from the audio thread when the voice is first mixed into a block, used to time triggers
+        self.on_first_block = None
         
-    def length_slider_val_changed(self, value):
         
-        print(f"Value is: {value[0]} - {value[1]}")
-        self.len_slider_label.setText(f"Between {round(value[0], 2)}s and {round(value[1], 2)}s")
-
+    def set_region(self, start, end):
         
-    def preview_sound(self, name, slider):
+        """
+        Move the part of the data that is played. If the voice is outside the new region, it jumps to its start.
+        The start and end are rounded to the nearest frame, the same as a trim that is played from the start.
+        """
         
-        """ 
-        Each sound has been stored as a numpy array. This, using this knowledge we can splice the sound array to edit its length as follows:
+        self.requested_region = (max(int(round(start)), 0), min(int(round(end)), len(self.data)))
         
-            - Each row in the data array is ONE AUDIO FRAME.
-            - The number of frames per second is determined by the SAMPLERATE
-            - Thus, to trim our audio, we do 
-            
-                trimmed_length = samplerate * number_of_seconds
-                trimmed_data = data[:trimmed_data]
-                
-            - So, if we want the first 5 seconds, substitute 'number_of_seconds' with 5. 
-            
-            - Here, we have a double handled slider, so we can splice using a start and stop value
-            
-                trimmed_start = samplerate * handle_1
-                trimmed_end = samplerate * handle_2
-                
-                trimmed_sound = data[trimmed_start:trimmed_end]
+        
+    def fade_to(self, gain, seconds = 0.0, stop = False):
+        
+        """
+        Move the gain to 'gain' over the given number of seconds, stopping the voice afterwards if asked.
         """
         
-        self.preview_button.setDisabled(True)
-        self.length_slider.setDisabled(True)
+        #A voice that has been asked to stop keeps stopping, whatever else is requested afterwards
+        if not stop and (self.stopping or (self.requested_ramp is not None and self.requested_ramp[2])):
+            return
         
-        self.previewed = True
+        self.requested_ramp = (gain, max(int(seconds * self.samplerate), 0), stop)
         
-        self.trim_sound(name, slider)
-            
-        self.preview_button.setDisabled(False)
-        self.length_slider.setDisabled(False)
         
-    
-    def trim_sound(self, name, slider):
+    def set_gain(self, gain):
         
-        print(f"This is {name}")
+        self.fade_to(gain)
         
-        file_path = self.main_app.sound_buttons[name]["path"]
-        print(file_path)
         
-        device = self.main_app.settings["default_input"]
-        data, samplerate = sf.read(file_path)
+    def stop(self, fade = 0.0):
         
-        handle_1 = int(slider.value()[0])
-        handle_2 = int(slider.value()[1])
+        self.fade_to(0.0, fade, stop = True)
         
-        trimmed_start = samplerate * handle_1
-        trimmed_end = samplerate * handle_2
         
-        if self.previewed == True:
+    def _apply_requested_ramp(self):
         
-            try:
-                sd.play(data = data[trimmed_start: trimmed_end], samplerate = samplerate, device = device)
-                sd.wait()
-                
-            except Exception as e:
-                print(f"Whoops, something went wrong: {e}")
+        gain, frames, stop = self.requested_ramp
+        self.requested_ramp = None
+        
+        self.stopping = self.stopping or stop
+        self.target_gain = gain
+        
+        if frames == 0:
             
-        self.trimmed_sounds[name] = {"trimmed_data": data[trimmed_start:trimmed_end], "samplerate": samplerate}
-               
-    
-    def save_length(self, name):
+            self.gain = gain
+            self.ramp_frames = 0
+            
+        else:
+            
+            self.ramp_step = (gain - self.gain) / frames
+            self.ramp_frames = frames
         
-        ok_box = QMessageBox(self)
-        ok_box.setWindowTitle("Success!")
-        ok_box.setText(f"{name} has been successfully modified.")
-        ok_box.setStandardButtons(QMessageBox.Ok)
         
-        warning_msg = QMessageBox.question(self, "Confirm", 
-        f"This action will modify '{name}'. \n\n You may revert this at any time. Do you wish to proceed? ",
-        QMessageBox.Cancel | QMessageBox.Yes)
+    def render(self, out, scratch):
         
-        if self.previewed == False:
-            
-            self.trim_sound(name, self.length_slider)
-            print("Trimmed")
+        """
+        Add this voice's next block into 'out'. The scratch buffer must have the same shape as 'out'.
+        Returns the number of frames that were added.
+        """
         
-        try: 
-            if warning_msg == QMessageBox.Yes:
-                
-                print("Saving modified sound...")
-                
-                file_type = self.main_app.sound_buttons[name]["file_type"]
-                shutil.move(f"{self.main_app.sound_buttons[name]["path"]}", f"{self.main_app.unedited_sounds_path}/")
-                
-                sf.write(f"{self.main_app.sounds_path}/{name}{file_type}", self.trimmed_sounds[name]["trimmed_data"], self.trimmed_sounds[name]["samplerate"])
-                ok_box.exec()
-                
-                duration = self.main_app.get_duration(f"{self.main_app.sounds_path}/{name}{file_type}", name)
-                self.main_app.sound_buttons[name]["duration"] = duration
-                
-                self.window.close()
-                self.main_app.edit_files()
-                
-                
-                
-                
-        except Exception as e:
+        if self.requested_ramp is not None:
+            self._apply_requested_ramp()
             
-            not_ok_box = QMessageBox(self)
-            not_ok_box.setWindowTitle("Error")
-            not_ok_box.setText(f"There has been an error updating '{name}', see: {e}")
-            not_ok_box.setStandardButtons(QMessageBox.Ok)
+        if self.requested_region is not None:
             
-            not_ok_box.exec()
+            self.start, self.end = self.requested_region
+            self.requested_region = None
             
-            self.window.close()
+            if not self.start <= self.position < self.end:
+                self.position = self.start
             
+        if self.stopping and self.ramp_frames == 0 and self.gain == 0.0:
+            self.finished = True
             
-    def revert_sound(self, name):
+        if self.finished:
+            return 0
         
-        warning_msg = QMessageBox.question(self, "Confirm", 
-        f"This will revert the sound back to its original form. Are you certain?",
-        QMessageBox.Cancel | QMessageBox.Yes)
+        chunk = self._read(len(out))
+        frames = len(chunk)
         
-        ok_box = QMessageBox(self)
-        ok_box.setWindowTitle("Success!")
-        ok_box.setText(f"'{name}' has been successfully reverted back to the original file.")
-        ok_box.setStandardButtons(QMessageBox.Ok)
+        if frames == 0:
+            
+            self.finished = self._exhausted()
+            return 0
         
-        try:
+        if self.on_first_block is not None:
             
-            if warning_msg == QMessageBox.Yes:
-                
-                file_type = self.main_app.sound_buttons[name]["file_type"]
-                
-                os.remove(f"{self.main_app.sounds_path}/{name}{file_type}")
-                shutil.move(f"{self.main_app.unedited_sounds_path}/{name}{file_type}", f"{self.main_app.sounds_path}/")
-                
-                duration = self.main_app.get_duration(f"{self.main_app.sounds_path}/{name}{file_type}", name)
-                self.main_app.sound_buttons[name]["duration"] = duration
-                
-                self.main_app.edit_files()
-                
-                ok_box.exec()
-                
-        except Exception as e:
+            self.on_first_block()
+            self.on_first_block = None
             
-            not_ok_box = QMessageBox(self)
-            not_ok_box.setWindowTitle("ERROR")
-            not_ok_box.setText(f"There has been an error reverting '{name}', this sound likely hasn't been modified yet.")
-            not_ok_box.setStandardButtons(QMessageBox.Ok)
+        block = scratch[:frames]
+        
+        if self.ramp_frames > 0:
+            
+            steps = min(frames, self.ramp_frames)
+            
+            gains = np.full(frames, self.target_gain, dtype='float32')
+            gains[:steps] = self.gain + self.ramp_step * np.arange(1, steps + 1, dtype='float32')
+            
+            np.multiply(chunk, gains[:, np.newaxis], out=block)
+            
+            self.ramp_frames -= steps
+            self.gain = self.target_gain if self.ramp_frames == 0 else float(gains[steps - 1])
+            
+        else:
+            np.multiply(chunk, self.gain, out=block)
+            
+        out[:frames] += block
+        
+        if self._exhausted() or (self.stopping and self.ramp_frames == 0 and self.gain == 0.0):
+            self.finished = True
+            
+        return frames
+    
+    
+    def _read(self, frames):
+        
+        """
+        Return up to 'frames' frames of audio and advance past them. An empty array means that nothing is available yet.
+        """
+        
+        chunk = self.data[self.position:min(self.position + frames, self.end)]
+        self.position += len(chunk)
+        
+        return chunk
+    
+    
+    def _exhausted(self):
+        
+        return self.position >= self.end
             
-            not_ok_box.exec()  
 
+class StreamResampler:
+    
+    """
+    Linearly resamples audio that arrives in consecutive blocks, carrying the last frame and the
+    fractional read position across block boundaries so that the joins are seamless.
+    """
+    
+    def __init__(self, samplerate, target_rate):
+        
+        self.step = samplerate / target_rate
+        self.phase = 0.0
+        self.tail = None
+        
+        
+    def process(self, block):
+        
+        if self.step == 1.0 or len(block) == 0:
+            return block
+        
+        if self.tail is not None:
+            block = np.concatenate((self.tail, block))
+            
+        last = len(block) - 1
+        self.tail = block[-1:]
+        
+        if last < self.phase:
+            
+            self.phase -= last
+            return block[:0]
+        
+        count = int((last - self.phase) // self.step) + 1
+        positions = self.phase + self.step * np.arange(count)
+        source_positions = np.arange(len(block))
+        
+        self.phase = positions[-1] + self.step - last
+        
+        resampled = np.empty((count, block.shape[1]), dtype='float32')
+        
+        for channel in range(block.shape[1]):
+            resampled[:, channel] = np.interp(positions, source_positions, block[:, channel])
+            
+        return resampled
+    
+    
+class StreamingSource:
+    
+    """
+    Decodes a sound block by block on a reader thread into a bounded ring buffer.
+    
+    Playback can start as soon as the first block has been decoded, and the memory used stays the same
+    no matter how long the file is. The reader only ever writes into free space and the audio thread only
+    ever advances the read position, so the two threads never touch the same frames.
+    """
+    
+    BLOCK_FRAMES = 4096
+    
+    def __init__(self, path, channels, samplerate, convert, buffer_seconds = 2.0, start = 0, frames = -1):
+        
+        self.path = path
+        self.convert = convert
+        
+        #The part of the file to play, in the file's own frames
+        self.start = start
+        self.frames = frames
+        
+        self.capacity = max(int(buffer_seconds * samplerate), self.BLOCK_FRAMES * 4)
+        self.ring = np.zeros((self.capacity, channels), dtype='float32')
+        self.read_buffer = np.zeros((0, channels), dtype='float32')
+        
+        self.written = 0
+        self.read_count = 0
+        
+        self.eof = False
+        self.closed = False
+        self.space_available = threading.Event()
+        
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+        
+        
+    def _reader(self):
+        
+        try:
+            
+            with sf.SoundFile(self.path) as f:
+                
+                f.seek(self.start)
+                
+                for block in f.blocks(blocksize=self.BLOCK_FRAMES, frames=self.frames, dtype='float32', always_2d=True):
+                    
+                    block = self.convert(block)
+                    idx = 0
+                    
+                    while idx < len(block):
+                        
+                        if self.closed:
+                            return
+                        
+                        free = self.capacity - (self.written - self.read_count)
+                        
+                        if free == 0:
+                            
+                            #Clear before the wait, a read that lands in between then wakes the reader straight away
+                            self.space_available.clear()
+                            
+                            if self.written - self.read_count == self.capacity:
+                                self.space_available.wait(0.1)
+                                
+                            continue
+                        
+                        count = min(free, len(block) - idx)
+                        self._write(block[idx:idx+count])
+                        idx += count
+                        
+        except Exception as e:
+            print(f"Error, unable to stream {self.path}, see: {e}")
+            
         finally:
+            self.eof = True
             
-            self.window.close()
-            self.main_app.edit_files()
             
+    def _write(self, frames):
+        
+        start = self.written % self.capacity
+        first = min(len(frames), self.capacity - start)
+        
+        self.ring[start:start+first] = frames[:first]
+        self.ring[:len(frames)-first] = frames[first:]
+        
+        self.written += len(frames)
+        
+        
+    def read(self, frames):
+        
+        """
+        Copy up to 'frames' buffered frames out of the ring, fewer are returned if the reader has fallen behind.
+        """
+        
+        count = min(frames, self.written - self.read_count)
+        
+        if len(self.read_buffer) < frames:
+            self.read_buffer = np.zeros((frames, self.ring.shape[1]), dtype='float32')
+        
+        start = self.read_count % self.capacity
+        first = min(count, self.capacity - start)
+        
+        chunk = self.read_buffer[:count]
+        chunk[:first] = self.ring[start:start+first]
+        chunk[first:] = self.ring[:count-first]
+        
+        self.read_count += count
+        self.space_available.set()
+        
+        return chunk
+    
+    
+    def exhausted(self):
+        
+        return self.eof and self.written == self.read_count
+    
+    
+    def close(self):
+        
+        self.closed = True
+        self.space_available.set()
+        
+        
+class StreamingVoice(Voice):
+    
+    """
+    A voice that plays from a StreamingSource instead of a fully decoded buffer.
+    """
+    
+    def __init__(self, source, samplerate, gain = 1.0):
+        
+        super().__init__(source.ring, samplerate, gain)
+        self.source = source
+        
+        
+    def render(self, out, scratch):
+        
+        frames = super().render(out, scratch)
+        
+        if self.finished:
+            self.source.close()
             
-               
-                  
-class MainWindow(QMainWindow):
+        return frames
+        
+        
+    def _read(self, frames):
+        
+        chunk = self.source.read(frames)
+        self.position += len(chunk)
+        
+        return chunk
     
-    def __init__(self):
+    
+    def _exhausted(self):
         
-        super().__init__()
-
-        self.active_threads = []
-        self.stop_event = threading.Event()
+        return self.source.exhausted()
+    
+    
+class VoiceMixer:
+    
+    """
+    Sums every active voice of a device into a single block.
+    
+    Voices are handed over from other threads through a deque, only the audio thread touches the active
+    list. The cost of a block is one multiply-add per active voice, and the number of voices is capped;
+    the oldest voice is faded out quickly when a new one would exceed the cap.
+    """
+    
+    STEAL_FADE = 0.005
+    
+    def __init__(self, channels, max_voices = 32):
         
-        self.SETTINGS_FILE = "settings.json"
-        self.BUTTON_ICONS_FILE = "button_images.json"
+        self.channels = channels
+        self.max_voices = max_voices
+        
+        self.pending = deque()
+        self.active = []
+        self.scratch = np.zeros((0, channels), dtype='float32')
+        
+        
+    def add(self, voice):
+        
+        self.pending.append(voice)
+        
+        
+    def prime(self, frames):
+        
+        """
+        Allocate the scratch buffer for blocks of up to 'frames' frames ahead of time, so the audio thread does not have to.
+        """
+        
+        if len(self.scratch) < frames:
+            self.scratch = np.zeros((frames, self.channels), dtype='float32')
+        
+        
+    def stop_all(self, fade = 0.0):
+        
+        for voice in list(self.pending) + list(self.active):
+            voice.stop(fade)
+            
+            
+    def mix(self, out):
+        
+        """
+        Overwrite 'out' with the sum of the active voices.
+        """
+        
+        out.fill(0)
         
-        DEFAULT_SETTINGS = {
-            "volume": 1.0,
+        while self.pending:
+            self.active.append(self.pending.popleft())
+            
+        sounding = [voice for voice in self.active if not voice.stopping and voice.requested_ramp is None]
+        
+        for voice in sounding[:max(len(sounding) - self.max_voices, 0)]:
+            voice.stop(self.STEAL_FADE)
+        
+        if len(self.scratch) < len(out):
+            self.scratch = np.zeros((len(out), self.channels), dtype='float32')
+            
+        for voice in self.active:
+            voice.render(out, self.scratch)
+            
+        self.active = [voice for voice in self.active if not voice.finished]
+        
+        
+class SoftLimiter:
     
-        }
-
-        username = getpass.getuser()
-
-        if os.path.exists(self.SETTINGS_FILE):
+    """
+    Keeps a device's output below 'threshold' without clipping, applying the device's gain on the way.
+    
+    The output is delayed by 'lookahead' seconds. Each block, the loudest sample that will be heard before
+    the next block is looked at, and the gain is ramped down to the level it needs within the look-ahead,
+    so it is there before the peak is heard. Once it is quiet again the gain recovers over 'release' seconds.
+    Every buffer is allocated up front and each block is worked on in place, so it is safe in an audio callback.
+    """
+    
+    def __init__(self, channels, samplerate, gain = 1.0, threshold = 0.98, lookahead = 0.002, release = 0.1):
+        
+        self.channels = channels
+        self.gain = gain
+        self.threshold = threshold
+        
+        self.lookahead = int(round(lookahead * samplerate))
+        self.release = max(release * samplerate, 1.0)
+        
+        #The limiter's own gain reduction, 1.0 when nothing is being limited
+        self.reduction = 1.0
+        self.applied = gain
+        
+        self.history = np.zeros((self.lookahead, channels), dtype='float32')
+        self.buffer = np.zeros((0, channels), dtype='float32')
+        self.prime(4096)
+        
+        
+    def prime(self, frames):
+        
+        """
+        Allocate the buffers for blocks of up to 'frames' frames ahead of time, so the audio thread does not have to.
+        """
+        
+        if len(self.buffer) >= frames + self.lookahead:
+            return
+        
+        self.buffer = np.zeros((frames + self.lookahead, self.channels), dtype='float32')
+        self.magnitudes = np.zeros_like(self.buffer)
+        self.ramp = np.zeros((frames, 1), dtype='float32')
+        self.steps = np.arange(1, frames + 1, dtype='float32').reshape(-1, 1)
+        
+        
+    def process(self, block):
+        
+        frames = len(block)
+        
+        if frames == 0:
+            return block
+        
+        self.prime(frames)
+        
+        #The block goes in behind the look-ahead, and what comes out is the oldest audio
+        if self.lookahead:
             
-            with open(self.SETTINGS_FILE, "r") as f:
-                settings = json.load(f)
-
-            if "username" not in settings.keys():
-                settings["username"] = username
-
+            span = self.buffer[:frames + self.lookahead]
+            
+            span[:self.lookahead] = self.history
+            span[self.lookahead:] = block
+            block[:] = span[:frames]
+            self.history[:] = span[frames:]
+            
+        else:
+            span = block
+            
+        magnitudes = self.magnitudes[:len(span)]
+        np.abs(span, out=magnitudes)
+        peak = float(magnitudes.max()) * self.gain
+        
+        needed = min(1.0, self.threshold / peak) if peak > 0 else 1.0
+        
+        if needed < self.reduction:
+            
+            #Reach the needed gain before the audio that needs it is heard
+            ramp_frames = max(min(self.lookahead, frames), 1)
+            reduction = needed
+            
+        else:
+            
+            ramp_frames = frames
+            reduction = needed - (needed - self.reduction) * math.exp(-frames / self.release)
+            
+        target = reduction * self.gain
+        
+        if target == self.applied:
+            
+            if target != 1.0:
+                block *= np.float32(target)
                 
         else:
             
-            settings = DEFAULT_SETTINGS.copy()
-            default_output, default_input = sd.default.device
-
-            input_device_info = sd.query_devices(default_input)
-            output_device_info = sd.query_devices(default_output)
-
-            settings["default_input_info"] = input_device_info
-            settings["default_output_info"] = output_device_info
-            settings["default_output"] = default_output
-            settings["default_input"] = default_input
-            settings["username"] = username
-
-        if os.path.exists(self.BUTTON_ICONS_FILE):
-
-            with open(self.BUTTON_ICONS_FILE, "r") as f:
-                button_icons = json.load(f)
-
-        else:
-
-            button_icons = {}
+            ramp = self.ramp[:frames]
+            
+            np.multiply(self.steps[:frames], np.float32((target - self.applied) / ramp_frames), out=ramp)
+            ramp += np.float32(self.applied)
+            ramp[ramp_frames:] = target
+            
+            block *= ramp
+            
+        self.reduction = reduction
+        self.applied = target
+        
+        return block
+    
+    
+    def flush(self):
+        
+        """
+        The audio still held back by the look-ahead, for when nothing more will be played.
+        """
+        
+        return self.process(np.zeros((self.lookahead, self.channels), dtype='float32'))
+        
+
+class PlaybackHandle:
+    
+    """
+    Returned by MultiDevicePlayer.play_sound, this controls one trigger of a sound on every device it plays on.
+    """
+    
+    def __init__(self, path, voices, gain = 1.0, devices = None):
+        
+        self.path = path
+        self.voices = voices
+        
+        #The device each voice plays on, in the same order as the voices
+        self.devices = devices if devices is not None else [None] * len(voices)
+        
+        #The sound's own normalisation gain, which every volume given to this handle is multiplied by
+        self.gain = gain
+        
+        
+    def stop(self, fade = 0.0):
+        
+        for voice in self.voices:
+            voice.stop(fade)
+            
+            
+    def stop_device(self, device, fade = 0.0):
+        
+        for voice, voice_device in zip(self.voices, self.devices):
+            
+            if voice_device == device:
+                voice.stop(fade)
+            
+            
+    def fade_to(self, gain, seconds):
+        
+        for voice in self.voices:
+            voice.fade_to(gain * self.gain, seconds)
+            
+            
+    def set_gain(self, gain):
+        
+        for voice in self.voices:
+            voice.set_gain(gain * self.gain)
+            
+            
+    def set_region(self, start, end):
+        
+        """
+        Retarget every voice to play between 'start' and 'end', given in seconds.
+        """
+        
+        for voice in self.voices:
+            voice.set_region(start * voice.samplerate, end * voice.samplerate)
+            
+            
+    def is_playing(self):
+        
+        return any(not voice.finished for voice in self.voices)
+        
+
+class OutputBackend:
+    
+    """
+    Where the player sends its audio. Every backend lists devices the way sounddevice's query_devices() does,
+    and opens streams that behave like a sounddevice OutputStream: with a callback they pull blocks by
+    themselves once started, and without one they take blocks from write().
+    """
+    
+    name = None
+    
+    def query_devices(self, device = None, kind = None):
+        
+        raise NotImplementedError
+    
+    
+    def default_devices(self):
+        
+        """
+        The devices to use when no settings exist yet, in the order the main window stores them: (output, input).
+        """
+        
+        raise NotImplementedError
+    
+    
+    def hostapi_name(self, hostapi):
+        
+        raise NotImplementedError
+    
+    
+    def rescan(self):
+        
+        """
+        Look for devices that have been plugged in or removed since the devices were last listed. No stream may be open.
+        """
+        
+        raise NotImplementedError
+    
+    
+    def open_stream(self, device, samplerate, channels, blocksize = 0, latency = None, callback = None):
+        
+        raise NotImplementedError
+    
+    
+class PortAudioBackend(OutputBackend):
+    
+    """
+    Plays through the sound card with sounddevice.
+    """
+    
+    name = "portaudio"
+    
+    def query_devices(self, device = None, kind = None):
+        
+        return sd.query_devices(device, kind)
+    
+    
+    def default_devices(self):
+        
+        return tuple(sd.default.device)
+    
+    
+    def hostapi_name(self, hostapi):
+        
+        return sd.query_hostapis(hostapi)["name"]
+    
+    
+    def rescan(self):
+        
+        #PortAudio only lists the devices that were there when it started, so it is started again
+        sd._terminate()
+        sd._initialize()
+        
+        
+    def open_stream(self, device, samplerate, channels, blocksize = 0, latency = None, callback = None):
+        
+        return sd.OutputStream(device=device,
+                               samplerate=samplerate,
+                               channels=channels,
+                               dtype='float32',
+                               blocksize=blocksize,
+                               latency=latency,
+                               callback=callback)
+    
+    
+class NullBackend(OutputBackend):
+    
+    """
+    Throws the audio away, so that playback can be run and measured on a machine without audio hardware.
+    
+    The devices are those of the sound card when PortAudio is available, so streams keep the channel counts and
+    sample rates they would really have; any other device is a stereo 48kHz one. With 'realtime' set, blocks are
+    consumed at the rate a sound card would take them. Otherwise the engine runs as fast as it can while there
+    is sound, and only idles at real time once its output is silent. With 'mirror' unset, the sound card is never
+    looked at and sounddevice is not imported, so every device is a virtual one.
+    """
+    
+    name = "null"
+    
+    VIRTUAL_DEVICE = {"max_input_channels": 0, "max_output_channels": 2, "default_samplerate": 48000.0, "hostapi": -1}
+    
+    def __init__(self, realtime = True, mirror = True):
+        
+        self.realtime = realtime
+        self.mirror = mirror
+        self.rescan()
+        
+        
+    def rescan(self):
+        
+        if not self.mirror:
+            
+            self.devices = []
+            return
+        
+        try:
+            self.devices = [dict(device) for device in sd.query_devices()]
+            
+        except Exception:
+            self.devices = []
+            
+            
+    def query_devices(self, device = None, kind = None):
+        
+        if device is None:
+            return self.devices or [self._virtual_device(index) for index in range(2)]
+        
+        if 0 <= device < len(self.devices) and (kind != 'output' or self.devices[device]["max_output_channels"] > 0):
+            return self.devices[device]
+        
+        return self._virtual_device(device)
+    
+    
+    def default_devices(self):
+        
+        return (0, 1)
+    
+    
+    def hostapi_name(self, hostapi):
+        
+        if hostapi < 0 or not self.devices:
+            return "Virtual"
+        
+        try:
+            return sd.query_hostapis(hostapi)["name"]
+        
+        except Exception:
+            return "Virtual"
+        
+        
+    def open_stream(self, device, samplerate, channels, blocksize = 0, latency = None, callback = None):
+        
+        return SinkStream(self.open_writer(device, samplerate, channels), samplerate, channels, blocksize, callback, self.realtime)
+    
+    
+    def open_writer(self, device, samplerate, channels):
+        
+        """
+        Return an object with write() and close() that receives every block the device would play, or None to discard them.
+        """
+        
+        return None
+    
+    
+    def _virtual_device(self, index):
+        
+        return dict(self.VIRTUAL_DEVICE, name = f"Virtual Output {index}", index = index)
+    
+    
+class WavFileBackend(NullBackend):
+    
+    """
+    Writes what each device would have played to a 32-bit float WAV file in 'directory', so the exact output
+    of the engine can be captured and compared. Each stream that is opened gets its own file.
+    """
+    
+    name = "file"
+    
+    def __init__(self, directory, realtime = True):
+        
+        super().__init__(realtime)
+        
+        self.directory = directory
+        self.count = 0
+        self.lock = threading.Lock()
+        
+        
+    def open_writer(self, device, samplerate, channels):
+        
+        os.makedirs(self.directory, exist_ok=True)
+        
+        with self.lock:
+            
+            self.count += 1
+            path = os.path.join(self.directory, f"{time.strftime('%Y%m%d_%H%M%S')}_device{device}_{self.count:04d}.wav")
+            
+        return sf.SoundFile(path, 'w', samplerate, channels, subtype='FLOAT')
+    
+    
+class SinkStream:
+    
+    """
+    The stream of a backend without hardware, standing in for a sounddevice OutputStream.
+    
+    With a callback, a thread pulls blocks from it once the stream is started. Without one, blocks are passed to
+    write(). Each block is handed to the writer, if there is one, and is then paced as described in NullBackend.
+    """
+    
+    def __init__(self, writer, samplerate, channels, blocksize = 0, callback = None, realtime = True):
+        
+        self.writer = writer
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize or 512
+        self.latency = self.blocksize / samplerate
+        self.callback = callback
+        self.realtime = realtime
+        
+        #Every frame the stream has consumed, which gives the throughput of the engine
+        self.frames = 0
+        
+        self.thread = None
+        self.stopped = threading.Event()
+        self.clock = None
+        self.lock = threading.Lock()
+        
+        
+    def __enter__(self):
+        
+        self.start()
+        return self
+    
+    
+    def __exit__(self, *exc_info):
+        
+        self.close()
+        
+        
+    @property
+    def active(self):
+        
+        return not self.stopped.is_set()
+    
+    
+    def start(self):
+        
+        self.stopped.clear()
+        self.clock = time.perf_counter()
+        
+        if self.callback is not None and self.thread is None:
+            
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+            
+            
+    def write(self, data):
+        
+        """
+        Consume a block of a stream without a callback. Returns False, as a sink never underflows.
+        """
+        
+        if self.clock is None:
+            self.clock = time.perf_counter()
+            
+        self._consume(data)
+        self._pace(data)
+        
+        return False
+    
+    
+    def _run(self):
+        
+        out = np.zeros((self.blocksize, self.channels), dtype='float32')
+        
+        while not self.stopped.is_set():
+            
+            try:
+                self.callback(out, self.blocksize, None, None)
+                
+            except Exception as e:
+                
+                print(f"Error, the stream callback failed and the stream has stopped, see: {e}")
+                break
+            
+            self._consume(out)
+            self._pace(out)
+            
+            
+    def _consume(self, data):
+        
+        with self.lock:
+            
+            if self.writer is not None:
+                self.writer.write(data)
+                
+            self.frames += len(data)
+            
+            
+    def _pace(self, data):
+        
+        if self.realtime:
+            
+            #Blocks are due at the rate a sound card would take them, measured from the start of the stream
+            delay = self.clock + self.frames / self.samplerate - time.perf_counter()
+            
+        elif not data.any():
+            
+            #An idle engine waits a block, rather than spinning on silence
+            delay = len(data) / self.samplerate
+            self.clock = time.perf_counter() - self.frames / self.samplerate
+            
+        else:
+            return
+            
+        if delay > 0:
+            self.stopped.wait(delay)
+            
+            
+    def stop(self):
+        
+        self.stopped.set()
+        
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+            
+        self.thread = None
+        
+        
+    def close(self):
+        
+        self.stop()
+        
+        with self.lock:
+            
+            if self.writer is not None:
+                
+                self.writer.close()
+                self.writer = None
+                
+                
+def create_output_backend(settings):
+    
+    """
+    Create the backend named by 'output_backend' in the settings.
+    """
+    
+    realtime = settings["backend_realtime"]
+    
+    if settings["output_backend"] == "null":
+        return NullBackend(realtime)
+    
+    if settings["output_backend"] == "file":
+        return WavFileBackend(settings["backend_capture_path"], realtime)
+    
+    return PortAudioBackend()
+    
+    
+class DeviceRegistry:
+    
+    """
+    The output devices of a backend and what each of them can do, listed once and kept until refresh() is called,
+    so that opening a stream or building the settings page does not have to ask PortAudio again.
+    
+    Device indices change as devices are plugged in and removed, so each device also has a stable key made from
+    its name and host API, such as "Speakers (Realtek Audio)|Windows WASAPI". The settings store these keys, and
+    resolve() turns a key back into the device's current index.
+    """
+    
+    def __init__(self, backend):
+        
+        self.backend = backend
+        self.lock = threading.Lock()
+        
+        self.devices = {}
+        self.keys = {}
+        self.listed = False
+        
+        
+    def refresh(self, rescan = False):
+        
+        """
+        List the devices again, returning True if any were added or removed. With 'rescan', the backend first looks for
+        devices that were plugged in or removed, which for PortAudio means restarting it, so no stream may be open.
+        """
+        
+        if rescan:
+            self.backend.rescan()
+            
+        devices = {}
+        keys = {}
+        
+        for position, device in enumerate(self.backend.query_devices()):
+            
+            info = self._describe(device, device.get("index", position))
+            
+            #Two identical devices on the same host API are told apart by the order they are listed in
+            key = info["key"]
+            count = 1
+            
+            while info["key"] in keys:
+                
+                count += 1
+                info["key"] = f"{key}|{count}"
+                
+            devices[info["index"]] = info
+            keys[info["key"]] = info["index"]
+            
+        with self.lock:
+            
+            changed = keys != self.keys
+            
+            self.devices = devices
+            self.keys = keys
+            self.listed = True
+            
+        return changed
+    
+    
+    def _describe(self, device, index):
+        
+        try:
+            hostapi = self.backend.hostapi_name(device.get("hostapi", -1))
+            
+        except Exception:
+            hostapi = "Unknown"
+            
+        return {"index": index,
+                "name": device["name"],
+                "hostapi": hostapi,
+                "key": f"{device["name"]}|{hostapi}",
+                "channels": device["max_output_channels"],
+                "samplerate": int(device["default_samplerate"]),
+                "low_latency": device.get("default_low_output_latency"),
+                "high_latency": device.get("default_high_output_latency"),
+                }
+    
+    
+    def _list(self):
+        
+        if not self.listed:
+            self.refresh()
+            
+            
+    def info(self, device):
+        
+        """
+        The capabilities of a device by its index. Devices that were not listed are asked of the backend once.
+        """
+        
+        self._list()
+        
+        with self.lock:
+            info = self.devices.get(device)
+            
+        if info is None:
+            
+            info = self._describe(self.backend.query_devices(device, 'output'), device)
+            
+            with self.lock:
+                self.devices[device] = info
+                
+        return info
+    
+    
+    def key(self, device):
+        
+        try:
+            return self.info(device)["key"]
+        
+        except Exception:
+            return None
+        
+        
+    def resolve(self, key):
+        
+        """
+        The current index of the device with the given key, or None if it is not connected.
+        """
+        
+        self._list()
+        
+        with self.lock:
+            return self.keys.get(key)
+        
+        
+    def outputs(self):
+        
+        """
+        Every listed device that can play sound, in the order the backend lists them.
+        """
+        
+        self._list()
+        
+        with self.lock:
+            return [info for index, info in sorted(self.devices.items()) if info["key"] in self.keys and info["channels"] > 0]
+        
+        
+class DeviceStream:
+    
+    """
+    A long-lived callback stream for a single output device.
+    
+    The stream is opened once at the device's own sample rate and channel count. Voices are
+    queued onto its mixer from any thread and summed together inside the audio callback, so a
+    trigger never has to open a stream or query the device.
+    
+    A block size of 0 lets PortAudio pick the block size, and a latency of None uses its default.
+    The latency PortAudio actually grants is kept in 'latency', in seconds. The stream is opened
+    through the player's output backend, using the device's capabilities from the DeviceRegistry.
+    Each mixed block passes through the 'limiter', which applies the device's gain.
+    """
+    
+    def __init__(self, device, backend, info, max_voices = 32, blocksize = 0, latency = None, stats = None, limiter = None):
+        
+        self.device = device
+        self.config = (blocksize, latency)
+        self.stats = stats
+        
+        self.channels = info['channels']
+        self.samplerate = info['samplerate']
+        
+        self.mixer = VoiceMixer(self.channels, max_voices)
+        self.mixer.prime(blocksize or 4096)
+        
+        self.limiter = limiter if limiter is not None else SoftLimiter(self.channels, self.samplerate)
+        self.limiter.prime(blocksize or 4096)
+        
+        self.stream = backend.open_stream(device, self.samplerate, self.channels, blocksize, latency, self._callback)
+        self.stream.start()
+        
+        self.latency = self.stream.latency
+        self.blocksize = self.stream.blocksize
+        
+        self.last_callback = time.perf_counter()
+        
+        
+    def play(self, voice):
+        
+        """
+        Queue a voice holding device-ready data (matching this stream's rate and channels).
+        """
+        
+        self.mixer.add(voice)
+        
+        
+    def _callback(self, outdata, frames, time_info, status):
+        
+        start = time.perf_counter()
+        self.last_callback = start
+        
+        self.mixer.mix(outdata)
+        self.limiter.process(outdata)
+        
+        if self.stats is not None:
+            self.stats.record(time.perf_counter() - start, frames / self.samplerate, status)
+        
+        
+    def stalled(self, timeout = 2.0):
+        
+        """
+        Whether the stream has stopped asking for audio, which happens when its device is unplugged.
+        """
+        
+        return not self.stream.active or time.perf_counter() - self.last_callback > timeout
+    
+    
+    def close(self):
+        
+        try:
+            self.stream.stop()
+            self.stream.close()
+            
+        except Exception as e:
+            print(f"Error, unable to close the stream for device {self.device}, see: {e}")
+            
+
+class DeviceStats:
+    
+    """
+    Counters for one output device. record() is called from the audio thread once per block, so it only
+    adds to counters and bounded deques.
+    """
+    
+    def __init__(self, history = 2000):
+        
+        self.callbacks = 0
+        self.underflows = 0
+        self.overflows = 0
+        
+        #How long each callback took in milliseconds, and as a share of the time the block lasts
+        self.durations = deque(maxlen = history)
+        self.loads = deque(maxlen = history)
+        
+        
+    def record(self, duration, block_seconds, status = None):
+        
+        self.callbacks += 1
+        self.durations.append(duration * 1000)
+        self.loads.append(duration / block_seconds if block_seconds > 0 else 0.0)
+        
+        if status:
+            
+            self.underflows += bool(status.output_underflow)
+            self.overflows += bool(status.output_overflow)
+            
+            
+    def summary(self):
+        
+        return {"callbacks": self.callbacks,
+                "underflows": self.underflows,
+                "overflows": self.overflows,
+                "callback_ms": PlaybackStats.describe(list(self.durations)),
+                "callback_load": PlaybackStats.describe(list(self.loads)),
+                }
+    
+    
+class StartupTimings:
+    
+    """
+    When each phase of starting the application finished, in milliseconds since the file started to be imported.
+    """
+    
+    def __init__(self):
+        
+        self.phases = OrderedDict()
+        
+        
+    def mark(self, phase):
+        
+        self.phases.setdefault(phase, round((time.perf_counter() - STARTUP_STARTED) * 1000, 1))
+        
+        
+    def summary(self):
+        
+        return dict(self.phases)
+    
+    
+class PlaybackStats:
+    
+    """
+    Instrumentation for the playback path.
+    
+    Each trigger records how long after the click its sound was decoded, its stream was ready and its first
+    block was mixed, for each device. Each device records its underflows, overflows and how long its callbacks
+    take. Everything can be summarised for the stats panel or dumped to JSON.
+    """
+    
+    STAGES = ("decoded", "stream_open", "first_block")
+    
+    def __init__(self, history = 500):
+        
+        self.lock = threading.Lock()
+        self.triggers = deque(maxlen = history)
+        self.devices = {}
+        
+        
+    def start_trigger(self, path):
+        
+        trigger = {"sound": os.path.basename(path), "time": time.time(), "start": time.perf_counter(), "stages": {}}
+        
+        with self.lock:
+            self.triggers.append(trigger)
+            
+        return trigger
+    
+    
+    def mark(self, trigger, stage, device = None):
+        
+        """
+        Record the time since the trigger started, in milliseconds. Only the first mark of a stage on a device is kept.
+        """
+        
+        elapsed = (time.perf_counter() - trigger["start"]) * 1000
+        
+        #Marks are made from the audio threads while the stats panel reads them, see summary()
+        with self.lock:
+            trigger["stages"].setdefault(stage, {}).setdefault(str(device), elapsed)
+        
+        
+    def device(self, device):
+        
+        with self.lock:
+            
+            if device not in self.devices:
+                self.devices[device] = DeviceStats()
+                
+            return self.devices[device]
+        
+        
+    @staticmethod
+    def describe(values):
+        
+        if not values:
+            return {"count": 0}
+        
+        values = np.asarray(values, dtype = 'float64')
+        
+        return {"count": len(values),
+                "mean": round(float(values.mean()), 3),
+                "p50": round(float(np.percentile(values, 50)), 3),
+                "p95": round(float(np.percentile(values, 95)), 3),
+                "max": round(float(values.max()), 3),
+                }
+    
+    
+    def summary(self):
+        
+        #The marks of each stage are gathered under the lock, as the audio threads may be adding to them
+        with self.lock:
+            
+            count = len(self.triggers)
+            stages = {stage: [ms for trigger in self.triggers for ms in trigger["stages"].get(stage, {}).values()] for stage in self.STAGES}
+            devices = dict(self.devices)
+            
+        return {"triggers": count,
+                "stages_ms": {stage: self.describe(marks) for stage, marks in stages.items()},
+                "devices": {str(device): stats.summary() for device, stats in devices.items()},
+                }
+    
+    
+    def dump(self, path, startup = None):
+        
+        """
+        Write the summary and every recorded trigger to a JSON file, along with the startup timings if given.
+        """
+        
+        with self.lock:
+            
+            triggers = [{"sound": trigger["sound"], "time": trigger["time"],
+                         "stages": {stage: dict(marks) for stage, marks in trigger["stages"].items()}} for trigger in self.triggers]
+            
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"summary": self.summary(), "startup_ms": startup or {}, "recent_triggers": triggers}, f, indent = 4)
+            
+        os.replace(f"{path}.tmp", path)
+        
+        
+    def reset(self):
+        
+        with self.lock:
+            
+            self.triggers.clear()
+            self.devices = {}
+            
+
+class MultiDevicePlayer:
+    
+    #Stereo downmix matrices by channel count, in WAV channel order: the centre and surround channels are
+    #added to their side at -3dB, and the LFE channel is left out
+    CENTRE = SURROUND = 0.7071
+    
+    STEREO_DOWNMIX = {
+        3: [[1, 0], [0, 1], [CENTRE, CENTRE]],
+        4: [[1, 0], [0, 1], [SURROUND, 0], [0, SURROUND]],
+        5: [[1, 0], [0, 1], [CENTRE, CENTRE], [SURROUND, 0], [0, SURROUND]],
+        6: [[1, 0], [0, 1], [CENTRE, CENTRE], [0, 0], [SURROUND, 0], [0, SURROUND]],
+        8: [[1, 0], [0, 1], [CENTRE, CENTRE], [0, 0], [SURROUND, 0], [0, SURROUND], [SURROUND, 0], [0, SURROUND]],
+    }
+    
+    def __init__(self, main_app, backend = None):
+        
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.main_app = main_app
+        
+        self.backend = backend if backend is not None else create_output_backend(main_app.settings)
+        self.devices = DeviceRegistry(self.backend)
+        
+        disk_cache = PCMDiskCache(main_app.pcm_cache_path, int(main_app.settings["pcm_disk_cache_mb"] * 1024 * 1024)) if main_app.settings["pcm_disk_cache"] else None
+        
+        self.cache = PCMCache(int(main_app.settings["pcm_cache_mb"] * 1024 * 1024), disk_cache)
+        self.render_cache = RenderCache(self.cache, self.render_for_device, int(main_app.settings["render_cache_mb"] * 1024 * 1024))
+        
+        self.durations = {}
+        
+        self.prepare_thread = None
+        self.prepare_cancel = threading.Event()
+        
+        #Sounds bound to keys, held in memory outside of the caches' budgets, keyed by absolute path
+        self.armed = {}
+        self.arm_thread = None
+        self.arm_cancel = threading.Event()
+        
+        self.streams = {}
+        #Held while streams are opened or closed, and while PortAudio restarts during a rescan
+        self.streams_lock = threading.RLock()
+        
+        #Set for the whole of a rescan, so playback threads that reach the lock meanwhile give up instead of opening a stream
+        self.rescanning = False
+        
+        self.stats = PlaybackStats()
+        
+        self.handles = []
+        
+        
+    def open_streams(self, devices):
+        
+        """
+        Open a persistent stream for each given device and close any stream for a device
+        that is no longer configured. Calling this ahead of time removes the stream open
+        cost from the first trigger.
+        """
+        
+        if self.main_app.settings["engine_mode"] != "persistent":
+            
+            self.close_streams()
+            return
+        
+        for device in devices:
+            self._get_stream(device)
+            
+        with self.streams_lock:
+            unused = [device for device in self.streams if device not in devices]
+            
+            for device in unused:
+                self.streams.pop(device).close()
+                
+                
+    def prepare(self, paths, devices):
+        
+        """
+        Render the given sounds for each device in a background thread, such that the first press
+        of each sound skips decoding and conversion. Preparation stops early once the render cache
+        starts evicting, as anything further would push out sounds that were just prepared.
+        Any earlier preparation is cancelled rather than waited for; it stops before its next sound.
+        """
+        
+        self.prepare_cancel.set()
+            
+        #Device-ready buffers are only used by the persistent streams
+        if self.main_app.settings["engine_mode"] != "persistent":
+            return
+        
+        self.prepare_cancel = threading.Event()
+        
+        self.prepare_thread = threading.Thread(target=self._prepare_sounds, args=(list(paths), list(devices), self.prepare_cancel), daemon=True)
+        self.prepare_thread.start()
+        
+        
+    def _prepare_sounds(self, paths, devices, cancel):
+        
+        streams = [self._get_stream(device) for device in devices]
+        streams = [stream for stream in streams if stream is not None]
+        
+        evictions = self.render_cache.evictions
+        
+        for path in paths:
+            
+            try:
+                
+                if self._should_stream(path):
+                    continue
+                
+            except Exception as e:
+                
+                print(f"Error, unable to read {path}, see: {e}")
+                continue
+            
+            for stream in streams:
+                
+                if cancel.is_set() or self.render_cache.evictions != evictions:
+                    return
+                
+                try:
+                    self.render_cache.get(path, stream.samplerate, stream.channels)
+                    
+                except Exception as e:
+                    print(f"Error, unable to prepare {path} for device {stream.device}, see: {e}")
+                    
+                    
+    def arm(self, paths, devices):
+        
+        """
+        Keep the given sounds decoded and ready for each device's stream, outside of the caches' budgets, so that
+        playing them goes straight to the output. Sounds that are no longer given are released. The work is done on
+        a background thread, and each sound is played armed as soon as it is ready.
+        """
+        
+        #Any earlier arming is cancelled rather than waited for. It keeps filling the dictionary it was given,
+        #which is no longer the player's, so nothing it finishes afterwards is kept
+        self.arm_cancel.set()
+            
+        paths = {os.path.abspath(path) for path in paths}
+        self.armed = {path: entry for path, entry in self.armed.items() if path in paths}
+        
+        self.arm_cancel = threading.Event()
+        
+        self.arm_thread = threading.Thread(target=self._arm_sounds, args=(list(paths), list(devices), self.armed, self.arm_cancel), daemon=True)
+        self.arm_thread.start()
+        
+        
+    def _arm_sounds(self, paths, devices, armed, cancel):
+        
+        #A stream per sound mixes the decoded copy itself, so only that is kept
+        persistent = self.main_app.settings["engine_mode"] == "persistent"
+        streams = [stream for stream in (self._get_stream(device) for device in devices) if stream is not None] if persistent else []
+        
+        for path in paths:
+            
+            if cancel.is_set():
+                return
+            
+            try:
+                
+                mtime = os.path.getmtime(path)
+                entry = armed.get(path)
+                
+                if entry is None or entry["mtime"] != mtime:
+                    entry = {"mtime": mtime, "source": None, "device": {}}
+                    
+                if not persistent and entry["source"] is None:
+                    entry["source"] = self.cache.get(path)
+                    
+                for stream in streams:
+                    
+                    if (stream.samplerate, stream.channels) not in entry["device"]:
+                        entry["device"][(stream.samplerate, stream.channels)] = self.render_cache.get(path, stream.samplerate, stream.channels)[0]
+                        
+                armed[path] = entry
+                
+            except Exception as e:
+                print(f"Error, unable to arm {path}, see: {e}")
+                
+                
+    def _armed(self, path):
+        
+        """
+        The armed copies of a sound, or None if it is not armed or has changed since.
+        """
+        
+        entry = self.armed.get(os.path.abspath(path))
+        
+        if entry is None:
+            return None
+        
+        try:
+            return entry if entry["mtime"] == os.path.getmtime(path) else None
+        
+        except OSError:
+            return None
+        
+        
+    def set_backend(self, backend):
+        
+        """
+        Send playback to a different output backend. Open streams are closed, and are reopened on the new backend by open_streams().
+        """
+        
+        self.stop()
+        self.close_streams()
+        
+        self.backend = backend
+        self.devices = DeviceRegistry(backend)
+        
+        
+    def stalled_devices(self):
+        
+        with self.streams_lock:
+            return [device for device, stream in self.streams.items() if stream.stalled()]
+        
+        
+    def close_stalled(self):
+        
+        """
+        Close the streams that have stopped asking for audio, as happens when their device is unplugged, leaving the
+        other streams playing. Returns the devices whose streams were closed.
+        """
+        
+        with self.streams_lock:
+            
+            stalled = [device for device, stream in self.streams.items() if stream.stalled()]
+            
+            for device in stalled:
+                self.streams.pop(device).close()
+                
+        return stalled
+        
+        
+    def rescan_devices(self):
+        
+        """
+        Look for devices that were plugged in or removed. Playback stops and the streams are closed, as PortAudio has
+        to be restarted to see the changes; the caller opens them again with open_streams().
+        Returns True if any devices were added or removed.
+        """
+        
+        #PortAudio can only be restarted once every stream is closed, including those of the playback threads. They are
+        #waited for before the lock is taken, as a thread that is about to open its stream needs the lock to give up
+        self.rescanning = True
+        
+        try:
+            
+            self.stop(wait = True)
+            
+            with self.streams_lock:
+                
+                self.close_streams()
+                
+                return self.devices.refresh(rescan = True)
+            
+        finally:
+            
+            with self.streams_lock:
+                self.rescanning = False
+        
+        
+    def close_streams(self):
+        
+        with self.streams_lock:
+            
+            for stream in self.streams.values():
+                stream.close()
+                
+            self.streams = {}
+            
+            
+    def stream_config(self, device):
+        
+        """
+        The (blocksize, latency) to open the given device with. Outside of low latency mode, PortAudio's defaults are used.
+        """
+        
+        if not self.main_app.settings["low_latency"]:
+            return 0, None
+        
+        config = self.main_app.settings["device_latency"].get(self.devices.key(device), {})
+        
+        return config.get("blocksize", 256), config.get("latency", "low")
+    
+    
+    def device_gain(self, device):
+        
+        """
+        The gain set for the given device in the settings, as a multiplier.
+        """
+        
+        return 10 ** (self.main_app.settings["device_gain_db"].get(self.devices.key(device), 0.0) / 20)
+    
+    
+    def create_limiter(self, device, channels, samplerate):
+        
+        settings = self.main_app.settings
+        
+        return SoftLimiter(channels, samplerate, self.device_gain(device), 10 ** (settings["limiter_threshold_db"] / 20),
+                           settings["limiter_lookahead_ms"] / 1000, settings["limiter_release_ms"] / 1000)
+    
+    
+    def apply_device_gains(self):
+        
+        """
+        Move each open stream to its device's gain from the settings, without reopening it.
+        """
+        
+        with self.streams_lock:
+            
+            for device, stream in self.streams.items():
+                stream.limiter.gain = self.device_gain(device)
+                
+                
+    def latencies(self):
+        
+        """
+        The output latency in seconds and the block size that each open stream was granted, keyed by device.
+        """
+        
+        with self.streams_lock:
+            return {device: (stream.latency, stream.blocksize) for device, stream in self.streams.items()}
+        
+        
+    def _get_stream(self, device):
+        
+        if device is None:
+            return None
+        
+        config = self.stream_config(device)
+        
+        with self.streams_lock:
+            
+            #A stream opened with a different block size or latency is reopened with the new one
+            if device in self.streams and self.streams[device].config != config:
+                self.streams.pop(device).close()
+            
+            if device not in self.streams:
+                
+                try:
+                    
+                    info = self.devices.info(device)
+                    limiter = self.create_limiter(device, info['channels'], info['samplerate'])
+                    
+                    self.streams[device] = DeviceStream(device, self.backend, info, self.main_app.settings["max_voices"], *config, self.stats.device(device), limiter)
+                    
+                except Exception as e:
+                    
+                    print(f"Error, unable to open a stream on device {device}, see: {e}")
+                    return None
+                
+            return self.streams[device]
+
+
+    def play_sound(self, path, devices, volume = 1.0, region = None, gain = 1.0):
+        
+        """
+        Play the given sound file on the input and output device simultaneously.
+        If a region is given as (start, end) in seconds, only that part of the sound is played.
+        'gain' is the sound's normalisation gain, applied on top of the volume.
+        Returns a PlaybackHandle which can stop, fade or re-gain this trigger alone.
+        """
+        
+        volume = volume * gain
+        trigger = self.stats.start_trigger(path)
+        
+        armed = self._armed(path)
+        data = samplerate = None
+        
+        try:
+            
+            #Armed sounds are held whole in memory, so they are never streamed
+            streaming = self.main_app.settings["engine_mode"] == "persistent" and armed is None and self._should_stream(path)
+            
+            if armed is not None and armed["source"] is not None:
+                data, samplerate = armed["source"]
+                
+            #An armed sound already holds a copy for each stream, so its source is only fetched if a stream is missing
+            elif not streaming and armed is None:
+                data, samplerate = self.cache.get(path)
+                
+            if data is not None:
+                self.stats.mark(trigger, "decoded")
+            
+        except Exception as e:
+            
+            print(f"Error, Failed to read audio file, see: {e}")
+            return None
+
+        self.stop_event.clear()
+
+        self.threads = [t for t in self.threads if t.is_alive()]
+        self.handles = [h for h in self.handles if h.is_playing()]
+        
+        voices = []
+        played = []
+        
+        #The cached data is read-only and shared, each voice applies its own gain as it is mixed
+        for device in devices:
+            
+            stream = None
+            
+            if self.main_app.settings["engine_mode"] == "persistent":
+                
+                stream = self._get_stream(device)
+                self.stats.mark(trigger, "stream_open", device)
+                
+            if stream is not None and streaming:
+                
+                voice = StreamingVoice(self._open_streaming_source(path, stream, region), stream.samplerate, volume)
+                voice.on_first_block = lambda device = device: self.stats.mark(trigger, "first_block", device)
+                stream.play(voice)
+                
+                voices.append(voice)
+                played.append(device)
+                continue
+            
+            elif stream is not None:
+                
+                try:
+                    
+                    device_data = None if armed is None else armed["device"].get((stream.samplerate, stream.channels))
+                    
+                    if device_data is None:
+                        device_data, _ = self.render_cache.get(path, stream.samplerate, stream.channels)
+                        
+                    self.stats.mark(trigger, "decoded", device)
+                    
+                except Exception as e:
+                    
+                    print(f"Error, unable to prepare audio for device {device}, see: {e}")
+                    continue
+                
+                #Trims are slices of the shared data, nothing is copied
+                voice = Voice(device_data, stream.samplerate, volume, *self._region_frames(region, stream.samplerate))
+                voice.on_first_block = lambda device = device: self.stats.mark(trigger, "first_block", device)
+                stream.play(voice)
+                
+                voices.append(voice)
+                played.append(device)
+                continue
+            
+            try:
+                
+                if data is None:
+                    data, samplerate = self.cache.get(path)
+                    
+            except Exception as e:
+                
+                print(f"Error, Failed to read audio file, see: {e}")
+                continue
+            
+            voice = Voice(data, samplerate, volume, *self._region_frames(region, samplerate))
+            voice.on_first_block = lambda device = device: self.stats.mark(trigger, "first_block", device)
+            voices.append(voice)
+            played.append(device)
+            
+            thread = threading.Thread(target=self._play_on_device,
+                                 args=(voice, device, trigger))
+            thread.start()
+            self.threads.append(thread)
+            
+        handle = PlaybackHandle(path, voices, gain, played)
+        self.handles.append(handle)
+        
+        return handle
+
+
+    def load_for_device(self, path, device):
+        
+        """
+        Decode a sound and prepare it for the given device, returning (data, samplerate). This lets a
+        caller such as the trim editor keep one copy of a sound and play it many times with play_data().
+        """
+        
+        stream = None
+        
+        if self.main_app.settings["engine_mode"] == "persistent":
+            stream = self._get_stream(device)
+            
+        if stream is not None:
+            return self.render_cache.get(path, stream.samplerate, stream.channels)
+        
+        return self.cache.get(path)
+    
+    
+    def play_data(self, path, data, samplerate, device, volume = 1.0, start = 0, end = None, gain = 1.0):
+        
+        """
+        Play audio that has already been decoded on a single device, from frame 'start' to frame 'end'.
+        Returns a PlaybackHandle.
+        """
+        
+        self.stop_event.clear()
+        
+        voice = Voice(data, samplerate, volume * gain, start, end)
+        stream = None
+        
+        if self.main_app.settings["engine_mode"] == "persistent":
+            stream = self._get_stream(device)
+            
+        if stream is not None and stream.samplerate == samplerate and stream.channels == data.shape[1]:
+            stream.play(voice)
+            
+        else:
+            
+            thread = threading.Thread(target=self._play_on_device,
+                                      args=(voice, device))
+            thread.start()
+            self.threads.append(thread)
+            
+        handle = PlaybackHandle(path, [voice], gain, [device])
+        self.handles.append(handle)
+        
+        return handle
+    
+    
+    def _should_stream(self, path):
+        
+        """
+        Long sounds are streamed from disk rather than decoded whole. The length of each file is
+        looked up once per modification, as reading the header of a long MP3 is not free.
+        """
+        
+        key = (os.path.abspath(path), os.path.getmtime(path))
+        
+        if key not in self.durations:
+            self.durations[key] = sf.info(path).duration
+            
+        return self.durations[key] >= self.main_app.settings["streaming_min_seconds"]
+    
+    
+    def predecode(self, path):
+        
+        """
+        Decode a sound into the PCM cache ahead of its first play. Sounds long enough to be streamed are skipped.
+        """
+        
+        if not self._should_stream(path):
+            self.cache.get(path)
+            
+            
+    def _region_frames(self, region, samplerate):
+        
+        """
+        Convert a region in seconds to the (start, end) frames of audio at the given sample rate.
+        """
+        
+        if region is None:
+            return 0, None
+        
+        return int(round(region[0] * samplerate)), int(round(region[1] * samplerate))
+    
+    
+    def _open_streaming_source(self, path, stream, region = None):
+        
+        source_rate = sf.info(path).samplerate
+        resampler = StreamResampler(source_rate, stream.samplerate)
+        
+        def convert(block):
+            return resampler.process(self._match_channels(block, stream.channels))
+        
+        start, end = self._region_frames(region, source_rate)
+        frames = -1 if end is None else end - start
+        
+        return StreamingSource(path, stream.channels, stream.samplerate, convert, self.main_app.settings["streaming_buffer_seconds"], start, frames)
+    
+    
+    def _play_on_device(self, voice, device, trigger = None):
+        
+        try:
+            
+            #The device's capabilities are cached by the registry rather than queried for every sound
+            max_channels = self.devices.info(device)['channels']
+            blocksize, latency = self.stream_config(device)
+
+            with self.streams_lock:
+                
+                #A rescan has stopped every sound and is about to restart PortAudio
+                if self.rescanning:
+                    return
+                
+                stream = self.backend.open_stream(device, voice.samplerate, max_channels, latency=latency)
+
+            with stream:
+
+                if trigger is not None:
+                    self.stats.mark(trigger, "stream_open", device)
+                    
+                device_stats = self.stats.device(device)
+                
+                blocksize = blocksize or 1024
+                
+                chunk_buffer = np.empty((blocksize, voice.data.shape[1]), dtype='float32')
+                scratch = np.empty_like(chunk_buffer)
+                
+                limiter = self.create_limiter(device, voice.data.shape[1], voice.samplerate)
+                limiter.prime(blocksize)
+                
+                while not voice.finished:
+                    
+                    if self.stop_event.is_set():
+                        break
+                    
+                    chunk_buffer.fill(0)
+                    
+                    frames = voice.render(chunk_buffer, scratch)
+                    
+                    if frames <= 0:
+                        break
+                    
+                    out = limiter.process(chunk_buffer[:frames])
+                    
+                    #A blocking stream reports underflows from write() rather than through a callback status
+                    if stream.write(self._match_channels(out, max_channels)):
+                        device_stats.underflows += 1
+                        
+                #The end of the sound is still held back by the limiter's look-ahead
+                if not self.stop_event.is_set() and limiter.lookahead:
+                    stream.write(self._match_channels(limiter.flush(), max_channels))
+
+        except Exception as e:
+            
+            print(f"Error, unable to play sound on device {device}, \n\n see {e}.")
+            
+        finally:
+            voice.finished = True
+            
+
+
+    def _match_channels(self, data, max_channels):
+        
+        """
+        Downmix or upmix audio to match the device's max channels.
+        """
+        
+        num_channels = data.shape[1]
+
+        if num_channels == max_channels:
+            return data
+        
+        elif max_channels == 1:
+            return data.mean(axis=1, keepdims=True) 
+        
+        elif max_channels == 2:
+            
+            if num_channels == 1:
+                return np.repeat(data, 2, axis=1)
+            
+            #Surround sources are folded down with the standard matrix, so the centre and surround channels are kept
+            matrix = self.STEREO_DOWNMIX.get(num_channels)
+            
+            if matrix is None:
+                return np.ascontiguousarray(data[:, :2])
+            
+            return data @ np.array(matrix, dtype='float32')
+        
+        else:
+            
+            if num_channels > max_channels:
+                return data[:, :max_channels]
+            
+            else:
+                
+                pad_width = max_channels - num_channels
+                return np.hstack((data, np.zeros((len(data), pad_width), dtype=data.dtype)))
+
+
+    def set_volume(self, volume, fade = 0.02):
+        
+        """
+        Move every sound that is still playing to the new volume. The short fade stops the slider from zipper noise.
+        """
+        
+        self.handles = [h for h in self.handles if h.is_playing()]
+        
+        for handle in self.handles:
+            handle.fade_to(volume, fade)
+            
+            
+    def render_for_device(self, data, samplerate, target_rate, channels, gain = 1.0):
+        
+        """
+        Convert decoded audio into a contiguous float32 buffer that can be mixed straight into a device's stream.
+        """
+        
+        data = self._match_channels(data, channels)
+        data = self._resample(data, samplerate, target_rate)
+        
+        if gain != 1.0:
+            data = data * np.float32(gain)
+            
+        return np.array(data, dtype='float32', order='C', copy=None)
+        
+        
+    def _resample(self, data, samplerate, target_rate):
+        
+        """
+        Linearly resample audio to the rate of the stream it will be played on.
+        """
+        
+        if samplerate == target_rate or len(data) == 0:
+            return data
+        
+        length = int(round(len(data) * target_rate / samplerate))
+        positions = np.arange(length) * (samplerate / target_rate)
+        source_positions = np.arange(len(data))
+        
+        resampled = np.empty((length, data.shape[1]), dtype='float32')
+        
+        for channel in range(data.shape[1]):
+            resampled[:, channel] = np.interp(positions, source_positions, data[:, channel])
+            
+        return resampled
+
+
+    def stop_fade(self):
+        
+        return self.main_app.settings["stop_fade_ms"] / 1000
+    
+    
+    def stop_all(self, fade = None):
+        
+        """
+        Fade out every sound and return straight away. The fade, 'stop_fade_ms' by default, is applied by each voice
+        as it is mixed, and the threads of sounds with their own streams finish by themselves once it is done.
+        """
+        
+        fade = self.stop_fade() if fade is None else fade
+        
+        for handle in self.handles:
+            handle.stop(fade)
+            
+        with self.streams_lock:
+            
+            for stream in self.streams.values():
+                stream.mixer.stop_all(fade)
+                
+                
+    def stop_sound(self, path, fade = None):
+        
+        """
+        Fade out every trigger of the given sound file, on every device, and return straight away.
+        """
+        
+        fade = self.stop_fade() if fade is None else fade
+        path = os.path.abspath(path)
+        
+        for handle in self.handles:
+            
+            if os.path.abspath(handle.path) == path:
+                handle.stop(fade)
+                
+                
+    def stop_device(self, device, fade = None):
+        
+        """
+        Fade out every sound playing on the given device, leaving the other devices playing, and return straight away.
+        """
+        
+        fade = self.stop_fade() if fade is None else fade
+        
+        for handle in self.handles:
+            handle.stop_device(device, fade)
+            
+        with self.streams_lock:
+            stream = self.streams.get(device)
+            
+        if stream is not None:
+            stream.mixer.stop_all(fade)
+            
+            
+    def stop(self, wait = False):
+    
+        """
+        Stop every sound at once, without a fade, as is needed before streams are closed. The threads of sounds
+        with their own streams are only waited for if 'wait' is set, which is never done on the GUI thread.
+        """
+        
+        self.stop_event.set()
+        
+        for handle in self.handles:
+            handle.stop()
+        
+        with self.streams_lock:
+            
+            for stream in self.streams.values():
+                stream.mixer.stop_all()
+        
+        if wait:
+            
+            for t in self.threads:
+                t.join()
+            
+
+class LibraryIndex:
+    
+    """
+    A persistent record of each sound's size, modification time, duration, sample rate, channel count and file type.
+    
+    Scanning the sounds folder only needs a directory listing; a file is only probed with mutagen again when its
+    size or modification time no longer match the record, so the cost of a scan follows what has changed rather
+    than the size of the library.
+    """
+    
+    SOUND_FILE_TYPES = ('.wav', '.mp3')
+    
+    def __init__(self, index_file):
+        
+        self.index_file = index_file
+        self.lock = threading.Lock()
+        
+        #The file names added, modified and removed by the most recent scan
+        self.changes = {"added": [], "modified": [], "removed": []}
+        
+        try:
+            with open(self.index_file, "r") as f:
+                self.entries = json.load(f)
+                
+        except (OSError, ValueError):
+            self.entries = {}
+            
+            
+    def scan(self, directory):
+        
+        """
+        Bring the index up to date with the given folder and return its entries, keyed by file name.
+        """
+        
+        entries = {}
+        changes = {"added": [], "modified": [], "removed": []}
+        
+        with os.scandir(directory) as files:
+            
+            for file in files:
+                
+                if not file.name.endswith(self.SOUND_FILE_TYPES) or not file.is_file():
+                    continue
+                
+                stat = file.stat()
+                entry = self.entries.get(file.name)
+                
+                if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                    
+                    changes["added" if entry is None else "modified"].append(file.name)
+                    entry = self.probe(os.path.join(directory, file.name), stat)
+                    
+                entries[file.name] = entry
+                
+        with self.lock:
+            
+            changes["removed"] = [name for name in self.entries.keys() if name not in entries]
+            
+            self.entries = entries
+            self.changes = changes
+            
+        if any(changes.values()):
+            self.save()
+            
+        return entries
+    
+    
+    def probe(self, path, stat = None):
+        
+        if stat is None:
+            stat = os.stat(path)
+            
+        entry = {"path": path,
+                 "size": stat.st_size,
+                 "mtime": stat.st_mtime,
+                 "duration": None,
+                 "samplerate": None,
+                 "channels": None,
+                 "file_type": os.path.splitext(path)[1],
+                 "trim": None,
+                 "loudness": None,
+                 }
+        
+        try:
+            audio = mutagen.File(path)
+            
+            if audio is not None and audio.info is not None:
+                
+                entry["duration"] = round(audio.info.length, 2)
+                entry["samplerate"] = getattr(audio.info, "sample_rate", None)
+                entry["channels"] = getattr(audio.info, "channels", None)
+                
+        except Exception as e:
+            print(f"Failed to read {path}: {e}")
+            
+        return entry
+    
+    
+    def set_trim(self, file, trim):
+        
+        """
+        Store the trim of a sound as {"start", "end", "samplerate"}, in frames of the file, or None to remove it.
+        A trim only lasts as long as the file is unchanged, as a new probe starts without one.
+        """
+        
+        with self.lock:
+            self.entries[file]["trim"] = trim
+            
+        self.save()
+        
+        
+    def set_loudness(self, results):
+        
+        """
+        Store the results of loudness analysis, given as (file, loudness) pairs. Results for files that have
+        since been removed or changed are dropped.
+        """
+        
+        with self.lock:
+            
+            for file, loudness in results:
+                
+                entry = self.entries.get(file)
+                
+                if entry is not None and entry["mtime"] == loudness["mtime"]:
+                    entry["loudness"] = loudness
+                    
+        self.save()
+        
+        
+    def rename(self, original, new, path):
+        
+        """
+        Move an entry to its file's new name, keeping its details and trim.
+        """
+        
+        with self.lock:
+            
+            entry = self.entries.pop(original, None)
+            
+            if entry is not None:
+                
+                entry["path"] = path
+                self.entries[new] = entry
+                
+        self.save()
+        
+        
+    def add(self, files):
+        
+        """
+        Record entries that were already probed elsewhere, such as by the importer, so the next scan does not probe them again.
+        """
+        
+        with self.lock:
+            
+            for file, entry in files:
+                self.entries[file] = entry
+                
+        self.save()
+        
+        
+    def save(self):
+        
+        with self.lock:
+            entries = dict(self.entries)
+            
+        try:
+            
+            with open(f"{self.index_file}.tmp", "w") as f:
+                json.dump(entries, f, indent = 4)
+                
+            os.replace(f"{self.index_file}.tmp", self.index_file)
+            
+        except OSError as e:
+            print(f"Error, unable to save the library index, see: {e}")
+            
+
+class WaveformPeaks:
+    
+    """
+    A pyramid of min, max and RMS values of a sound, used to draw its waveform at any zoom level.
+    
+    The first level summarises every BUCKET_FRAMES frames, and each level above summarises LEVEL_FACTOR
+    buckets of the one below it. Drawing picks the coarsest level that still has a bucket per pixel, so
+    the cost of drawing follows the width of the view rather than the length of the sound.
+    """
+    
+    BUCKET_FRAMES = 256
+    LEVEL_FACTOR = 4
+    
+    def __init__(self, levels, samplerate, frames):
+        
+        #Each level is an array of shape (3, buckets) holding the min, max and RMS of each bucket
+        self.levels = levels
+        self.samplerate = samplerate
+        self.frames = frames
+        
+        
+    @classmethod
+    def from_file(cls, path):
+        
+        """
+        Read the sound block by block and build its pyramid, without holding the whole decode in memory.
+        """
+        
+        info = sf.info(path)
+        buckets = []
+        
+        for block in sf.blocks(path, blocksize = cls.BUCKET_FRAMES * 1024, dtype = 'float32', always_2d = True):
+            buckets.append(cls._summarise(block))
+            
+        first = np.concatenate(buckets, axis = 1) if buckets else np.zeros((3, 0), dtype = 'float32')
+        
+        return cls(cls._build_levels(first), info.samplerate, info.frames)
+    
+    
+    @classmethod
+    def _summarise(cls, block):
+        
+        frames = len(block)
+        padded = -(-frames // cls.BUCKET_FRAMES) * cls.BUCKET_FRAMES
+        
+        #The channels are summarised together, and the last bucket is padded with its final frame
+        low = block.min(axis = 1)
+        high = block.max(axis = 1)
+        square = np.square(block).mean(axis = 1)
+        
+        if padded != frames:
+            
+            low = np.pad(low, (0, padded - frames), mode = 'edge')
+            high = np.pad(high, (0, padded - frames), mode = 'edge')
+            square = np.pad(square, (0, padded - frames), mode = 'edge')
+            
+        shape = (-1, cls.BUCKET_FRAMES)
+        
+        return np.stack([low.reshape(shape).min(axis = 1),
+                         high.reshape(shape).max(axis = 1),
+                         np.sqrt(square.reshape(shape).mean(axis = 1))]).astype('float32')
+    
+    
+    @classmethod
+    def _build_levels(cls, first):
+        
+        levels = [first]
+        
+        while levels[-1].shape[1] > cls.LEVEL_FACTOR:
+            
+            below = levels[-1]
+            padded = -(-below.shape[1] // cls.LEVEL_FACTOR) * cls.LEVEL_FACTOR
+            
+            grouped = np.pad(below, ((0, 0), (0, padded - below.shape[1])), mode = 'edge').reshape(3, -1, cls.LEVEL_FACTOR)
+            
+            levels.append(np.stack([grouped[0].min(axis = 1),
+                                    grouped[1].max(axis = 1),
+                                    np.sqrt(np.square(grouped[2]).mean(axis = 1))]))
+            
+        return levels
+    
+    
+    def columns(self, start, end, width):
+        
+        """
+        Summarise the frames from 'start' to 'end' into at most 'width' columns, returning their min, max and RMS values.
+        Only the pyramid is read, never the samples.
+        """
+        
+        frames_per_column = max((end - start) / max(width, 1), 1)
+        
+        level = 0
+        
+        while level + 1 < len(self.levels) and self.BUCKET_FRAMES * self.LEVEL_FACTOR ** (level + 1) <= frames_per_column:
+            level += 1
+            
+        bucket_frames = self.BUCKET_FRAMES * self.LEVEL_FACTOR ** level
+        buckets = self.levels[level]
+        
+        first = min(int(start // bucket_frames), buckets.shape[1])
+        last = min(max(int(-(-end // bucket_frames)), first + 1), buckets.shape[1])
+        
+        visible = buckets[:, first:last]
+        
+        if visible.shape[1] <= width:
+            return visible[0], visible[1], visible[2]
+        
+        edges = np.linspace(0, visible.shape[1], width + 1).astype(int)[:-1]
+        counts = np.diff(np.append(edges, visible.shape[1]))
+        
+        return (np.minimum.reduceat(visible[0], edges),
+                np.maximum.reduceat(visible[1], edges),
+                np.sqrt(np.add.reduceat(np.square(visible[2]), edges) / counts))
+    
+    
+class PeakCache:
+    
+    """
+    Keeps the waveform pyramid of each sound on disk, keyed by its path, size and modification time, so each
+    sound is only ever analysed once.
+    """
+    
+    def __init__(self, directory):
+        
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        
+        
+    def get(self, path):
+        
+        """
+        Return the pyramid of the sound, building and storing it if needed. This can take a while for
+        long sounds, so it should be called away from the GUI thread.
+        """
+        
+        stat = os.stat(path)
+        key = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime}".encode()).hexdigest()
+        cache_file = os.path.join(self.directory, f"{key}.npz")
+        
+        try:
+            
+            with np.load(cache_file) as stored:
+                
+                levels = [stored[f"level_{i}"] for i in range(int(stored["level_count"]))]
+                return WaveformPeaks(levels, int(stored["samplerate"]), int(stored["frames"]))
+            
+        except (OSError, KeyError, ValueError):
+            pass
+        
+        peaks = WaveformPeaks.from_file(path)
+        
+        try:
+            
+            with open(f"{cache_file}.tmp", "wb") as f:
+                np.savez(f, level_count = len(peaks.levels), samplerate = peaks.samplerate, frames = peaks.frames,
+                         **{f"level_{i}": level for i, level in enumerate(peaks.levels)})
+                
+            os.replace(f"{cache_file}.tmp", cache_file)
+            
+        except OSError as e:
+            print(f"Error, unable to store the waveform of {path}, see: {e}")
+            
+        return peaks
+    
+    
+def analyse_loudness(path):
+    
+    """
+    Estimate the integrated loudness (in dB relative to full scale) and the sample peak of a sound.
+    
+    The sound is read in blocks and split into 400ms windows. The power of each window is the sum of the mean
+    squares of its channels; windows below -70dB, and then those 10dB below the average of what is left, are
+    ignored, so silence and quiet tails do not drag the estimate down. This follows the gating of ITU-R BS.1770
+    without its frequency weighting. It runs in a worker process, so it only uses numpy and soundfile.
+    """
+    
+    info = sf.info(path)
+    window = max(int(info.samplerate * 0.4), 1)
+    
+    powers = []
+    peak = 0.0
+    
+    for block in sf.blocks(path, blocksize = window * 64, dtype = 'float32', always_2d = True):
+        
+        if len(block) == 0:
+            continue
+        
+        peak = max(peak, float(np.abs(block).max()))
+        
+        power = np.square(block).sum(axis = 1)
+        whole = len(power) // window * window
+        
+        powers.append(power[:whole].reshape(-1, window).mean(axis = 1))
+        
+        if whole < len(power):
+            powers.append(power[whole:].mean(keepdims = True))
+            
+    powers = np.concatenate(powers) if powers else np.zeros(0, dtype = 'float32')
+    
+    gated = powers[powers > 10 ** (-70 / 10)]
+    
+    if len(gated) == 0:
+        return {"loudness_db": None, "peak": round(peak, 5), "mtime": os.path.getmtime(path)}
+    
+    gated = gated[gated > gated.mean() * 10 ** (-10 / 10)]
+    
+    return {"loudness_db": round(10 * math.log10(float(gated.mean())), 2), "peak": round(peak, 5), "mtime": os.path.getmtime(path)}
+
+
+class LoudnessAnalyser:
+    
+    """
+    Runs analyse_loudness() over many sounds at once on a pool of worker processes, one per core by default.
+    
+    The analysis is pure number crunching, so processes are used rather than threads to make use of every
+    core. Results are collected until take() is called, like the SoundImporter.
+    """
+    
+    def __init__(self, workers = 0):
+        
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.executor = None
+        
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.results = []
+        
+        
+    def analyse(self, paths):
+        
+        #The pool is only started the first time it is needed, and new processes are spawned rather than forked from the GUI
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers = self.workers, mp_context = multiprocessing.get_context("spawn"))
+            
+        for path in paths:
+            
+            with self.lock:
+                
+                if path in self.pending:
+                    continue
+                
+                self.pending.add(path)
+                
+            future = self.executor.submit(analyse_loudness, path)
+            future.add_done_callback(lambda future, path = path: self._done(path, future))
+            
+            
+    def _done(self, path, future):
+        
+        #Cancelled when the app closes, the sound is simply analysed next time
+        if future.cancelled():
+            
+            with self.lock:
+                self.pending.discard(path)
+                
+            return
+        
+        try:
+            result = future.result()
+            
+        except Exception as e:
+            
+            #Files that cannot be analysed are left at their own level rather than retried on every scan
+            print(f"Error, unable to analyse the loudness of {path}, see: {e}")
+            result = {"loudness_db": None, "peak": None, "mtime": os.path.getmtime(path) if os.path.exists(path) else None}
+            
+        with self.lock:
+            
+            self.pending.discard(path)
+            self.results.append((path, result))
+            
+            
+    def take(self):
+        
+        with self.lock:
+            
+            results, self.results = self.results, []
+            
+        return results
+    
+    
+    def busy(self):
+        
+        with self.lock:
+            return bool(self.pending or self.results)
+        
+        
+    def shutdown(self):
+        
+        if self.executor is not None:
+            self.executor.shutdown(wait = False, cancel_futures = True)
+            
+            
+class SoundImporter:
+    
+    """
+    Imports sound files on a pool of worker threads. Each file is probed and validated, copied into the sounds
+    folder and, if asked, decoded into the PCM cache ahead of its first play.
+    
+    Finished files are collected until take() is called, which lets the GUI publish them in batches.
+    """
+    
+    def __init__(self, library, sounds_path, workers = 4, predecode = None):
+        
+        self.library = library
+        self.sounds_path = sounds_path
+        self.predecode = predecode
+        
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+        
+        self.imported = []
+        self.failed = []
+        self.done = 0
+        self.total = 0
+        self.futures = []
+        
+        self.executor = ThreadPoolExecutor(max_workers = max(1, workers))
+        
+        
+    def start(self, paths):
+        
+        self.total = len(paths)
+        self.futures = [self.executor.submit(self._import, path) for path in paths]
+        
+        #The workers exit once the queued files are done
+        self.executor.shutdown(wait = False)
+        
+        
+    def _import(self, path):
+        
+        filename = os.path.basename(path)
+        
+        try:
+            
+            if self.cancel_event.is_set():
+                return
+            
+            entry = self.library.probe(path)
+            
+            if entry["duration"] is None:
+                raise ValueError("The file could not be read as a sound")
+            
+            destination = os.path.join(self.sounds_path, filename)
+            
+            #Copied under a temporary name first, so a scan never sees a half written sound
+            shutil.copy(path, f"{destination}.importing")
+            os.replace(f"{destination}.importing", destination)
+            
+            stat = os.stat(destination)
+            entry.update({"path": destination, "size": stat.st_size, "mtime": stat.st_mtime})
+            
+            if self.predecode is not None:
+                self.predecode(destination)
+                
+            with self.lock:
+                self.imported.append((filename, entry))
+                
+        except Exception as e:
+            
+            with self.lock:
+                self.failed.append((filename, e))
+                
+        finally:
+            
+            with self.lock:
+                self.done += 1
+                
+                
+    def take(self):
+        
+        """
+        Return the files imported and the files that failed since the last call.
+        """
+        
+        with self.lock:
+            
+            imported, failed = self.imported, self.failed
+            self.imported, self.failed = [], []
+            
+        return imported, failed
+    
+    
+    def cancel(self):
+        
+        self.cancel_event.set()
+        
+        for future in self.futures:
+            future.cancel()
+            
+            
+    def finished(self):
+        
+        return all(future.done() for future in self.futures)
+    
+    
+class Settings(QWidget):
+    
+    def __init__(self, main_app):
+        
+        super().__init__()
+        self.main_app = main_app
+
+        self.main_app.resize(QSize(500, 400))
+        
+        self.setWindowTitle("Settings")
+        self.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+        
+        layout = QVBoxLayout(self)
+        self.grid = QGridLayout()
+        
+        layout.addLayout(self.grid)
+        
+        input_audio_label = QLabel("Default Input Device (Headphones): ")
+        output_audio_label = QLabel("Default Output Device (Microphone): ")
+        
+        #Each entry holds the stable key of its device, which is what is saved
+        self.input_audio_option = QComboBox()
+        self.output_audio_option = QComboBox()
+        self.load_devices()
+        
+        self.refresh_devices_button = QPushButton("Refresh Devices")
+        self.refresh_devices_button.clicked.connect(lambda: self.main_app.check_devices(rescan = True))
+        self.main_app.devices_ready.connect(self.load_devices)
+        self.main_app.devices_ready.connect(self.load_gains)
+        
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.save)
+        save_button.setFixedSize(60,20)
+        
+        self.default_volume_label = QLabel("Default Volume Setting: ")
+        self.default_volume = QLineEdit()
+        self.default_volume.setFixedSize(QSize(400, 20))
+        self.default_volume.setPlaceholderText("Enter the volume here, E.g. 100")
+        self.default_volume.setValidator(QIntValidator(1, 100, self))
+        
+
+        self.username_label = QLabel("Username: ")
+        self.username = QLineEdit()
+        self.username.setFixedSize(QSize(400, 20))
+        self.username.setPlaceholderText(f"{self.main_app.settings["username"]}")
+        
+        self.streaming_label = QLabel("Stream Sounds Longer Than (s): ")
+        self.streaming_min_seconds = QLineEdit()
+        self.streaming_min_seconds.setFixedSize(QSize(400, 20))
+        self.streaming_min_seconds.setPlaceholderText(f"{self.main_app.settings["streaming_min_seconds"]}")
+        self.streaming_min_seconds.setValidator(QIntValidator(1, 86400, self))
+        
+        self.engine_modes = {"Persistent Streams (Lowest Latency)": "persistent", "New Stream Per Sound": "per_click"}
+        
+        self.engine_mode_label = QLabel("Playback Engine: ")
+        self.engine_mode_option = QComboBox()
+        self.engine_mode_option.addItems(list(self.engine_modes.keys()))
+        self.engine_mode_option.setCurrentIndex(list(self.engine_modes.values()).index(main_app.settings["engine_mode"]))
+        
+        self.cache_size_label = QLabel("Sound Cache Size (MB): ")
+        self.cache_size = QLineEdit()
+        self.cache_size.setFixedSize(QSize(400, 20))
+        self.cache_size.setPlaceholderText(f"{self.main_app.settings["pcm_cache_mb"]}")
+        self.cache_size.setValidator(QIntValidator(0, 65536, self))
+        
+        self.normalise_option = QCheckBox("Normalise Loudness")
+        self.normalise_option.setChecked(main_app.settings["normalise_loudness"])
+        
+        self.analyse_button = QPushButton("Re-analyse Library")
+        self.analyse_button.clicked.connect(lambda: self.main_app.analyse_library(force = True))
+        
+        self.normalise_target_label = QLabel("Normalisation Target (dB): ")
+        self.normalise_target = QLineEdit()
+        self.normalise_target.setFixedSize(QSize(400, 20))
+        self.normalise_target.setPlaceholderText(f"{self.main_app.settings["normalise_target_db"]}")
+        self.normalise_target.setValidator(QIntValidator(-60, 0, self))
+        
+        self.low_latency_option = QCheckBox("Low Latency Mode")
+        self.low_latency_option.setChecked(main_app.settings["low_latency"])
+        
+        self.backends = {"Sound Card (PortAudio)": "portaudio", "Null (No Output)": "null", "WAV Files (captures/)": "file"}
+        
+        self.backend_label = QLabel("Output Backend: ")
+        self.backend_option = QComboBox()
+        self.backend_option.addItems(list(self.backends.keys()))
+        self.backend_option.setCurrentIndex(list(self.backends.values()).index(main_app.settings["output_backend"]))
+        
+        self.grid.addWidget(input_audio_label, 0, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.input_audio_option, 0, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(output_audio_label, 1, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.output_audio_option, 1, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.default_volume_label, 2, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.default_volume, 2, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.username_label, 3, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.username, 3, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.cache_size_label, 4, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.cache_size, 4, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.engine_mode_label, 5, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.engine_mode_option, 5, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.streaming_label, 6, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.streaming_min_seconds, 6, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.normalise_option, 7, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.analyse_button, 7, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.normalise_target_label, 8, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.normalise_target, 8, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.low_latency_option, 9, 0, 1, 2, Qt.AlignmentFlag.AlignCenter)
+        
+        #One row of block size, latency and the latency that was granted for each of the two devices
+        self.latency_rows = {}
+        
+        for row, (label, key) in enumerate([("Input Device Buffer: ", "default_input"), ("Output Device Buffer: ", "default_output")], start = 10):
+            
+            self.latency_rows[key] = self.create_latency_row(main_app.settings["device_keys"].get(key, str(main_app.settings[key])))
+            
+            self.grid.addWidget(QLabel(label), row, 0, Qt.AlignmentFlag.AlignCenter)
+            self.grid.addLayout(self.latency_rows[key]["layout"], row, 1, Qt.AlignmentFlag.AlignCenter)
+            
+        self.grid.addWidget(self.backend_label, 12, 0, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.backend_option, 12, 1, Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.refresh_devices_button, 13, 0, 1, 2, Qt.AlignmentFlag.AlignCenter)
+        
+        #The microphone device is usually set quieter than the headphones, so each device has its own gain
+        self.gain_boxes = {}
+        
+        for row, (label, key) in enumerate([("Input Device Gain (dB): ", "default_input"), ("Output Device Gain (dB): ", "default_output")], start = 14):
+            
+            gain = QLineEdit()
+            gain.setFixedSize(QSize(400, 20))
+            gain.setValidator(QIntValidator(-60, 12, self))
+            
+            self.gain_boxes[key] = gain
+            
+            self.grid.addWidget(QLabel(label), row, 0, Qt.AlignmentFlag.AlignCenter)
+            self.grid.addWidget(gain, row, 1, Qt.AlignmentFlag.AlignCenter)
+            
+        self.load_gains()
+        
+        self.update_granted_latency()
+        
+        layout.addWidget(save_button, Qt.AlignmentFlag.AlignCenter)
+
+        with open("themes/style_sheet_settings.qss", "r") as f:
+            self.setStyleSheet(f.read())
+            
+            
+    def load_devices(self, changed = False):
+        
+        """
+        Fill the device lists from the main window's device registry, selecting the configured devices.
+        A configured device that is not connected is still listed, so saving does not lose it.
+        """
+        
+        outputs = self.main_app.player.devices.outputs()
+        
+        for option, setting in ((self.input_audio_option, "default_input"), (self.output_audio_option, "default_output")):
+            
+            option.clear()
+            
+            for info in outputs:
+                option.addItem(f"{info["name"]} ({info["hostapi"]})", info["key"])
+                
+            key = self.main_app.settings["device_keys"].get(setting)
+            
+            if key is not None and option.findData(key) < 0:
+                option.addItem(f"{key.split("|")[0]} (not connected)", key)
+                
+            option.setCurrentIndex(max(option.findData(key), 0))
+            
+            
+    def load_gains(self, changed = False):
+        
+        for key, gain in self.gain_boxes.items():
+            
+            device_key = self.main_app.settings["device_keys"].get(key)
+            gain.setPlaceholderText(f"{self.main_app.settings["device_gain_db"].get(device_key, 0.0):g}")
+            
+            
+    def create_latency_row(self, device_key):
+        
+        config = self.main_app.settings["device_latency"].get(device_key, {})
+        
+        blocksize = QComboBox()
+        blocksize.addItems(["Auto", "64", "128", "256", "512", "1024", "2048"])
+        blocksize.setCurrentText(str(config.get("blocksize", 256) or "Auto"))
+        
+        #The latency is either one of PortAudio's presets or a number of milliseconds
+        latency = QComboBox()
+        latency.setEditable(True)
+        latency.addItems(["low", "high"])
+        
+        requested = config.get("latency", "low")
+        latency.setCurrentText(requested if isinstance(requested, str) else f"{requested * 1000:g}")
+        
+        granted = QLabel()
+        
+        layout = QHBoxLayout()
+        layout.addWidget(blocksize)
+        layout.addWidget(latency)
+        layout.addWidget(granted)
+        
+        return {"layout": layout, "blocksize": blocksize, "latency": latency, "granted": granted}
+    
+    
+    def update_granted_latency(self):
+        
+        latencies = self.main_app.player.latencies()
+        
+        for key, row in self.latency_rows.items():
+            
+            device = self.main_app.settings[key]
+            
+            if device in latencies:
+                
+                latency, blocksize = latencies[device]
+                row["granted"].setText(f"Granted: {latency * 1000:.1f}ms, {blocksize or 'variable'} frames")
+                
+            else:
+                row["granted"].setText("Granted: stream not open")
+                
+                
+    def save(self):
+
+        try:
+
+            for option, setting in ((self.input_audio_option, "default_input"), (self.output_audio_option, "default_output")):
+                
+                self.main_app.settings["device_keys"][setting] = option.currentData()
+                self.main_app.settings[setting] = self.main_app.player.devices.resolve(option.currentData())
+                
+            self.main_app.settings["engine_mode"] = self.engine_modes[self.engine_mode_option.currentText()]
+            self.main_app.settings["normalise_loudness"] = self.normalise_option.isChecked()
+            self.main_app.settings["low_latency"] = self.low_latency_option.isChecked()
+            
+            #Low latency relies on streams that stay open and primed
+            if self.main_app.settings["low_latency"]:
+                
+                self.main_app.settings["engine_mode"] = "persistent"
+                self.engine_mode_option.setCurrentIndex(list(self.engine_modes.values()).index("persistent"))
+            
+            for key, row in self.latency_rows.items():
+                
+                latency = row["latency"].currentText().strip()
+                
+                self.main_app.settings["device_latency"][self.main_app.settings["device_keys"][key]] = {
+                    "blocksize": 0 if row["blocksize"].currentText() == "Auto" else int(row["blocksize"].currentText()),
+                    "latency": latency if latency in ("low", "high") else float(latency) / 1000,
+                }
+
+
+            for key, gain in self.gain_boxes.items():
+                
+                if gain.text().strip() != "" and self.main_app.settings["device_keys"].get(key) is not None:
+                    self.main_app.settings["device_gain_db"][self.main_app.settings["device_keys"][key]] = float(gain.text())
+                    
+            self.main_app.player.apply_device_gains()
+            self.load_gains()
+
+            if self.default_volume.text().strip() != "":
+
+                self.main_app.settings["volume"] = float(self.default_volume.text())/100
+                self.main_app.volume_slider.setValue(self.main_app.settings["volume"]*100)
+
+            if self.username.text().strip() != "":
+
+                self.main_app.settings["username"] = self.username.text()
+                
+            if self.streaming_min_seconds.text().strip() != "":
+                
+                self.main_app.settings["streaming_min_seconds"] = int(self.streaming_min_seconds.text())
+                
+            if self.normalise_target.text().strip() != "":
+                
+                self.main_app.settings["normalise_target_db"] = float(self.normalise_target.text())
+                
+            if self.cache_size.text().strip() != "":
+                
+                self.main_app.settings["pcm_cache_mb"] = int(self.cache_size.text())
+                self.main_app.player.cache.set_budget(self.main_app.settings["pcm_cache_mb"] * 1024 * 1024)
+            
+            backend = self.backends[self.backend_option.currentText()]
+            
+            if backend != self.main_app.settings["output_backend"]:
+                
+                self.main_app.settings["output_backend"] = backend
+                self.main_app.player.set_backend(create_output_backend(self.main_app.settings))
+            
+            self.main_app.save_settings()
+            self.main_app.player.open_streams(self.main_app.output_devices())
+            self.main_app.prepare_sounds()
+            self.main_app.arm_sounds()
+            
+            self.update_granted_latency()
+
+            QMessageBox.information(self, "Success!", "Your settings have been saved successfully.")
+            
+
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Unable to save settings, see: {e}")
+
+        
+        
+class ThumbnailJob(QRunnable):
+    
+    """
+    Loads one thumbnail on a pool thread: from the disk cache if it is there, otherwise by decoding
+    and downscaling the source image and then saving the result to the disk cache.
+    """
+    
+    def __init__(self, path, size, cache_file, signals):
+        
+        super().__init__()
+        
+        self.path = path
+        self.size = size
+        self.cache_file = cache_file
+        self.signals = signals
+        
+        
+    def run(self):
+        
+        image = QImage(self.cache_file) if os.path.exists(self.cache_file) else QImage()
+        
+        if image.isNull():
+            
+            image = QImage(self.path)
+            
+            if not image.isNull():
+                
+                image = image.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                image.save(self.cache_file, "PNG")
+                
+        self.signals.finished.emit(self.path, self.size, image)
+        
+        
+class ThumbnailSignals(QObject):
+    
+    finished = Signal(str, int, QImage)
+    
+
+class ThumbnailCache(QObject):
+    
+    """
+    Provides downscaled pictures for the sound buttons without decoding images on the GUI thread.
+    
+    Thumbnails are decoded and scaled on a thread pool, saved to disk keyed by the source path, its
+    modification time and the size, and kept in memory in a small LRU. Until a thumbnail is ready,
+    get() returns None and 'thumbnail_ready' is emitted once it can be fetched.
+    """
+    
+    thumbnail_ready = Signal(str, int)
+    
+    def __init__(self, directory, max_entries = 512):
+        
+        super().__init__()
+        
+        self.directory = directory
+        self.max_entries = max_entries
+        
+        self.pixmaps = OrderedDict()
+        self.loading = set()
+        
+        self.pool = QThreadPool()
+        self.signals = ThumbnailSignals()
+        self.signals.finished.connect(self._loaded)
+        
+        os.makedirs(directory, exist_ok=True)
+        
+        
+    def get(self, path, size):
+        
+        key = (path, size)
+        
+        if key in self.pixmaps:
+            
+            self.pixmaps.move_to_end(key)
+            return self.pixmaps[key]
+        
+        if key not in self.loading:
+            
+            try:
+                mtime = os.path.getmtime(path)
+                
+            except OSError:
+                return None
+            
+            cache_name = hashlib.sha1(f"{os.path.abspath(path)}|{mtime}|{size}".encode()).hexdigest()
+            
+            self.loading.add(key)
+            self.pool.start(ThumbnailJob(path, size, os.path.join(self.directory, f"{cache_name}.png"), self.signals))
+            
+        return None
+    
+    
+    def _loaded(self, path, size, image):
+        
+        key = (path, size)
+        self.loading.discard(key)
+        
+        if image.isNull():
+            return
+        
+        #QPixmaps can only be made on the GUI thread, which is where this slot runs
+        self.pixmaps[key] = QPixmap.fromImage(image)
+        
+        while len(self.pixmaps) > self.max_entries:
+            self.pixmaps.popitem(last=False)
+            
+        self.thumbnail_ready.emit(path, size)
+        
+        
+    def invalidate(self, path):
+        
+        for key in [key for key in self.pixmaps if key[0] == path]:
+            self.pixmaps.pop(key)
+            
+
+class SoundTableModel(QAbstractTableModel):
+    
+    """
+    Presents the main app's sounds as rows of a table. The view only asks for the rows it is showing,
+    and changes to a single sound only update that row.
+    """
+    
+    EMOJI_COLUMN, NAME_COLUMN, DURATION_COLUMN, KEY_COLUMN, OPTIONS_COLUMN = range(5)
+    HEADERS = ["Emoji", "Name", "Duration", "Key", "Options"]
+    
+    def __init__(self, main_app):
+        
+        super().__init__()
+        
+        self.main_app = main_app
+        self.names = list(main_app.sound_buttons.keys())
+        
+        main_app.thumbnails.thumbnail_ready.connect(self.thumbnail_ready)
+        
+        
+    def rowCount(self, parent = QModelIndex()):
+        
+        return 0 if parent.isValid() else len(self.names)
+    
+    
+    def columnCount(self, parent = QModelIndex()):
+        
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    
+    def headerData(self, section, orientation, role = Qt.ItemDataRole.DisplayRole):
+        
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        
+        return None
+    
+    
+    def data(self, index, role = Qt.ItemDataRole.DisplayRole):
+        
+        if not index.isValid():
+            return None
+        
+        name = self.names[index.row()]
+        sound = self.main_app.sound_buttons.get(name)
+        
+        if sound is None:
+            return None
+        
+        if role == Qt.ItemDataRole.DisplayRole:
+            
+            if index.column() == self.NAME_COLUMN:
+                return name
+            
+            if index.column() == self.DURATION_COLUMN:
+                return f"{sound["duration"]}s"
+            
+            if index.column() == self.KEY_COLUMN:
+                return ", ".join(f"{bank}: {sequence}" for bank, sequence in self.main_app.key_bindings_of(name))
+            
+        elif role == Qt.ItemDataRole.DecorationRole and index.column() == self.EMOJI_COLUMN:
+            
+            #Pictures are only requested for rows that are painted, the row is refreshed once its thumbnail is ready
+            pixmap = self.main_app.thumbnails.get(sound["emoji"], 70)
+            
+            return pixmap if pixmap is not None else self.main_app.placeholder_pixmap
+        
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        
+        return None
+    
+    
+    def thumbnail_ready(self, path, size):
+        
+        for name in self.names:
+            
+            if self.main_app.sound_buttons.get(name, {}).get("emoji") == path:
+                self.refresh_row(name)
+                
+                
+    def row_of(self, name):
+        
+        return self.names.index(name) if name in self.names else -1
+    
+    
+    def refresh_row(self, name):
+        
+        row = self.row_of(name)
+        
+        if row == -1:
+            return
+        
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        
+        
+    def rename_row(self, original, new_name):
+        
+        row = self.row_of(original)
+        
+        if row == -1:
+            return
+        
+        self.names[row] = new_name
+        
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        
+        
+    def remove_row(self, name):
+        
+        row = self.row_of(name)
+        
+        if row == -1:
+            return
+        
+        self.beginRemoveRows(QModelIndex(), row, row)
+        
+        self.names.pop(row)
+        
+        self.endRemoveRows()
+        
+        
+    def sync(self, modified = ()):
+        
+        """
+        Bring the rows in line with the main app's sounds, inserting and removing only the rows that differ.
+        """
+        
+        current = self.main_app.sound_buttons.keys()
+        
+        for name in [name for name in self.names if name not in current]:
+            self.remove_row(name)
+            
+        added = [name for name in current if name not in self.names]
+        
+        if added:
+            
+            self.beginInsertRows(QModelIndex(), len(self.names), len(self.names) + len(added) - 1)
+            self.names.extend(added)
+            self.endInsertRows()
+            
+        for name in modified:
+            self.refresh_row(name)
+            
+            
+class ButtonRowDelegate(QStyledItemDelegate):
+    
+    """
+    Paints a row of icon buttons inside a table cell and reports which one was clicked, so that the
+    table does not need real button widgets for every sound. If the cell has a picture, it is drawn
+    after the buttons.
+    """
+    
+    clicked = Signal(str, int)
+    
+    BUTTON_HEIGHT = 30
+    SPACING = 10
+    
+    def __init__(self, buttons, parent = None):
+        
+        super().__init__(parent)
+        
+        #Each button is (action name, icon, status tip, width)
+        self.buttons = buttons
+        
+        
+    def _button_rects(self, rect):
+        
+        rects = []
+        x = rect.left() + self.SPACING
+        y = rect.top() + (rect.height() - self.BUTTON_HEIGHT) // 2
+        
+        for _, _, _, width in self.buttons:
+            
+            rects.append(QRect(x, y, width, self.BUTTON_HEIGHT))
+            x += width + self.SPACING
+            
+        return rects
+    
+    
+    def paint(self, painter, option, index):
+        
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+        
+        rects = self._button_rects(option.rect)
+        
+        for (_, icon, _, _), rect in zip(self.buttons, rects):
+            
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.icon = icon
+            button.iconSize = QSize(16, 16)
+            button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+            
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+            
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        
+        if pixmap is not None and not pixmap.isNull():
+            
+            x = (rects[-1].right() if rects else option.rect.left()) + self.SPACING
+            y = option.rect.top() + (option.rect.height() - pixmap.height()) // 2
+            
+            painter.drawPixmap(x, y, pixmap)
+            
+            
+    def sizeHint(self, option, index):
+        
+        width = sum(button[3] + self.SPACING for button in self.buttons) + self.SPACING
+        
+        if index.data(Qt.ItemDataRole.DecorationRole) is not None:
+            width += 70 + self.SPACING
+            
+        return QSize(width, 80)
+    
+    
+    def _button_at(self, option, position):
+        
+        for (action, _, tip, _), rect in zip(self.buttons, self._button_rects(option.rect)):
+            
+            if rect.contains(position):
+                return action, tip
+            
+        return None, None
+        
+        
+    def editorEvent(self, event, model, option, index):
+        
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            
+            action, _ = self._button_at(option, event.position().toPoint())
+            
+            if action is not None:
+                
+                self.clicked.emit(action, index.row())
+                return True
+            
+        return False
+    
+    
+    def helpEvent(self, event, view, option, index):
+        
+        _, tip = self._button_at(option, event.pos())
+        
+        if tip is None:
+            return super().helpEvent(event, view, option, index)
+        
+        QToolTip.showText(event.globalPos(), tip, view)
+        return True
+    
+            
+class WaveformView(QWidget):
+    
+    """
+    Draws the waveform of a sound from its WaveformPeaks, shading the part that is selected. Scrolling the
+    mouse wheel zooms in and out around the cursor; scrolling sideways moves the view.
+    """
+    
+    def __init__(self, parent = None):
+        
+        super().__init__(parent)
+        
+        self.peaks = None
+        self.view_start = 0.0
+        self.view_end = 0.0
+        self.selection = (0.0, 0.0)
+        
+        self.setMinimumHeight(80)
+        
+        
+    def set_peaks(self, peaks):
+        
+        self.peaks = peaks
+        self.view_start = 0.0
+        self.view_end = peaks.frames / peaks.samplerate
+        self.update()
+        
+        
+    def set_selection(self, start, end):
+        
+        self.selection = (start, end)
+        self.update()
+        
+        
+    def wheelEvent(self, event):
+        
+        if self.peaks is None:
+            return
+        
+        length = self.peaks.frames / self.peaks.samplerate
+        span = self.view_end - self.view_start
+        
+        if event.angleDelta().x() != 0:
+            
+            shift = -span * event.angleDelta().x() / 1200
+            shift = min(max(shift, -self.view_start), length - self.view_end)
+            
+            self.view_start += shift
+            self.view_end += shift
+            
+        else:
+            
+            #The point under the cursor stays where it is while zooming
+            anchor = self.view_start + span * event.position().x() / max(self.width(), 1)
+            factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+            
+            span = min(max(span * factor, 256 / self.peaks.samplerate), length)
+            
+            self.view_start = max(anchor - (anchor - self.view_start) * span / (self.view_end - self.view_start), 0.0)
+            self.view_end = min(self.view_start + span, length)
+            self.view_start = self.view_end - span
+            
+        self.update()
+        
+        
+    def paintEvent(self, event):
+        
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(30, 30, 30))
+        
+        if self.peaks is None:
+            
+            painter.setPen(QColor(150, 150, 150))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Loading waveform...")
+            return
+        
+        width = self.width()
+        middle = self.height() / 2
+        span = max(self.view_end - self.view_start, 1e-9)
+        
+        #The part of the sound that will be kept is highlighted
+        left = (self.selection[0] - self.view_start) / span * width
+        right = (self.selection[1] - self.view_start) / span * width
+        painter.fillRect(int(left), 0, int(right - left), self.height(), QColor(60, 60, 90))
+        
+        low, high, rms = self.peaks.columns(self.view_start * self.peaks.samplerate, self.view_end * self.peaks.samplerate, width)
+        
+        if len(low) == 0:
+            return
+        
+        #When zoomed in past one bucket per pixel, each bucket is drawn as a column wider than a pixel
+        step = width / len(low)
+        column = max(step, 1.0)
+        
+        peak_colour = QColor(90, 160, 220)
+        rms_colour = QColor(170, 210, 250)
+        
+        for i in range(len(low)):
+            
+            painter.fillRect(QRectF(i * step, middle - high[i] * middle, column, max((high[i] - low[i]) * middle, 1.0)), peak_colour)
+            painter.fillRect(QRectF(i * step, middle - rms[i] * middle, column, max(2 * rms[i] * middle, 1.0)), rms_colour)
+        
+        
+class StatsPanel(QWidget):
+    
+    """
+    A window showing the player's PlaybackStats, refreshed twice a second, with the option to save them as JSON.
+    """
+    
+    def __init__(self, main_app):
+        
+        super().__init__()
+        
+        self.main_app = main_app
+        self.device_names = {}
+        
+        self.setWindowTitle("Playback Stats")
+        self.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+        self.resize(QSize(640, 360))
+        
+        layout = QVBoxLayout(self)
+        
+        self.stats_label = QLabel()
+        self.stats_label.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        
+        save_button = QPushButton("Save as JSON")
+        save_button.clicked.connect(self.save_json)
+        
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        
+        buttons = QHBoxLayout()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(save_button)
+        
+        layout.addWidget(self.stats_label)
+        layout.addLayout(buttons)
+        
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        
+        self.refresh()
+        
+        
+    def device_name(self, device):
+        
+        if device not in self.device_names:
+            
+            try:
+                self.device_names[device] = self.main_app.player.devices.info(int(device))["name"]
+                
+            except Exception:
+                self.device_names[device] = f"Device {device}"
+                
+        return self.device_names[device]
+    
+    
+    def refresh(self):
+        
+        summary = self.main_app.player.stats.summary()
+        
+        lines = [f"Triggers recorded: {summary["triggers"]}", "",
+                 f"{"Click to (ms)":<16}{"count":>7}{"mean":>9}{"p50":>9}{"p95":>9}{"max":>9}"]
+        
+        for stage, stats in summary["stages_ms"].items():
+            
+            if stats["count"]:
+                lines.append(f"{stage:<16}{stats["count"]:>7}{stats["mean"]:>9.2f}{stats["p50"]:>9.2f}{stats["p95"]:>9.2f}{stats["max"]:>9.2f}")
+                
+            else:
+                lines.append(f"{stage:<16}{0:>7}")
+                
+        for device, stats in summary["devices"].items():
+            
+            lines += ["", f"{self.device_name(device)}",
+                      f"    callbacks: {stats["callbacks"]}, underflows: {stats["underflows"]}, overflows: {stats["overflows"]}"]
+            
+            if stats["callback_ms"]["count"]:
+                
+                lines.append(f"    callback ms: mean {stats["callback_ms"]["mean"]:.3f}, p95 {stats["callback_ms"]["p95"]:.3f}, max {stats["callback_ms"]["max"]:.3f}")
+                lines.append(f"    share of block used: p95 {stats["callback_load"]["p95"]:.1%}, max {stats["callback_load"]["max"]:.1%}")
+                
+        lines += ["", "Startup (ms since launch)"]
+        lines += [f"    {phase:<16}{ms:>9.1f}" for phase, ms in self.main_app.startup.summary().items()]
+                
+        self.stats_label.setText("\n".join(lines))
+        
+        
+    def save_json(self):
+        
+        path, _ = QFileDialog.getSaveFileName(self, "Save Playback Stats", "playback_stats.json", "JSON Files (*.json)")
+        
+        if path:
+            
+            try:
+                self.main_app.player.stats.dump(path, self.main_app.startup.summary())
+                
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Unable to save the playback stats, see: {e}")
+                
+                
+    def reset(self):
+        
+        self.main_app.player.stats.reset()
+        self.refresh()
+        
+        
+class EditFiles(QWidget):
+    
+    preview_loaded = Signal(str, object)
+    waveform_loaded = Signal(str, object)
+    
+    def __init__(self, main_app):
+        
+        super().__init__()
+        
+        self.main_app = main_app
+        self.setWindowTitle("Edit File(s)")
+        self.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+        
+        self.layout = QVBoxLayout(self)
+        
+        self.preview_data = None
+        self.preview_name = None
+        self.preview_handle = None
+        self.preview_loaded.connect(self.preview_ready)
+        self.waveform_loaded.connect(self.waveform_ready)
+        
+        self.model = SoundTableModel(main_app)
+        
+        self.table = QTableView()
+        self.table.setObjectName("ContentWidget")
+        self.table.setModel(self.model)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.table.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.table.setMouseTracking(True)
+        self.table.verticalHeader().setVisible(False)
+        
+        #Fixed row heights allow the view to work out which rows are visible without measuring each one
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(80)
+        
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(SoundTableModel.NAME_COLUMN, QHeaderView.ResizeMode.Stretch)
+        
+        font = header.font()
+        font.setPointSize(15)
+        header.setFont(font)
+        
+        self.emoji_delegate = ButtonRowDelegate([("change_emoji", QIcon(f"{self.main_app.icons_path}/Edit_Emoji.png"), "Change Emoji/Picture", 40),
+                                                 ("remove_emoji", QIcon(f"{self.main_app.icons_path}/Remove_Icon.png"), "Remove the set icon", 40),
+                                                 ], self.table)
+        
+        self.options_delegate = ButtonRowDelegate([("remove", QIcon(f"{self.main_app.icons_path}/cross.png"), "Remove Sound", 70),
+                                                   ("rename", QIcon(f"{self.main_app.icons_path}/application-rename.png"), "Rename Sound", 70),
+                                                   ("modify_length", QIcon(f"{self.main_app.icons_path}/radio--pencil"), "Modify Sound Length/Segment", 70),
+                                                   ("bind_key", QIcon(f"{self.main_app.icons_path}/Speaker_Icon.svg"), "Bind a Key", 70),
+                                                   ], self.table)
+        
+        self.emoji_delegate.clicked.connect(self.option_clicked)
+        self.options_delegate.clicked.connect(self.option_clicked)
+        
+        self.table.setItemDelegateForColumn(SoundTableModel.EMOJI_COLUMN, self.emoji_delegate)
+        self.table.setItemDelegateForColumn(SoundTableModel.OPTIONS_COLUMN, self.options_delegate)
+        
+        self.table.setColumnWidth(SoundTableModel.EMOJI_COLUMN, 200)
+        self.table.setColumnWidth(SoundTableModel.DURATION_COLUMN, 150)
+        self.table.setColumnWidth(SoundTableModel.KEY_COLUMN, 150)
+        self.table.setColumnWidth(SoundTableModel.OPTIONS_COLUMN, 330)
+        
+        self.layout.addWidget(self.table)
+
+        self.resize(QSize(1400, 1000))
+
+        with open("themes/style_sheet_edit_files.qss", "r") as f:
+            self.setStyleSheet(f.read())
+    
+    
+    def load_sound_options(self, modified = ()):
+        
+        """
+        Update the table after the sounds have changed; only rows that were added, removed or modified are touched.
+        """
+        
+        self.model.sync(modified)
+        
+        
+    def option_clicked(self, action, row):
+        
+        name = self.model.names[row]
+        
+        actions = {"change_emoji": self.change_emoji,
+                   "remove_emoji": self.remove_emoji,
+                   "remove": self.delete_sound,
+                   "rename": self.rename_sound,
+                   "modify_length": self.edit_sound_length,
+                   "bind_key": self.bind_key,
+                   }
+        
+        actions[action](name)
+    
+    
+    def change_emoji(self, name):
+        
+        file_path, _ = QFileDialog.getOpenFileName(self, f"Select Image for {name}", "", "Image Files (*.png *.jpg *.jpeg)")
+        
+        if file_path:
+                
+            try:
+                
+                self.main_app.sound_buttons[name]["emoji"] = file_path
+                self.main_app.button_icons[name] = file_path
+                
+                #The picture may have been edited since it was last shown
+                self.main_app.thumbnails.invalidate(file_path)
+                self.main_app.save_icons()
+                
+                self.main_app.update_sound_button_icon(name)
+                self.model.refresh_row(name)
+                    
+                    
+            except Exception as e:
+                error_msg = traceback.format_exc()
+                QMessageBox.warning(self, "Error", f"Failed to change icon to {file_path}:\n{e}, \n\n and see: {error_msg}")
+                
+                
+    def remove_emoji(self, name):
+        
+        if self.main_app.sound_buttons[name]["emoji"] == f"{self.main_app.icons_path}/Icon_Placeholder.png":
+            
+            QMessageBox.information(self, "No Image Set", f"No image has been set for '{name}'. \n\n The icon cannot be removed.")
+            return
+        
+        warning_msg = QMessageBox.warning(self, "Warning", f"This will remove the icon set for '{name}', are you sure you'd like to continue?", 
+                                          QMessageBox.Yes | QMessageBox.Cancel)
+        
+        try:
+        
+            if warning_msg == QMessageBox.Yes:
+                
+                self.main_app.sound_buttons[name]["emoji"] = f"{self.main_app.icons_path}/Icon_Placeholder.png"
+                self.main_app.button_icons[name] = f"{self.main_app.icons_path}/Icon_Placeholder.png"
+                self.main_app.update_sound_button_icon(name)
+                
+                self.main_app.save_icons()
+                self.model.refresh_row(name)
+                
+                ok_box = QMessageBox.information(self, "Success!", f"The icon for '{name}' has been removed.")
+                
+        except Exception as e:
+            
+            error_msg = traceback.format_exc()
+            QMessageBox.warning(self, "ERROR", f"There was a problem removing the icon for '{name}', \n\n see: {e}, \n\n and see: {error_msg}")
+        
+        
+    
+    
+    def delete_sound(self, name):
+
+        warning_msg = QMessageBox.question(self, "Confirm", f"Are you sure that you want to delete '{name}'?", 
+                                           QMessageBox.Cancel | QMessageBox.Yes)
+        
+        ok_box = QMessageBox(self)
+        ok_box.setWindowTitle("Success!")
+        ok_box.setText(f"'{name}' has been successfully deleted.")
+        ok_box.setStandardButtons(QMessageBox.Ok)
+        
+        try:
+
+            if warning_msg == QMessageBox.Yes:
+
+                print(f"Removing {self.main_app.sound_buttons[name]["path"]}...")
+                os.remove(self.main_app.sound_buttons[name]["path"])
+                self.main_app.sound_buttons.pop(name)
+                
+                if name in self.main_app.button_icons.keys():
+                    self.main_app.button_icons.pop(name)
+
+                ok_box.exec()
+
+                self.model.remove_row(name)
+                self.main_app.save_icons()
+                
+        
+        except Exception as e:
+            
+            not_ok_box = QMessageBox(self)
+            not_ok_box.setWindowTitle("ERROR")
+            not_ok_box.setText(f"There has been an error deleting '{name}', see: {e}")
+            not_ok_box.setStandardButtons(QMessageBox.Ok)
+            
+            not_ok_box.exec()
+
+    
+    def bind_key(self, name):
+        
+        self.window = QWidget()
+        self.window.resize(600, 100)
+        self.window.setWindowTitle(f"Key for: '{name}'")
+        self.window.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+        self.window.show()
+        
+        self.grid = QGridLayout()
+        self.window.setLayout(self.grid)
+        
+        bank = self.main_app.settings["active_bank"]
+        
+        #Banks are switched with the number keys of the numpad, so those keys cannot be bound
+        self.bank_option = QComboBox()
+        self.bank_option.addItems([str(number) for number in range(1, 10)])
+        self.bank_option.setCurrentIndex(bank - 1)
+        
+        self.key_box = QKeySequenceEdit()
+        self.key_box.setMaximumSequenceLength(1)
+        
+        current = dict(self.main_app.key_bindings_of(name)).get(bank)
+        
+        if current is not None:
+            self.key_box.setKeySequence(QKeySequence(current))
+            
+        self.bank_option.currentTextChanged.connect(
+            lambda text: self.key_box.setKeySequence(QKeySequence(dict(self.main_app.key_bindings_of(name)).get(int(text), ""))))
+        
+        self.save_button = QPushButton("Save")
+        self.save_button.clicked.connect(lambda _, name = name: self.save_key(name, self.key_box.keySequence().toString()))
+        self.save_button.setFixedSize(70, 30)
+        
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(lambda _, name = name: self.save_key(name, ""))
+        clear_button.setFixedSize(70, 30)
+        
+        self.grid.addWidget(QLabel("Bank: "), 0, 0)
+        self.grid.addWidget(self.bank_option, 0, 1)
+        self.grid.addWidget(QLabel("Key: "), 1, 0)
+        self.grid.addWidget(self.key_box, 1, 1)
+        self.grid.addWidget(clear_button, 2, 0, alignment = Qt.AlignmentFlag.AlignCenter)
+        self.grid.addWidget(self.save_button, 2, 1, alignment = Qt.AlignmentFlag.AlignCenter)
+        
+        with open("themes/style_sheet_edit_options.qss", "r") as f:
+            self.window.setStyleSheet(f.read())
+            
+            
+    def save_key(self, name, sequence):
+        
+        try:
+            
+            self.main_app.set_key_binding(name, int(self.bank_option.currentText()), sequence)
+            self.model.refresh_row(name)
+            self.window.close()
+            
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Unable to bind the key, see: {e}")
+            
+            
+    def rename_sound(self, name):
+        
+        self.window = QWidget()
+        self.window.resize(900,100)
+        self.window.setWindowTitle(f"Renaming: '{name}'")
+        self.window.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+        self.window.show()
+        
+        self.grid = QGridLayout()
+        self.window.setLayout(self.grid)
+        
+        if len(name) > 30:
+            self.sound_name_label = QLabel(f"Original Name: '{name[:30]}...' ")
+        
+        else:
+            self.sound_name_label = QLabel(f"Original Name: '{name}' ")
+        
+        self.rename_box = QLineEdit()
+        self.rename_box.setPlaceholderText("Enter new sound name here...")
+        
+        self.save_button = QPushButton("Save")
+        self.save_button.clicked.connect(lambda _, original = name: self.save_rename(original))
+        self.save_button.setFixedSize(70, 30)
+        
+        self.grid.addWidget(self.sound_name_label, 0, 0)
+        self.grid.addWidget(self.rename_box, 0, 1)
+        self.grid.addWidget(self.save_button, 1, 1, alignment = Qt.AlignmentFlag.AlignCenter)
+        
+        with open("themes/style_sheet_edit_options.qss", "r") as f:
+            self.window.setStyleSheet(f.read())
+        
+        
+    def save_rename(self, original):
+            
+        original_path = f"{self.main_app.sound_buttons[original]["path"]}"
+        
+        file_type = self.main_app.sound_buttons[original]["file_type"]
+        new_path = f"{self.main_app.sounds_path}/{self.rename_box.text()}{file_type}"
+        
+        try:
+            
+            if f"{original}{file_type}" in os.listdir(self.main_app.unedited_sounds_path):
+                
+                os.rename(f"{self.main_app.unedited_sounds_path}/{original}{file_type}", f"{self.main_app.unedited_sounds_path}/{self.rename_box.text()}{file_type}")
+                
+            if self.rename_box.text().strip() != '':
+                    
+                os.rename(original_path, new_path)
+                self.main_app.library.rename(os.path.basename(original_path), os.path.basename(new_path), new_path)
+                self.main_app.sound_buttons[f"{self.rename_box.text()}"] = self.main_app.sound_buttons.pop(f"{original}")
+                self.main_app.sound_buttons[f"{self.rename_box.text()}"]["path"] = new_path
+                self.main_app.rename_home_button(original, self.rename_box.text())
+                self.main_app.rename_key_bindings(original, self.rename_box.text())
+
+                if original in self.main_app.button_icons.keys():
+
+                    renamed_val = self.main_app.button_icons.pop(original)
+                    self.main_app.button_icons[self.rename_box.text()] = renamed_val
+
+                    self.main_app.save_icons()
+                
+                QMessageBox.information(self, "Success!", f"Your sound '{original}'  has been renamed to '{self.rename_box.text()}' ")
+                self.window.close()
+                    
+                self.model.rename_row(original, self.rename_box.text())
+                
+                
+            else:
+                QMessageBox.information(self, "Nothing Entered", "Nothing has been entered in the box. If this was a mistake, please try again.")
+                
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"We were unable to rename your file, see: {e}")
+            
+            
+    
+    def edit_sound_length(self, name):
+        
+        duration = self.main_app.sound_buttons[name]["duration"]
+        trim = self.main_app.sound_buttons[name].get("trim")
+        
+        self.window = QWidget()
+        self.window.setFixedSize(QSize(800,230))
+        self.window.setWindowIcon(QIcon(f"{self.main_app.icons_path}/cassette.png"))
+            
+        self.window.setWindowTitle(f"Editing Length of  sound '{name}'")
+        self.window.show()
+        
+        self.grid = QGridLayout()
+        self.window.setLayout(self.grid)
+        
+        self.stop_preview()
+        self.preview_data = None
+        self.preview_name = name
+        
+        #The slider always covers the whole file, trims only change which part of it is played
+        self.length = float(self.main_app.sound_buttons[name].get("full_duration") or duration)
+        self.curr_len_label = QLabel(f"Length of '{name[:25]}': {duration}s")
+        
+        self.waveform = WaveformView()
+        
+        self.length_slider = superqt.QDoubleRangeSlider(Qt.Orientation.Horizontal)
+        self.length_slider.setFixedSize(200,20)
+        self.length_slider.valueChanged.connect(self.length_slider_val_changed)
+        
+        
+        
+        if self.length < 1:
+            
+            error_message = QMessageBox.warning(self, "Sound too short", "Sounds less than 1s are unable to be modified.", buttons = QMessageBox.Ok)
+            self.window.close()
+            return
+            
+            
+        else:
+            
+            self.length_slider.setSingleStep(0.1)
+            self.len_slider_label = QLabel("1s")
+            
+            self.length_slider.setRange(1.0, self.length)
+            
+            if trim is not None:
+                self.length_slider.setValue((trim["start"] / trim["samplerate"], trim["end"] / trim["samplerate"]))
+            
+        
+        self.preview_button = QPushButton()
+        self.preview_button.clicked.connect(lambda _, name = name, slider = self.length_slider: self.preview_sound(name, slider))
+        
+        #The sound is decoded once for this window, in the background, and previewing is enabled once it is ready
+        self.preview_button.setDisabled(True)
+        self.window.installEventFilter(self)
+        
+        threading.Thread(target=self.load_preview, args=(name,), daemon=True).start()
+        threading.Thread(target=self.load_waveform, args=(name,), daemon=True).start()
+        
+        self.preview_button.setIcon(QIcon(f"{self.main_app.icons_path}/Speaker_Icon.svg"))
+        self.preview_button.setIconSize(QSize(24, 24))
+        self.preview_button.setBaseSize(QSize(15, 10))
+        
+        self.save_length_button = QPushButton("Save")
+        self.save_length_button.clicked.connect(lambda _, name = name: self.save_length(name))
+        
+        self.revert_sound_button = QPushButton("Revert Sound")
+        self.revert_sound_button.clicked.connect(lambda _, name = name: self.revert_sound(name))
+        
+        self.grid.addWidget(self.preview_button, 0, 0, Qt.AlignmentFlag.AlignLeft)
+        self.grid.addWidget(self.curr_len_label, 0, 0,Qt.AlignmentFlag.AlignHCenter)
+        self.grid.addWidget(self.length_slider, 0, 1, Qt.AlignmentFlag.AlignRight)
+        self.grid.addWidget(self.len_slider_label, 0, 1, Qt.AlignmentFlag.AlignLeft)
+        self.grid.addWidget(self.waveform, 1, 0, 1, 2)
+        self.grid.addWidget(self.save_length_button, 2, 1, Qt.AlignmentFlag.AlignRight)
+        self.grid.addWidget(self.revert_sound_button, 2, 0, Qt.AlignmentFlag.AlignCenter)
+        
+        with open("themes/style_sheet_edit_options.qss", "r") as f:
+            self.window.setStyleSheet(f.read())
+        
+        
+        
+    def length_slider_val_changed(self, value):
+        
+        print(f"Value is: {value[0]} - {value[1]}")
+        self.len_slider_label.setText(f"Between {round(value[0], 2)}s and {round(value[1], 2)}s")
+        self.waveform.set_selection(value[0], value[1])
+        
+        #A preview that is playing follows the handles as they move
+        if self.preview_handle is not None and self.preview_handle.is_playing():
+            self.preview_handle.set_region(value[0], value[1])
+            
+            
+    def load_preview(self, name):
+        
+        """
+        Decode the sound for the preview device. This runs on its own thread, so the window stays responsive for long sounds.
+        """
+        
+        preview_data = None
+        
+        try:
+            
+            device = self.main_app.settings["default_input"]
+            
+            if device is None:
+                raise ValueError("the headphones device is not connected")
+            
+            preview_data = self.main_app.player.load_for_device(self.main_app.sound_buttons[name]["path"], device)
+            
+        except Exception as e:
+            print(f"Error, unable to load '{name}' for previewing, see: {e}")
+            
+        self.preview_loaded.emit(name, preview_data)
+        
+        
+    def preview_ready(self, name, preview_data):
+        
+        #The window may have been reopened for another sound while this one was loading
+        if preview_data is not None and name == self.preview_name:
+            
+            self.preview_data = preview_data
+            self.preview_button.setDisabled(False)
+            
+            
+    def load_waveform(self, name):
+        
+        """
+        Fetch the waveform pyramid of the sound on its own thread, building it the first time the sound is edited.
+        """
+        
+        peaks = None
+        
+        try:
+            peaks = self.main_app.peak_cache.get(self.main_app.sound_buttons[name]["path"])
+            
+        except Exception as e:
+            print(f"Error, unable to load the waveform of '{name}', see: {e}")
+            
+        self.waveform_loaded.emit(name, peaks)
+        
+        
+    def waveform_ready(self, name, peaks):
+        
+        if peaks is not None and name == self.preview_name:
+            self.waveform.set_peaks(peaks)
+            
+            
+    def eventFilter(self, watched, event):
+        
+        if watched is self.window and event.type() == QEvent.Type.Close:
+            self.stop_preview()
+            
+        return super().eventFilter(watched, event)
+    
+    
+    def stop_preview(self):
+        
+        if self.preview_handle is not None:
+            
+            self.preview_handle.stop(0.01)
+            self.preview_handle = None
+            
+        
+    def preview_sound(self, name, slider):
+        
+        """ 
+        Each sound has been stored as a numpy array. This, using this knowledge we can splice the sound array to edit its length as follows:
+        
+            - Each row in the data array is ONE AUDIO FRAME.
+            - The number of frames per second is determined by the SAMPLERATE
+            - Thus, to trim our audio, we do 
+            
+                trimmed_length = samplerate * number_of_seconds
+                trimmed_data = data[:trimmed_data]
+                
+            - So, if we want the first 5 seconds, substitute 'number_of_seconds' with 5. 
+            
+            - Here, we have a double handled slider, so we can splice using a start and stop value
+            
+                trimmed_start = samplerate * handle_1
+                trimmed_end = samplerate * handle_2
+                
+                trimmed_sound = data[trimmed_start:trimmed_end]
+                
+        Rather than copying the slice, the preview plays the decoded sound between the two handles through
+        the playback engine, so it does not block. Pressing the button while a preview plays stops it.
+        """
+        
+        if self.preview_handle is not None and self.preview_handle.is_playing():
+            
+            self.stop_preview()
+            return
+        
+        data, samplerate = self.preview_data
+        
+        #The handles are rounded to the nearest frame, as trim_sound() does, so the preview matches the saved trim
+        handle_1, handle_2 = slider.value()
+        start, end = int(round(samplerate * handle_1)), int(round(samplerate * handle_2))
+        
+        self.preview_handle = self.main_app.player.play_data(self.main_app.sound_buttons[name]["path"], data, samplerate, 
+                                                             self.main_app.settings["default_input"], self.main_app.settings["volume"],
+                                                             start, end, self.main_app.normalisation_gain(name))
+        
+    
+    def trim_sound(self, name, slider):
+        
+        """
+        Turn the positions of the handles into a trim of the sound, in frames of its file. The handles are
+        rounded to the nearest frame rather than the nearest second.
+        """
+        
+        info = sf.info(self.main_app.sound_buttons[name]["path"])
+        handle_1, handle_2 = slider.value()
+        
+        return {"start": max(int(round(handle_1 * info.samplerate)), 0),
+                "end": min(int(round(handle_2 * info.samplerate)), info.frames),
+                "samplerate": info.samplerate}
+               
+    
+    def save_length(self, name):
+        
+        ok_box = QMessageBox(self)
+        ok_box.setWindowTitle("Success!")
+        ok_box.setText(f"{name} has been successfully modified.")
+        ok_box.setStandardButtons(QMessageBox.Ok)
+        
+        warning_msg = QMessageBox.question(self, "Confirm", 
+        f"This action will modify '{name}'. \n\n You may revert this at any time. Do you wish to proceed? ",
+        QMessageBox.Cancel | QMessageBox.Yes)
+        
+        try: 
+            if warning_msg == QMessageBox.Yes:
+                
+                self.stop_preview()
+                
+                #The file itself is left untouched, only the trim stored in the library changes
+                self.main_app.set_trim(name, self.trim_sound(name, self.length_slider))
+                ok_box.exec()
+                
+                self.window.close()
+                self.model.refresh_row(name)
+                
+                
+        except Exception as e:
+            
+            not_ok_box = QMessageBox(self)
+            not_ok_box.setWindowTitle("Error")
+            not_ok_box.setText(f"There has been an error updating '{name}', see: {e}")
+            not_ok_box.setStandardButtons(QMessageBox.Ok)
+            
+            not_ok_box.exec()
+            
+            self.window.close()
+            
+            
+    def revert_sound(self, name):
+        
+        warning_msg = QMessageBox.question(self, "Confirm", 
+        f"This will revert the sound back to its original form. Are you certain?",
+        QMessageBox.Cancel | QMessageBox.Yes)
+        
+        ok_box = QMessageBox(self)
+        ok_box.setWindowTitle("Success!")
+        ok_box.setText(f"'{name}' has been successfully reverted back to the original file.")
+        ok_box.setStandardButtons(QMessageBox.Ok)
+        
+        try:
+            
+            if warning_msg == QMessageBox.Yes:
+                
+                file_type = self.main_app.sound_buttons[name]["file_type"]
+                
+                if self.main_app.sound_buttons[name].get("trim") is not None:
+                    self.main_app.set_trim(name, None)
+                    
+                #Sounds trimmed before trims were stored in the library were rewritten, with the original kept aside
+                elif os.path.exists(f"{self.main_app.unedited_sounds_path}/{name}{file_type}"):
+                
+                    os.remove(f"{self.main_app.sounds_path}/{name}{file_type}")
+                    shutil.move(f"{self.main_app.unedited_sounds_path}/{name}{file_type}", f"{self.main_app.sounds_path}/")
+                    
+                    duration = self.main_app.get_duration(f"{self.main_app.sounds_path}/{name}{file_type}", name)
+                    self.main_app.sound_buttons[name]["duration"] = duration
+                    self.main_app.sound_buttons[name]["full_duration"] = duration
+                    
+                else:
+                    raise ValueError(f"'{name}' has not been trimmed")
+                
+                self.model.refresh_row(name)
+                
+                ok_box.exec()
+                
+        except Exception as e:
+            
+            not_ok_box = QMessageBox(self)
+            not_ok_box.setWindowTitle("ERROR")
+            not_ok_box.setText(f"There has been an error reverting '{name}', this sound likely hasn't been modified yet.")
+            not_ok_box.setStandardButtons(QMessageBox.Ok)
+            
+            not_ok_box.exec()  
+
+        finally:
+            
+            self.window.close()
+            self.model.refresh_row(name)
+            
+            
+               
+                  
+class MainWindow(QMainWindow):
+    
+    #Emitted from the background threads started by finish_startup() and check_devices(), with the device settings to change
+    devices_checked = Signal(object)
+    
+    #Emitted once those changes have been applied to the settings, with whether the settings changed
+    devices_ready = Signal(bool)
+    library_scanned = Signal(object)
+    
+    #Emitted with the entries and changes of a library scan made by sync_library()
+    library_synced = Signal(object, object)
+    
+    #Written to settings.json for any setting that is missing from it
+    DEFAULT_SETTINGS = {
+        "volume": 1.0,
+        "pcm_cache_mb": 256,
+        "engine_mode": "persistent",
+        "max_voices": 32,
+        "render_cache_mb": 256,
+        "streaming_min_seconds": 30,
+        "streaming_buffer_seconds": 2.0,
+        "pcm_disk_cache": True,
+        "pcm_disk_cache_mb": 2048,
+        "watch_debounce_ms": 300,
+        "thumbnail_cache_entries": 512,
+        "import_workers": 4,
+        "import_predecode": False,
+        "normalise_loudness": True,
+        "normalise_target_db": -20.0,
+        "analysis_workers": 0,
+        "low_latency": False,
+        "device_latency": {},
+        "output_backend": "portaudio",
+        "backend_realtime": True,
+        "backend_capture_path": "captures",
+        "device_keys": {},
+        "device_refresh_seconds": 5,
+        "key_bindings": {},
+        "active_bank": 1,
+        "device_gain_db": {},
+        "limiter_threshold_db": -0.2,
+        "limiter_lookahead_ms": 2.0,
+        "limiter_release_ms": 100.0,
+        "stop_fade_ms": 10,
+    }
+    
+    def __init__(self):
+        
+        super().__init__()
+        
+        self.startup = StartupTimings()
+        self.startup.mark("imports")
+
+        self.active_threads = []
+        self.stop_event = threading.Event()
+        
+        self.SETTINGS_FILE = "settings.json"
+        self.BUTTON_ICONS_FILE = "button_images.json"
+        self.LIBRARY_INDEX_FILE = "library_index.json"
+        
+        #Nested defaults such as device_latency are filled in place, so each window gets its own copy
+        DEFAULT_SETTINGS = copy.deepcopy(self.DEFAULT_SETTINGS)
+
+        username = getpass.getuser()
+        
+        #The settings are only written back when something was missing from them
+        settings_changed = False
+
+        if os.path.exists(self.SETTINGS_FILE):
+            
+            with open(self.SETTINGS_FILE, "r") as f:
+                settings = json.load(f)
+
+            if "username" not in settings.keys():
+                
+                settings["username"] = username
+                settings_changed = True
+                
+            for key, value in DEFAULT_SETTINGS.items():
+                
+                if key not in settings.keys():
+                    
+                    settings[key] = value
+                    settings_changed = True
+
+                
+        else:
+            
+            settings = DEFAULT_SETTINGS.copy()
+            
+        #The backend is needed first, as it decides the devices on a first launch
+        backend = create_output_backend(settings)
+        
+        if "default_output" not in settings.keys():
+            
+            settings_changed = True
+            default_output, default_input = backend.default_devices()
+
+            input_device_info = backend.query_devices(default_input)
+            output_device_info = backend.query_devices(default_output)
+
+            settings["default_input_info"] = input_device_info
+            settings["default_output_info"] = output_device_info
+            settings["default_output"] = default_output
+            settings["default_input"] = default_input
+            settings["username"] = username
+
+        if os.path.exists(self.BUTTON_ICONS_FILE):
+
+            with open(self.BUTTON_ICONS_FILE, "r") as f:
+                button_icons = json.load(f)
+
+        else:
+
+            button_icons = {}
+            
+        
+        self.icons_path = "media/images"
+        self.sounds_path = "sounds"
+        self.trimmed_sounds_path = "trimmed_sounds"
+        self.unedited_sounds_path = "unedited_sounds"
+        self.pcm_cache_path = "pcm_cache"
+        self.thumbnail_cache_path = "thumbnail_cache"
+        self.peak_cache_path = "peak_cache"
+        
+        self.library = LibraryIndex(self.LIBRARY_INDEX_FILE)
+        self.peak_cache = PeakCache(self.peak_cache_path)
+        self.analyser = LoudnessAnalyser(settings["analysis_workers"])
+        
+        self.thumbnails = ThumbnailCache(self.thumbnail_cache_path, settings["thumbnail_cache_entries"])
+        self.thumbnails.thumbnail_ready.connect(self.thumbnail_ready)
+        
+        #Shown in place of a picture until its thumbnail has been loaded
+        self.placeholder_pixmap = QPixmap(60, 55)
+        self.placeholder_pixmap.fill(Qt.GlobalColor.transparent)
+        
+        self.sound_buttons = {}
+        self.edit_files_view = None
+        self.home_buttons = {}
+        self.no_files_label = None
+        self.home_view_active = False
+        self.button_icons = button_icons
+        self.settings = settings
+        
+        if settings_changed:
+            self.save_settings()
+            
+        self.startup.mark("settings")
+        
+        #The streams are opened and the sounds folder is scanned once the window is on screen, see finish_startup()
+        self.player = MultiDevicePlayer(self, backend)
+        self.startup_finished = False
+        self.library_ready = False
+        
+        self.devices_checked.connect(self.devices_updated)
+        self.device_check = None
+        self.library_scanned.connect(self.publish_library)
+        
+        self.library_sync = None
+        self.library_sync_pending = False
+        self.library_synced.connect(self.apply_library_sync)
+        
+        if not os.path.exists(self.sounds_path):
+            os.makedirs(self.sounds_path)
+            
+        if not os.path.exists(self.unedited_sounds_path):
+            os.makedirs(self.unedited_sounds_path)
+        
+        self.setWindowTitle("Tower of Babel 2")
+        self.setWindowIconText("Soundboard App")
+        self.setWindowIcon(QIcon(f"{self.icons_path}/cassette.png"))
+
+        self.setGeometry(100, 100, 800, 500)
+        self.resize(QSize(1400, 450))
+        self.setMaximumSize(QSize(1400, 1000))
+        
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.setInterval(500)
+        self.analysis_timer.timeout.connect(self.publish_loudness)
+        
+        #Lost devices, and devices that come back, are looked for every few seconds once startup has finished
+        self.device_timer = QTimer(self)
+        self.device_timer.setInterval(int(self.settings["device_refresh_seconds"] * 1000))
+        self.device_timer.timeout.connect(self.check_devices)
+
+        self.build_home_view()
+        
+        #The numpad's number keys switch between banks of key bindings
+        self.key_shortcuts = []
+        self.bank_shortcuts = []
+        
+        for bank in range(1, 10):
+            
+            shortcut = QShortcut(QKeySequence(f"Num+{bank}"), self)
+            shortcut.setContext(Qt.ShortcutContext.ApplicationShortcut)
+            shortcut.activated.connect(lambda bank = bank: self.switch_bank(bank))
+            
+            self.bank_shortcuts.append(shortcut)
+            
+        self.apply_key_bindings()
+        
+        #Changes made to the sound folders outside of the app are picked up here. Bursts of events, such as a
+        #large copy, restart the timer so that they are applied in one batch once the folder settles
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setInterval(self.settings["watch_debounce_ms"])
+        self.sync_timer.timeout.connect(self.sync_library)
+        
+        self.importer = None
+        self.import_timer = QTimer(self)
+        self.import_timer.setInterval(200)
+        self.import_timer.timeout.connect(self.publish_imports)
+        
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(lambda _: self.sync_timer.start())
+        self.watch_sound_folders()
+        
+        toolbar = QToolBar("Soundboard Toolbar")
+        toolbar.setIconSize(QSize(32,32))
+        toolbar.setContextMenuPolicy(Qt.PreventContextMenu)
+        
+        self.addToolBar(toolbar)
+
+        home_button = QAction(QIcon("media/images/Home-icon.png"), "", self)
+        home_button.setStatusTip("Home Dashboard")
+        home_button.triggered.connect(self.build_home_view)
+
+        toolbar.addAction(home_button)
+        toolbar.addSeparator()
+        
+        settings_button = QAction("Settings", self)
+        settings_button.triggered.connect(self.settings_config)
+        
+        toolbar.addAction(settings_button)
+        toolbar.addSeparator()
+        
+        add_files_button = QAction("Add File(s)", self)
+        add_files_button.setStatusTip("Add your sound files here")
+        add_files_button.triggered.connect(self.add_files)
+        
+        toolbar.addAction(add_files_button)
+        toolbar.addSeparator()
+        
+        edit_files_button = QAction("Edit File(s)", self)
+        edit_files_button.setStatusTip("Edit the sounds")
+        edit_files_button.triggered.connect(self.edit_files)
+        
+        toolbar.addAction(edit_files_button)
+        toolbar.addSeparator()
+
+        stop_sounds_button = QAction("Stop Sound(s)", self)
+        stop_sounds_button.setStatusTip("Stop playing the current sound(s)")
+        stop_sounds_button.triggered.connect(lambda: self.player.stop_all())
+        
+        #The menu of the stop button stops one device, leaving the other playing
+        stop_menu = QMenu(self)
+        stop_menu.addAction("Stop Headphones", lambda: self.stop_device("default_input"))
+        stop_menu.addAction("Stop Microphone", lambda: self.stop_device("default_output"))
+        stop_sounds_button.setMenu(stop_menu)
+
+        toolbar.addAction(stop_sounds_button)
+        toolbar.addSeparator()
+        
+        stats_button = QAction("Stats", self)
+        stats_button.setStatusTip("Show playback timings and device statistics")
+        stats_button.triggered.connect(self.show_stats)
+        
+        toolbar.addAction(stats_button)
+        toolbar.addSeparator()
+        
+        spacer = QWidget()
+        spacer.setFixedSize(600, 0)
+        toolbar.addWidget(spacer)
+        
+        volume_label = QLabel("Volume    ")
+        toolbar.addWidget(volume_label)
+        
+        self.volume_slider = QSlider(Qt.Orientation.Horizontal)
+        self.volume_slider.setProperty("class", "VolumeSlider")
+        self.volume_slider.setRange(1, 100)
+        self.volume_slider.setSingleStep(1)
+        self.volume_slider.setValue(self.settings["volume"]*100)
+        self.volume_slider.setFixedWidth(250)
+        self.volume_slider.valueChanged.connect(self.set_volume)
+        
+        toolbar.addWidget(self.volume_slider)
+
+
+        with open("themes/style_sheet_main_app.qss", "r") as f:
+            self.setStyleSheet(f.read())
+            
+        self.startup.mark("window_built")
+        
+        
+    def showEvent(self, event):
+        
+        super().showEvent(event)
+        
+        #The rest of startup waits until the window has been drawn once
+        if not self.startup_finished:
+            
+            self.startup_finished = True
+            QTimer.singleShot(0, self.finish_startup)
+            
+            
+    def finish_startup(self):
+        
+        """
+        Start the work of startup that does not need to hold up the window. The devices are opened and the
+        sounds folder is scanned on background threads, and the board is updated as each of them finishes.
+        """
+        
+        self.startup.mark("window_shown")
+        
+        self.device_check = threading.Thread(target=self.open_devices, daemon=True)
+        self.device_check.start()
+        
+        threading.Thread(target=self.scan_library, daemon=True).start()
+        
+        
+    def open_devices(self):
+        
+        #Importing sounddevice initialises PortAudio, which lists every device, so this is also done here
+        try:
+            
+            self.player.devices.refresh()
+            updates = self.resolve_devices()
+            
+        except Exception as e:
+            
+            print(f"Error, unable to list the audio devices, see: {e}")
+            updates = {}
+            
+        self.player.open_streams(self.output_devices(updates))
+        self.devices_checked.emit(updates)
+        
+        
+    def output_devices(self, updates = None):
+        
+        """
+        The indices of the configured devices that are connected, the headphones first. A background thread passes
+        the 'updates' it has found, which are only applied to the settings once they reach the GUI thread.
+        """
+        
+        updates = updates or {}
+        
+        devices = [updates.get(setting, self.settings[setting]) for setting in ("default_input", "default_output")]
+        
+        return [device for device in devices if device is not None]
+    
+    
+    def resolve_devices(self):
+        
+        """
+        Find the current indices of the configured devices by their stable keys. A device that is not connected is
+        set to None and skipped until it comes back. This runs on background threads, so the settings are only read:
+        the changes are returned for apply_device_updates(), as the new index of each device that moved and, under
+        "device_keys", the keys found for devices that had none.
+        """
+        
+        updates = {}
+        keys = dict(self.settings["device_keys"])
+        
+        for setting in ("default_input", "default_output"):
+            
+            index = self.settings[setting]
+            
+            #Settings from before devices had keys only hold an index, which is turned into a key the first time
+            if setting not in keys:
+                
+                key = None if index is None else self.player.devices.key(index)
+                
+                if key is not None:
+                    updates.setdefault("device_keys", {})[setting] = key
+                    
+                continue
+                
+            resolved = self.player.devices.resolve(keys[setting])
+            
+            if resolved != index:
+                updates[setting] = resolved
+                
+        return updates
+    
+    
+    def apply_device_updates(self, updates):
+        
+        """
+        Apply the changes found by resolve_devices() or _check_devices() to the settings, on the GUI thread.
+        Returns True if the settings changed.
+        """
+        
+        for setting, key in updates.get("device_keys", {}).items():
+            
+            self.settings["device_keys"][setting] = key
+            
+            #The block size and latency of the device were also stored under its index
+            latencies = self.settings["device_latency"]
+            
+            if str(self.settings[setting]) in latencies:
+                latencies.setdefault(key, latencies.pop(str(self.settings[setting])))
+                
+        for setting in ("default_input", "default_output"):
+            
+            if setting in updates:
+                self.settings[setting] = updates[setting]
+                
+        return bool(updates)
+    
+    
+    def check_devices(self, rescan = False):
+        
+        """
+        Look for lost devices on a background thread, without holding up playback. A device whose stream has stopped
+        asking for audio is left out until it comes back. PortAudio only sees devices that were plugged in once it is
+        restarted, which stops every sound, so that is only done when 'rescan' is set by the 'Refresh Devices' button.
+        """
+        
+        if self.device_check is not None and self.device_check.is_alive():
+            return
+        
+        self.device_check = threading.Thread(target=self._check_devices, args=(rescan,), daemon=True)
+        self.device_check.start()
+        
+        
+    def _check_devices(self, rescan):
+        
+        try:
+            
+            if rescan:
+                
+                self.player.rescan_devices()
+                updates = self.resolve_devices()
+                
+            else:
+                
+                lost = self.player.close_stalled()
+                
+                if not lost:
+                    return
+                
+                #Sounds carry on playing on the other device, the lost one is found again by its key on the next rescan
+                updates = {setting: None for setting in ("default_input", "default_output") if self.settings[setting] in lost}
+            
+        except Exception as e:
+            
+            print(f"Error, unable to refresh the audio devices, see: {e}")
+            updates = {}
+            
+        self.player.open_streams(self.output_devices(updates))
+        self.devices_checked.emit(updates)
+        
+        
+    def scan_library(self):
+        
+        try:
+            entries = self.library.scan(self.sounds_path)
+            
+        except Exception as e:
+            
+            print(f"Error, unable to scan the sounds folder, see: {e}")
+            entries = dict(self.library.entries)
+            
+        self.library_scanned.emit(entries)
+        
+        #Sounds may have been removed while the app was closed
+        self.prune_disk_cache()
+        
+        
+    def prune_disk_cache(self):
+        
+        """
+        Remove the decoded copies of sounds that no longer exist, and any over the disk cache's budget. Called from
+        the threads that scan the library, as it lists the cache's folder.
+        """
+        
+        if self.player.cache.disk_cache is None:
+            return
+        
+        try:
+            self.player.cache.disk_cache.prune()
+            
+        except OSError as e:
+            print(f"Error, unable to clean up the sound cache, see: {e}")
+            
+            
+    def devices_updated(self, updates):
+        
+        """
+        Called once the devices have been opened at startup, and after each refresh of the devices, with the changes
+        to the device settings that were found. The settings page is told through devices_ready once they are applied.
+        """
+        
+        self.startup.mark("devices_opened")
+        
+        changed = self.apply_device_updates(updates)
+        
+        if changed:
+            self.save_settings()
+            
+        if None in (self.settings["default_input"], self.settings["default_output"]):
+            self.statusBar().showMessage("An audio device is not connected. Press 'Refresh Devices' in the settings once it is plugged in.", 10000)
+        
+        #In low latency mode every sound is made ready for the open streams straight away, rather than on its first press
+        if self.library_ready and self.settings["low_latency"]:
+            self.prepare_sounds()
+            
+        #The streams may have been reopened with another sample rate or channel count
+        self.arm_sounds()
+            
+        if self.settings["device_refresh_seconds"] > 0:
+            self.device_timer.start()
+            
+        self.devices_ready.emit(changed)
+        self.report_startup()
+        
+        
+    def publish_library(self, entries):
+        
+        """
+        Replace the sounds shown from the previous run's index with those found by the scan at startup.
+        """
+        
+        self.library_ready = True
+        self.load_sounds(entries)
+        self.apply_key_bindings()
+        self.startup.mark("library_scanned")
+        
+        #Changes made while the startup scan was running may have been missed by it
+        if self.library_sync_pending:
+            self.sync_library()
+        
+        if "devices_opened" in self.startup.phases and self.settings["low_latency"]:
+            self.prepare_sounds()
+            
+        self.report_startup()
+        
+        
+    def report_startup(self):
+        
+        """
+        Print the startup timings once startup has finished, if the app was run with --startup-timings.
+        """
+        
+        if "--startup-timings" in sys.argv and {"devices_opened", "library_scanned"} <= self.startup.phases.keys():
+            print(json.dumps(self.startup.summary(), indent = 4))
+        
+        
+    def key_bindings_of(self, name):
+        
+        """
+        The (bank, key) pairs that play the given sound, in order of bank.
+        """
+        
+        return [(int(bank), sequence) for bank, bindings in sorted(self.settings["key_bindings"].items())
+                for sequence, bound_name in bindings.items() if bound_name == name]
+    
+    
+    def set_key_binding(self, name, bank, sequence):
+        
+        """
+        Bind a key to a sound within a bank, replacing the sound's previous key in that bank and any sound the key
+        played before. An empty key removes the sound's binding.
+        """
+        
+        if sequence and QKeySequence(sequence) in [QKeySequence(f"Num+{number}") for number in range(1, 10)]:
+            raise ValueError("the numpad's number keys switch between banks")
+        
+        bindings = self.settings["key_bindings"].setdefault(str(bank), {})
+        
+        for bound_sequence in [key for key, bound_name in bindings.items() if bound_name == name]:
+            bindings.pop(bound_sequence)
+            
+        if sequence:
+            bindings[sequence] = name
+            
+        self.save_settings()
+        self.apply_key_bindings()
+        
+        
+    def rename_key_bindings(self, original, new_name):
+        
+        for bindings in self.settings["key_bindings"].values():
+            
+            for sequence in [key for key, name in bindings.items() if name == original]:
+                bindings[sequence] = new_name
+                
+        self.save_settings()
+        self.apply_key_bindings()
+        
+        
+    def switch_bank(self, bank):
+        
+        self.settings["active_bank"] = bank
+        self.save_settings()
+        self.apply_key_bindings()
+        
+        self.statusBar().showMessage(f"Key bank {bank}", 3000)
+        
+        
+    def apply_key_bindings(self):
+        
+        """
+        Create a shortcut for each key bound in the active bank, and arm every sound that is bound in any bank.
+        The shortcuts work on every page of the app, but not while a text box has the keyboard.
+        """
+        
+        for shortcut in self.key_shortcuts:
+            
+            shortcut.setEnabled(False)
+            shortcut.deleteLater()
+            
+        self.key_shortcuts = []
+        
+        for sequence, name in self.settings["key_bindings"].get(str(self.settings["active_bank"]), {}).items():
+            
+            if name not in self.sound_buttons:
+                continue
+            
+            shortcut = QShortcut(QKeySequence(sequence), self)
+            shortcut.setContext(Qt.ShortcutContext.ApplicationShortcut)
+            shortcut.setAutoRepeat(False)
+            shortcut.activated.connect(lambda name = name: self.play_sound(name))
+            
+            self.key_shortcuts.append(shortcut)
+            
+        #Buttons built later are given their tool tip by create_sound_button()
+        if self.home_view_active:
+            
+            for name, btn in self.home_buttons.items():
+                btn.setToolTip(self.key_tool_tip(name))
+            
+        self.arm_sounds()
+        
+        
+    def key_tool_tip(self, name):
+        
+        keys = [sequence for bank, sequence in self.key_bindings_of(name) if bank == self.settings["active_bank"]]
+        
+        return f"Key: {keys[0]}" if keys else ""
+        
+        
+    def arm_sounds(self):
+        
+        #Arming needs the streams, so it waits for the devices and the library at startup
+        if not self.library_ready or "devices_opened" not in self.startup.phases:
+            return
+        
+        names = {name for bindings in self.settings["key_bindings"].values() for name in bindings.values()}
+        
+        self.player.arm([self.sound_buttons[name]["path"] for name in names if name in self.sound_buttons], self.output_devices())
+        
+        
+    def show_stats(self):
+        
+        #The panel is its own window, so it can stay open while sounds are played
+        self.stats_panel = StatsPanel(self)
+        self.stats_panel.show()
+        
+        
+    def set_volume(self, value):
+        
+        #The volume is read when a sound is played, so there is nothing to rebuild here
+        self.settings["volume"] = value/100
+        self.player.set_volume(self.settings["volume"])
+        
+        
+    def play_sound(self, name):
+        
+        """
+        Play a sound using the devices and volume set at the moment it is pressed.
+        """
+        
+        devices = self.output_devices()
+        
+        trim = self.sound_buttons[name].get("trim")
+        region = None if trim is None else (trim["start"] / trim["samplerate"], trim["end"] / trim["samplerate"])
+        
+        return self.player.play_sound(path = self.sound_buttons[name]["path"], devices = devices, volume = self.settings["volume"], 
+                                      region = region, gain = self.normalisation_gain(name))
+        
+        
+    def stop_sound(self, name):
+        
+        self.player.stop_sound(self.sound_buttons[name]["path"])
+        
+        
+    def stop_device(self, setting):
+        
+        if self.settings[setting] is not None:
+            self.player.stop_device(self.settings[setting])
+            
             
+    def prepare_sounds(self):
         
-        self.icons_path = "media/images"
-        self.sounds_path = "sounds"
-        self.trimmed_sounds_path = "trimmed_sounds"
-        self.unedited_sounds_path = "unedited_sounds"
+        self.player.prepare([sound["path"] for sound in self.sound_buttons.values()], self.output_devices())
         
-        self.player = MultiDevicePlayer(self)
-
-        self.sound_buttons = {}
-        self.button_icons = button_icons
-        self.settings = settings
-        self.save_settings()
         
-        self.setWindowTitle("Tower of Babel 2")
-        self.setWindowIconText("Soundboard App")
-        self.setWindowIcon(QIcon(f"{self.icons_path}/cassette.png"))
-
-        self.setGeometry(100, 100, 800, 500)
-        self.resize(QSize(1400, 450))
-        self.setMaximumSize(QSize(1400, 1000))
-
-        self.build_home_view()
+    def normalisation_gain(self, name):
         
-        toolbar = QToolBar("Soundboard Toolbar")
-        toolbar.setIconSize(QSize(32,32))
-        toolbar.setContextMenuPolicy(Qt.PreventContextMenu)
+        """
+        The gain that brings a sound to the target loudness. Quiet sounds are raised by at most 12dB and never
+        pushed past full scale; sounds that have not been analysed yet are played as they are.
+        """
         
-        self.addToolBar(toolbar)
-
-        home_button = QAction(QIcon("media/images/Home-icon.png"), "", self)
-        home_button.setStatusTip("Home Dashboard")
-        home_button.triggered.connect(self.build_home_view)
-
-        toolbar.addAction(home_button)
-        toolbar.addSeparator()
+        loudness = self.sound_buttons[name].get("loudness")
         
-        settings_button = QAction("Settings", self)
-        settings_button.triggered.connect(self.settings_config)
+        if not self.settings["normalise_loudness"] or loudness is None or loudness["loudness_db"] is None:
+            return 1.0
         
-        toolbar.addAction(settings_button)
-        toolbar.addSeparator()
+        gain = 10 ** (min(self.settings["normalise_target_db"] - loudness["loudness_db"], 12.0) / 20)
         
-        add_files_button = QAction("Add File(s)", self)
-        add_files_button.setStatusTip("Add your sound files here")
-        add_files_button.triggered.connect(self.add_files)
+        if loudness["peak"]:
+            gain = min(gain, 1.0 / loudness["peak"])
+            
+        return gain
+    
+    
+    def analyse_library(self, force = False):
         
-        toolbar.addAction(add_files_button)
-        toolbar.addSeparator()
+        """
+        Start loudness analysis of every sound that has not been analysed yet, or of every sound if forced.
+        The results are stored as they arrive by publish_loudness().
+        """
         
-        edit_files_button = QAction("Edit File(s)", self)
-        edit_files_button.setStatusTip("Edit the sounds")
-        edit_files_button.triggered.connect(self.edit_files)
+        paths = [entry["path"] for entry in self.library.entries.values() if force or entry.get("loudness") is None]
         
-        toolbar.addAction(edit_files_button)
-        toolbar.addSeparator()
-
-        stop_sounds_button = QAction("Stop Sound(s)", self)
-        stop_sounds_button.setStatusTip("Stop playing the current sound(s)")
-        stop_sounds_button.triggered.connect(self.player.stop)
-
-        toolbar.addAction(stop_sounds_button)
-        toolbar.addSeparator()
+        if paths:
+            
+            self.analyser.analyse(paths)
+            self.analysis_timer.start()
+            
+            
+    def publish_loudness(self):
         
-        spacer = QWidget()
-        spacer.setFixedSize(600, 0)
-        toolbar.addWidget(spacer)
+        results = [(os.path.basename(path), loudness) for path, loudness in self.analyser.take()]
         
-        volume_label = QLabel("Volume    ")
-        toolbar.addWidget(volume_label)
+        if results:
+            
+            self.library.set_loudness(results)
+            
+            for file, _ in results:
+                
+                if file in self.library.entries:
+                    self.update_sound_entry(file, self.library.entries[file])
+                    
+        if not self.analyser.busy():
+            self.analysis_timer.stop()
         
-        self.volume_slider = QSlider(Qt.Orientation.Horizontal)
-        self.volume_slider.setProperty("class", "VolumeSlider")
-        self.volume_slider.setRange(1, 100)
-        self.volume_slider.setSingleStep(1)
-        self.volume_slider.setValue(self.settings["volume"]*100)
-        self.volume_slider.setFixedWidth(250)
-        self.volume_slider.valueChanged.connect(self.set_volume)
         
-        toolbar.addWidget(self.volume_slider)
-
-
-        with open("themes/style_sheet_main_app.qss", "r") as f:
-            self.setStyleSheet(f.read())
+    def set_trim(self, name, trim):
+        
+        """
+        Trim a sound without touching its file. The trim is stored in the library and applied when the sound is played.
+        """
         
+        file = os.path.basename(self.sound_buttons[name]["path"])
         
-    def set_volume(self, value):
-        print("Value: ", value/100)
-        self.settings["volume"] = value/100
-        self.load_sounds()
+        self.library.set_trim(file, trim)
+        self.update_sound_entry(file, self.library.entries[file])
         
         
     def get_duration(self, path, file):
         
         try:
-                audio = MutagenFile(path)
+                audio = mutagen.File(path)
                 
                 if audio is not None and audio.info is not None:
                     duration = round(audio.info.length, 2)
@@ -1000,70 +5499,251 @@ class MainWindow(QMainWindow):
         return duration
 
     
-    def load_sounds(self):
-
-        if not os.path.exists(self.sounds_path):
+    def load_sounds(self, entries = None):
+        
+        """
+        Update the sounds from the given library entries, or from those the library holds. The sounds folder is only
+        scanned on background threads, at startup and by sync_library(), so the library is already up to date.
+        Until the scan at startup has finished, the sounds recorded by the previous run are shown.
+        """
 
-            os.makedirs(self.sounds_path)
+        files = entries if entries is not None else dict(self.library.entries)
+            
+        names = []
 
-            no_files_label = QLabel("Looks like we don't have any files yet. Click 'Add File(s)' to add some sounds!")
+        for file, entry in files.items():
+            names.append(self.update_sound_entry(file, entry))
+                
+        for name in [name for name in self.sound_buttons.keys() if name not in names]:
+            self.sound_buttons.pop(name)
+            
+        #New and changed sounds are analysed in the background
+        if self.library_ready:
+            self.analyse_library()
 
-            font = no_files_label.font()
-            font.setPointSize(15)
+        if self.home_view_active:
+            self.update_home_grid(names)
+            
+            
+    def update_sound_entry(self, file, entry):
+        
+        name = os.path.splitext(file)[0]
 
-            no_files_label.setFont(font)
-            self.grid.addWidget(no_files_label)
+        if name not in self.sound_buttons.keys():
+            self.sound_buttons[name] = {"path": entry["path"], "emoji": f"{self.icons_path}/Icon_Placeholder.png", "duration": entry["duration"], "file_type": entry["file_type"]}
+            
+        self.sound_buttons[name]["path"] = entry["path"]
+        self.sound_buttons[name]["full_duration"] = entry["duration"]
+        self.sound_buttons[name]["trim"] = trim = entry.get("trim")
+        self.sound_buttons[name]["loudness"] = entry.get("loudness")
+        
+        #Trimmed sounds show the length that is played
+        if trim is not None:
+            self.sound_buttons[name]["duration"] = round((trim["end"] - trim["start"]) / trim["samplerate"], 2)
             
+        else:
+            self.sound_buttons[name]["duration"] = entry["duration"]
 
-            return
+        if name in self.button_icons.keys():
+            self.sound_buttons[name]["emoji"] = self.button_icons[name]
+            
+        return name
+    
+    
+    def watch_sound_folders(self):
+        
+        for path in (self.sounds_path, self.unedited_sounds_path):
+            
+            if os.path.isdir(path) and os.path.abspath(path) not in [os.path.abspath(d) for d in self.watcher.directories()]:
+                self.watcher.addPath(path)
+                
+                
+    def sync_library(self):
         
-        if not os.listdir(self.sounds_path):
+        """
+        Scan the sounds folder on a background thread after a batch of changes, so that probing new files never holds
+        up the window. Changes made while a scan is running are picked up by another scan once it has finished.
+        """
         
-            no_files_label = QLabel("Looks like we don't have any files yet. Click 'Add File(s)' to add some sounds!")
-
-            font = no_files_label.font()
-            font.setPointSize(15)
-
-            no_files_label.setFont(font)
-            self.grid.addWidget(no_files_label)
+        self.watch_sound_folders()
+        
+        if not self.library_ready or self.library_sync is not None:
             
-
+            self.library_sync_pending = True
             return
         
-        if not os.path.exists(self.unedited_sounds_path):
+        self.library_sync_pending = False
+        
+        self.library_sync = threading.Thread(target=self._sync_library, daemon=True)
+        self.library_sync.start()
+        
+        
+    def _sync_library(self):
+        
+        try:
             
-            os.makedirs(self.unedited_sounds_path)
-   
-
-        files = [f for f in os.listdir(self.sounds_path) if f.endswith(('.wav', '.mp3'))]
-
-        for idx, file in enumerate(files):
+            #Only files that have changed since the last scan are probed for their duration again
+            entries = self.library.scan(self.sounds_path)
+            changes = self.library.changes
+            
+            #The decoded copies of sounds that were removed, renamed or replaced are of no more use
+            if changes["modified"] or changes["removed"]:
+                self.prune_disk_cache()
+                
+        except Exception as e:
+            
+            print(f"Error, unable to scan the sounds folder, see: {e}")
+            entries, changes = dict(self.library.entries), {"added": [], "modified": [], "removed": []}
+            
+        self.library_synced.emit(entries, changes)
+        
+        
+    def apply_library_sync(self, entries, changes):
+        
+        """
+        Apply the results of a scan made by sync_library(). Only sounds that were added, modified or
+        removed are touched, and the decoded copies of modified or removed sounds are freed.
+        """
+        
+        self.library_sync = None
+        self.load_sounds(entries)
+        
+        for file in changes["modified"] + changes["removed"]:
             
-            name = os.path.splitext(file)[0]
             path = os.path.join(self.sounds_path, file)
             
-            duration = self.get_duration(path, file)
+            self.player.cache.invalidate(path)
+            self.player.render_cache.invalidate(path)
             
-            devices = [self.settings["default_input"], self.settings["default_output"]]
-
-            btn = QPushButton(f" {name[:40]}")
-            btn.setProperty("class", "SoundButton")
-            btn.setFixedHeight(75)
+        #Modified sounds are armed again
+        if changes["modified"]:
+            self.arm_sounds()
+            
+        if self.edit_files_view is not None and any(changes.values()):
+            self.edit_files_view.load_sound_options([os.path.splitext(file)[0] for file in changes["modified"]])
+            
+        if self.library_sync_pending:
+            self.sync_library()
+            
+            
+    def update_home_grid(self, names):
+        
+        """
+        Bring the home grid in line with the given sound names, only creating or deleting the buttons that
+        have changed. New sounds are added at the end, so the other buttons only move when one is removed.
+        """
+        
+        removed = [name for name in self.home_buttons.keys() if name not in names]
+        
+        for name in removed:
+            
+            btn = self.home_buttons.pop(name)
+            self.grid.removeWidget(btn)
+            btn.deleteLater()
+            
+        for name in names:
+            
+            if name not in self.home_buttons.keys():
                 
-            btn.clicked.connect(lambda _, p=path, v = self.settings["volume"]: self.player.play_sound(path = p, devices = devices, volume = v))
-
-            row, col = divmod(idx, 3)
-            self.grid.addWidget(btn, row, col)
-
-            if name not in self.sound_buttons.keys():
-                self.sound_buttons[name] = {"path": path, "emoji": f"{self.icons_path}/Icon_Placeholder.png", "duration": duration, "file_type": f".{path.split(".")[-1]}"}
+                self.home_buttons[name] = self.create_sound_button(name)
+                
+                if not removed:
+                    
+                    row, col = divmod(len(self.home_buttons) - 1, 3)
+                    self.grid.addWidget(self.home_buttons[name], row, col)
+                    
+        if removed:
+            
+            for idx, btn in enumerate(self.home_buttons.values()):
+                
+                row, col = divmod(idx, 3)
+                
+                self.grid.removeWidget(btn)
+                self.grid.addWidget(btn, row, col)
+                
+        if not names and self.no_files_label is None:
+            
+            self.no_files_label = QLabel("Looks like we don't have any files yet. Click 'Add File(s)' to add some sounds!")
 
-            if name in self.button_icons.keys():
-                self.sound_buttons[name]["emoji"] = self.button_icons[name]
+            font = self.no_files_label.font()
+            font.setPointSize(15)
 
-            if self.sound_buttons[name]["emoji"] != f"{self.icons_path}/Icon_Placeholder.png":
-                btn.setIcon(QIcon(self.sound_buttons[name]["emoji"]))
-                btn.setIconSize(QSize(60, 55))
+            self.no_files_label.setFont(font)
+            self.grid.addWidget(self.no_files_label)
+            
+        elif names and self.no_files_label is not None:
+            
+            self.grid.removeWidget(self.no_files_label)
+            self.no_files_label.deleteLater()
+            self.no_files_label = None
+            
+            
+    def create_sound_button(self, name):
+        
+        btn = QPushButton(f" {name[:40]}")
+        btn.setProperty("class", "SoundButton")
+        btn.setFixedHeight(75)
+            
+        btn.clicked.connect(lambda _, name = name: self.play_sound(name))
+        
+        #Right clicking a sound stops it
+        btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        btn.customContextMenuRequested.connect(lambda _, name = name: self.stop_sound(name))
+        
+        btn.setToolTip(self.key_tool_tip(name))
+        self.update_sound_button_icon(name, btn)
+        
+        return btn
+    
+    
+    def update_sound_button_icon(self, name, btn = None):
+        
+        #Away from the home view there are no buttons to update, they are given their icons when it is built again
+        if btn is None and not self.home_view_active:
+            return
+        
+        btn = btn if btn is not None else self.home_buttons.get(name)
+        
+        if btn is None:
+            return
+        
+        if self.sound_buttons[name]["emoji"] != f"{self.icons_path}/Icon_Placeholder.png":
+            
+            #The placeholder is shown until the thumbnail has been loaded off the GUI thread
+            pixmap = self.thumbnails.get(self.sound_buttons[name]["emoji"], 60)
+            
+            btn.setIcon(QIcon(pixmap if pixmap is not None else self.placeholder_pixmap))
+            btn.setIconSize(QSize(60, 55))
+            
+        else:
+            btn.setIcon(QIcon())
+            
+            
+    def thumbnail_ready(self, path, size):
+        
+        if not self.home_view_active:
+            return
+        
+        for name, btn in self.home_buttons.items():
+            
+            if self.sound_buttons[name]["emoji"] == path:
+                self.update_sound_button_icon(name, btn)
+            
+            
+    def rename_home_button(self, original, new_name):
+        
+        #The buttons are made again from sound_buttons when the home view is next built
+        if not self.home_view_active or original not in self.home_buttons.keys():
+            return
+        
+        #Rebuilding the dictionary keeps the button in the same position within the grid
+        self.home_buttons = {(new_name if name == original else name): btn for name, btn in self.home_buttons.items()}
+        
+        btn = self.home_buttons[new_name]
+        btn.setText(f" {new_name[:40]}")
+        
+        btn.clicked.disconnect()
+        btn.clicked.connect(lambda _, name = new_name: self.play_sound(name))
 
 
 
@@ -1077,6 +5757,12 @@ class MainWindow(QMainWindow):
         self.grid = QGridLayout(self.content_widget)
         self.grid.setHorizontalSpacing(50)
         self.grid.setVerticalSpacing(20)
+        
+        #The previous home view's widgets are deleted along with the old central widget
+        self.home_buttons = {}
+        self.no_files_label = None
+        self.home_view_active = True
+        self.edit_files_view = None
 
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
@@ -1107,33 +5793,98 @@ class MainWindow(QMainWindow):
         
     def add_files(self):
         
+        if self.importer is not None:
+            
+            QMessageBox.information(self, "Import Running", "Please wait for the current import to finish before adding more files.")
+            return
+        
         file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Files", "", "Sound Files (*.mp3 *.wav)")
         
-        if file_paths:
-            for path in file_paths:
+        if not file_paths:
+            return
+        
+        os.makedirs(self.sounds_path, exist_ok=True)
+        
+        predecode = self.player.predecode if self.settings["import_predecode"] else None
+        
+        #The files are copied and probed in the background, and published to the board by publish_imports() as they finish
+        self.importer = SoundImporter(self.library, self.sounds_path, self.settings["import_workers"], predecode)
+        self.import_errors = []
+        
+        self.import_progress = QProgressDialog("Importing sounds...", "Cancel", 0, len(file_paths), self)
+        self.import_progress.setWindowTitle("Add File(s)")
+        self.import_progress.setMinimumDuration(500)
+        self.import_progress.canceled.connect(self.importer.cancel)
+        
+        self.importer.start(file_paths)
+        self.import_timer.start()
+        
+        
+    def publish_imports(self):
+        
+        """
+        Add the sounds imported since the last call to the library and the board, and close the import once every file is done.
+        """
+        
+        imported, failed = self.importer.take()
+        
+        self.import_errors.extend(failed)
+        
+        if imported:
+            
+            self.library.add(imported)
+            names = [self.update_sound_entry(file, entry) for file, entry in imported]
+            
+            self.analyse_library()
+            
+            if self.home_view_active:
+                self.update_home_grid(list(self.sound_buttons.keys()))
                 
-                filename = os.path.basename(path)
-                destination = os.path.join(self.sounds_path, filename)
+            elif self.edit_files_view is not None:
+                self.edit_files_view.load_sound_options(names)
                 
-                try:
-                    shutil.copy(path, destination)
-                    
-                except Exception as e:
-                    QMessageBox.warning(self, "Error", f"Failed to copy {filename}:\n{e}")           
+        if not self.import_progress.wasCanceled():
+            self.import_progress.setValue(self.importer.done)
+            
+        if self.importer.finished():
+            
+            self.import_timer.stop()
+            self.import_progress.close()
+            self.importer = None
+            
+            if self.import_errors:
+                
+                errors = "\n".join(f"{filename}: {e}" for filename, e in self.import_errors)
+                QMessageBox.warning(self, "Error", f"Failed to import the following files:\n{errors}")
+        
+        
+    def leave_home_view(self):
+        
+        """
+        Forget the home view's widgets, which are deleted along with the central widget when another page replaces it.
+        """
         
-        self.load_sounds() 
+        self.home_view_active = False
+        self.home_buttons = {}
+        self.no_files_label = None
         
         
     def edit_files(self):
+        
+        self.leave_home_view()
 
         with open("themes/style_sheet_edit_files.qss", "r") as f:
             self.setStyleSheet(f.read())
 
-        self.setCentralWidget(EditFiles(self))
+        self.edit_files_view = EditFiles(self)
+        self.setCentralWidget(self.edit_files_view)
         self.resize(QSize(1400, 500))
         
         
     def settings_config(self):
+        
+        self.leave_home_view()
+        self.edit_files_view = None
     
         with open("themes/style_sheet_settings.qss", "r") as f:
             self.setStyleSheet(f.read())
@@ -1163,20 +5914,33 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         
+        self.player.prepare_cancel.set()
+        self.player.arm_cancel.set()
+        self.device_timer.stop()
+        
+        if self.importer is not None:
+            self.importer.cancel()
+            
+        self.analyser.shutdown()
+            
         self.player.stop()
+        self.player.close_streams()
         return super().closeEvent(event)
 
         
-app = QApplication([])
-window = MainWindow()
+#The loudness analysis processes import this file again, so the app must only start when it is run directly
+if __name__ == "__main__":
+    
+    app = QApplication(sys.argv)
+    window = MainWindow()
 
-roboto = QFontDatabase.addApplicationFont("fonts/Roboto/Roboto-Regular.ttf")
-roboto_medium = QFontDatabase.addApplicationFont("fonts/Roboto/Roboto-Medium.ttf")
-roboto_black = QFontDatabase.addApplicationFont("fonts/Roboto/Roboto-Black.ttf")
+    roboto = QFontDatabase.addApplicationFont("fonts/Roboto/Roboto-Regular.ttf")
+    roboto_medium = QFontDatabase.addApplicationFont("fonts/Roboto/Roboto-Medium.ttf")
+    roboto_black = QFontDatabase.addApplicationFont("fonts/Roboto/Roboto-Black.ttf")
 
 
-window.show()
-app.exec()
+    window.show()
+    app.exec()
 
 def show_error_message():
     